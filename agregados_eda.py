@@ -0,0 +1,420 @@
+"""Agregados da análise exploratória (contagens e quantis por nível), calculados numa única passada.
+
+Uso:
+    python agregados_eda.py novos_pacientes.csv
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from dataset_cache import apply_schema, atomic_path, file_sha256, load_dataset
+
+COLUNA_NIVEL = 'Nivel_Obesidade'
+
+ORDEM_NIVEIS = [
+    'Abaixo do Peso', 'Peso Normal',
+    'Sobrepeso Grau I', 'Sobrepeso Grau II',
+    'Obesidade Grau I', 'Obesidade Grau II', 'Obesidade Grau III'
+]
+
+NOVAS_COLUNAS = {
+    'Gender': 'Genero',
+    'Age': 'Idade',
+    'Height': 'Altura',
+    'Weight': 'Peso',
+    'family_history': 'Historico_Familiar',
+    'FAVC': 'Consumo_Alta_Caloria',
+    'FCVC': 'Freq_Vegetais',
+    'NCP': 'Num_Refeicoes',
+    'CAEC': 'Comer_Entre_Refeicoes',
+    'SMOKE': 'Fumante',
+    'CH2O': 'Consumo_Agua',
+    'SCC': 'Monitora_Calorias',
+    'FAF': 'Freq_Ativ_Fisica',
+    'TUE': 'Tempo_Dispositivos',
+    'CALC': 'Consumo_Alcool',
+    'MTRANS': 'Transporte',
+    'Obesity': 'Nivel_Obesidade'
+}
+
+# Atributos categóricos cruzados com o nível de obesidade nos gráficos
+ATRIBUTOS = [
+    'Genero', 'Historico_Familiar', 'Freq_Vegetais_Label', 'Consumo_Agua_Label',
+    'Consumo_Alcool', 'Freq_Ativ_Fisica_Label', 'Fumante', 'Tempo_Dispositivos_Label',
+    'Monitora_Calorias',
+]
+
+# Colunas numéricas resumidas em estatísticas de boxplot por nível
+NUMERICAS = ['Idade']
+
+# O armazém incremental conta também os atributos que só aparecem no texto
+ATRIBUTOS_ARMAZEM = ATRIBUTOS + ['Consumo_Alta_Caloria', 'Comer_Entre_Refeicoes', 'Transporte']
+
+# Faixa (mínimo, máximo, largura do bin) dos esboços de quantis. Bins fixos
+# tornam os histogramas de lotes diferentes somáveis diretamente
+FAIXAS_ESBOCO = {
+    'Idade': (0.0, 100.0, 0.25),
+    'Altura': (1.0, 2.2, 0.005),
+    'Peso': (20.0, 220.0, 0.25),
+}
+
+ARMAZEM_VERSAO = 1
+
+
+def _traduzir(serie, traducao):
+    """Renomeia as categorias; o custo depende do número de categorias, não de linhas"""
+    return serie.astype('category').cat.rename_categories(lambda categoria: traducao.get(categoria, categoria))
+
+
+def _rotular(valores, rotulos):
+    """Rótulo de uma coluna ordinal como category, na ordem do dicionário de rótulos"""
+    return valores.map(rotulos).astype(pd.CategoricalDtype(list(rotulos.values())))
+
+
+def preparar_dados(df):
+    """Tipa, renomeia e traduz as colunas e cria os rótulos usados nos gráficos"""
+    # Linhas vindas direto de um CSV recebem os mesmos tipos do cache colunar
+    df = apply_schema(df).rename(columns=NOVAS_COLUNAS)
+    sim_nao = {'yes': 'Sim', 'no': 'Não'}
+    frequencia = {'no': 'Não', 'Sometimes': 'Às Vezes', 'Frequently': 'Frequentemente', 'Always': 'Sempre'}
+
+    traducao_obesidade = {
+        'Insufficient_Weight': 'Abaixo do Peso',
+        'Normal_Weight': 'Peso Normal',
+        'Overweight_Level_I': 'Sobrepeso Grau I',
+        'Overweight_Level_II': 'Sobrepeso Grau II',
+        'Obesity_Type_I': 'Obesidade Grau I',
+        'Obesity_Type_II': 'Obesidade Grau II',
+        'Obesity_Type_III': 'Obesidade Grau III'
+    }
+    df['Nivel_Obesidade'] = (
+        _traduzir(df['Nivel_Obesidade'], traducao_obesidade).cat.set_categories(ORDEM_NIVEIS, ordered=True)
+    )
+    df['Genero'] = _traduzir(df['Genero'], {'Male': 'Masculino', 'Female': 'Feminino'})
+
+    # Demais traduções (mesmo fluxo do notebook)
+    df['Historico_Familiar'] = _traduzir(df['Historico_Familiar'], sim_nao)
+    df['Consumo_Alta_Caloria'] = _traduzir(df['Consumo_Alta_Caloria'], sim_nao)
+    df['Comer_Entre_Refeicoes'] = _traduzir(df['Comer_Entre_Refeicoes'], frequencia)
+    df['Fumante'] = _traduzir(df['Fumante'], sim_nao)
+    df['Monitora_Calorias'] = _traduzir(df['Monitora_Calorias'], sim_nao)
+    df['Consumo_Alcool'] = _traduzir(df['Consumo_Alcool'], {**frequencia, 'no': 'Não bebe'})
+    df['Transporte'] = _traduzir(df['Transporte'], {
+        'Public_Transportation': 'Transporte Público',
+        'Walking': 'Caminhada',
+        'Automobile': 'Carro',
+        'Motorbike': 'Moto',
+        'Bike': 'Bicicleta'
+    })
+
+    # Colunas derivadas usadas nos plots (as ordinais já chegam arredondadas)
+    df['Freq_Vegetais_Label'] = _rotular(df['Freq_Vegetais'], {1: 'Raramente', 2: 'Às Vezes', 3: 'Sempre'})
+    df['Consumo_Agua_Label'] = _rotular(df['Consumo_Agua'], {1: 'Menos de 1L', 2: 'Entre 1L e 2L', 3: 'Mais de 2L'})
+    df['Freq_Ativ_Fisica_Label'] = _rotular(df['Freq_Ativ_Fisica'], {
+        0: 'Nenhuma',
+        1: '1 a 2 dias/sem',
+        2: '3 a 4 dias/sem',
+        3: 'Mais de 4 dias/sem'
+    })
+    df['Tempo_Dispositivos_Label'] = _rotular(df['Tempo_Dispositivos'], {
+        0: '0-2 horas',
+        1: '3-5 horas',
+        2: 'Mais de 5 horas'
+    })
+    return df
+
+
+class AgregadosEDA:
+    """Tabelas de contagem e estatísticas de boxplot por nível de obesidade"""
+
+    def __init__(self, ordem_niveis, contagens, boxplots, total_linhas):
+        self.ordem_niveis = list(ordem_niveis)
+        # atributo -> DataFrame (níveis x categorias, na ordem em que aparecem nos dados)
+        self.contagens = contagens
+        # coluna numérica -> lista de dicts no formato de Axes.bxp, um por nível
+        self.boxplots = boxplots
+        self.total_linhas = total_linhas
+
+    def longa(self, atributo):
+        """Contagens em formato longo (nível, categoria, Quantidade), prontas para sns.barplot"""
+        tabela = self.contagens[atributo]
+        longa = tabela.rename_axis(index=COLUNA_NIVEL, columns=atributo).stack().rename('Quantidade').reset_index()
+        longa[COLUNA_NIVEL] = pd.Categorical(longa[COLUNA_NIVEL], categories=self.ordem_niveis, ordered=True)
+        return longa
+
+    def percentual(self, atributo):
+        """Percentual de cada categoria dentro de cada nível (crosstab normalizado por linha)"""
+        tabela = self.contagens[atributo]
+        totais = tabela.sum(axis=1).replace(0, np.nan)
+        return tabela.div(totais, axis=0) * 100
+
+
+def _estatisticas_boxplot(niveis, valores, ordem_niveis, max_outliers):
+    """Quartis, bigodes (1,5 IQR) e outliers por nível, como o boxplot do matplotlib"""
+    validos = (niveis >= 0) & ~np.isnan(valores)
+    niveis, valores = niveis[validos], valores[validos]
+    serie = pd.Series(valores)
+    quartis = serie.groupby(niveis).quantile([0.25, 0.5, 0.75]).unstack()
+
+    n_niveis = len(ordem_niveis)
+    q1 = quartis[0.25].reindex(range(n_niveis)).to_numpy()
+    q3 = quartis[0.75].reindex(range(n_niveis)).to_numpy()
+    iqr = q3 - q1
+    dentro = (valores >= (q1 - 1.5 * iqr)[niveis]) & (valores <= (q3 + 1.5 * iqr)[niveis])
+    bigodes = serie[dentro].groupby(niveis[dentro]).agg(['min', 'max'])
+
+    estatisticas = []
+    for codigo, nivel in enumerate(ordem_niveis):
+        if codigo not in quartis.index:
+            continue
+        fora = np.unique(valores[~dentro & (niveis == codigo)])
+        if len(fora) > max_outliers:
+            # Limita os pontos desenhados mantendo os extremos da distribuição
+            fora = fora[np.linspace(0, len(fora) - 1, max_outliers).astype(int)]
+        estatisticas.append({
+            'label': nivel,
+            'q1': quartis.at[codigo, 0.25],
+            'med': quartis.at[codigo, 0.5],
+            'q3': quartis.at[codigo, 0.75],
+            'whislo': bigodes.at[codigo, 'min'],
+            'whishi': bigodes.at[codigo, 'max'],
+            'fliers': fora,
+        })
+    return estatisticas
+
+
+def contar_por_nivel(df, ordem_niveis, atributos):
+    """Tabelas nível x categoria de cada atributo, numa única passada agrupada"""
+    # Uma única passada agrupada sobre as linhas: contagem de cada combinação
+    # nível x atributos. O número de combinações é limitado pelas cardinalidades,
+    # não pelo número de linhas, e as tabelas por atributo saem de marginais dela.
+    combinacoes = df.groupby([COLUNA_NIVEL, *atributos], observed=True, sort=False, dropna=False).size()
+
+    contagens = {}
+    for atributo in atributos:
+        marginal = combinacoes.groupby(level=[COLUNA_NIVEL, atributo], observed=True, sort=False, dropna=False).sum()
+        # Com sort=False as categorias aparecem na ordem dos dados, como no countplot
+        categorias = [c for c in pd.unique(marginal.index.get_level_values(atributo)) if pd.notna(c)]
+        marginal = marginal[marginal.index.get_level_values(atributo).notna()]
+        contagens[atributo] = (
+            marginal.unstack(atributo, fill_value=0)
+            .reindex(index=ordem_niveis, columns=categorias, fill_value=0)
+            .astype(int)
+        )
+    return contagens
+
+
+def calcular_agregados(df, ordem_niveis, atributos=ATRIBUTOS, numericas=NUMERICAS, max_outliers=200):
+    """Calcula todas as tabelas dos gráficos a partir da saída de carregar_dados()"""
+    contagens = contar_por_nivel(df, ordem_niveis, atributos)
+    codigos_nivel = df[COLUNA_NIVEL].cat.codes.to_numpy()
+    boxplots = {
+        coluna: _estatisticas_boxplot(codigos_nivel, df[coluna].to_numpy(dtype=float), ordem_niveis, max_outliers)
+        for coluna in numericas
+    }
+    return AgregadosEDA(ordem_niveis, contagens, boxplots, len(df))
+
+
+class EsbocoQuantis:
+    """Histograma de bins fixos por nível; quantis com erro de no máximo um bin"""
+
+    def __init__(self, minimo, maximo, largura, n_niveis, contagens=None):
+        self.minimo, self.maximo, self.largura = minimo, maximo, largura
+        self.n_bins = int(round((maximo - minimo) / largura))
+        if contagens is None:
+            contagens = np.zeros((n_niveis, self.n_bins), dtype=np.int64)
+        self.contagens = np.asarray(contagens, dtype=np.int64)
+
+    def adicionar(self, codigos_nivel, valores):
+        """Soma um lote de valores; fora da faixa caem no primeiro/último bin"""
+        validos = (codigos_nivel >= 0) & np.isfinite(valores)
+        bins = np.clip(((valores[validos] - self.minimo) / self.largura).astype(np.int64), 0, self.n_bins - 1)
+        indices = codigos_nivel[validos].astype(np.int64) * self.n_bins + bins
+        self.contagens += np.bincount(indices, minlength=self.contagens.size).reshape(self.contagens.shape)
+
+    def mesclar(self, outro):
+        self.contagens += outro.contagens
+
+    def quantil(self, q, nivel=None):
+        """Quantil q (0-1) de um nível (código) ou da base inteira, interpolado dentro do bin"""
+        contagens = self.contagens.sum(axis=0) if nivel is None else self.contagens[nivel]
+        total = contagens.sum()
+        if total == 0:
+            return float('nan')
+        acumulado = np.cumsum(contagens)
+        alvo = q * total
+        bin_ = min(int(np.searchsorted(acumulado, alvo)), self.n_bins - 1)
+        anterior = acumulado[bin_ - 1] if bin_ > 0 else 0
+        fracao = (alvo - anterior) / contagens[bin_] if contagens[bin_] else 0.0
+        return float(self.minimo + (bin_ + fracao) * self.largura)
+
+    def para_dict(self):
+        return {
+            'faixa': [self.minimo, self.maximo, self.largura],
+            'contagens': self.contagens.tolist(),
+        }
+
+    @classmethod
+    def de_dict(cls, dados):
+        minimo, maximo, largura = dados['faixa']
+        contagens = np.asarray(dados['contagens'], dtype=np.int64)
+        return cls(minimo, maximo, largura, contagens.shape[0], contagens)
+
+
+class ArmazemAgregados:
+    """Contagens por nível e esboços de quantis, persistidos em JSON e somados lote a lote"""
+
+    def __init__(self, ordem_niveis=ORDEM_NIVEIS, atributos=ATRIBUTOS_ARMAZEM, faixas=FAIXAS_ESBOCO):
+        self.ordem_niveis = list(ordem_niveis)
+        self.atributos = list(atributos)
+        self.contagens = {
+            atributo: pd.DataFrame(0, index=self.ordem_niveis, columns=[], dtype=np.int64)
+            for atributo in self.atributos
+        }
+        self.esbocos = {
+            coluna: EsbocoQuantis(*faixa, n_niveis=len(self.ordem_niveis))
+            for coluna, faixa in faixas.items()
+        }
+        self.por_nivel = np.zeros(len(self.ordem_niveis), dtype=np.int64)
+        self.base = None
+        # Linhas somadas depois da construção a partir do CSV base
+        self.linhas_adicionadas = 0
+
+    @property
+    def total_linhas(self):
+        return int(self.por_nivel.sum())
+
+    def adicionar(self, df_bruto):
+        """Agrega um lote de linhas no formato de Obesity.csv e soma ao armazém"""
+        df = preparar_dados(df_bruto)
+        codigos = df[COLUNA_NIVEL].cat.codes.to_numpy()
+        self.por_nivel += np.bincount(codigos[codigos >= 0], minlength=len(self.ordem_niveis))
+
+        for atributo, tabela in contar_por_nivel(df, self.ordem_niveis, self.atributos).items():
+            self._somar_tabela(atributo, tabela)
+        for coluna, esboco in self.esbocos.items():
+            esboco.adicionar(codigos, df[coluna].to_numpy(dtype=float))
+        self.linhas_adicionadas += len(df)
+        return self
+
+    def _somar_tabela(self, atributo, tabela):
+        atual = self.contagens.get(atributo, pd.DataFrame(0, index=self.ordem_niveis, columns=[]))
+        # Categorias novas entram no fim, preservando a ordem já gravada
+        colunas = list(atual.columns) + [c for c in tabela.columns if c not in atual.columns]
+        self.contagens[atributo] = (
+            atual.reindex(columns=colunas, fill_value=0)
+            .add(tabela.reindex(columns=colunas, fill_value=0), fill_value=0)
+            .astype(np.int64)
+        )
+
+    def mesclar(self, outro):
+        """Soma outro armazém com os mesmos níveis e faixas (ex.: agregado em outro processo)"""
+        for atributo, tabela in outro.contagens.items():
+            self._somar_tabela(atributo, tabela)
+        for coluna, esboco in outro.esbocos.items():
+            self.esbocos[coluna].mesclar(esboco)
+        self.por_nivel += outro.por_nivel
+        self.linhas_adicionadas += outro.total_linhas
+        return self
+
+    def _codigo(self, nivel):
+        return None if nivel is None else self.ordem_niveis.index(nivel)
+
+    def contagem(self, atributo, nivel, categoria):
+        tabela = self.contagens[atributo]
+        if categoria not in tabela.columns:
+            return 0
+        return int(tabela.at[nivel, categoria])
+
+    def percentual(self, atributo, nivel, categoria):
+        """Percentual de pacientes do nível com a categoria (0 se o nível estiver vazio)"""
+        total = int(self.contagens[atributo].loc[nivel].sum())
+        return 100.0 * self.contagem(atributo, nivel, categoria) / total if total else 0.0
+
+    def quantil(self, coluna, q, nivel=None):
+        return self.esbocos[coluna].quantil(q, self._codigo(nivel))
+
+    def salvar(self, caminho):
+        os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+        dados = {
+            'versao': ARMAZEM_VERSAO,
+            'base': self.base,
+            'linhas_adicionadas': self.linhas_adicionadas,
+            'ordem_niveis': self.ordem_niveis,
+            'por_nivel': self.por_nivel.tolist(),
+            'contagens': {
+                atributo: {'categorias': list(tabela.columns), 'valores': tabela.to_numpy().tolist()}
+                for atributo, tabela in self.contagens.items()
+            },
+            'esbocos': {coluna: esboco.para_dict() for coluna, esboco in self.esbocos.items()},
+        }
+        with atomic_path(caminho) as tmp, open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False)
+        return caminho
+
+    @classmethod
+    def carregar(cls, caminho):
+        with open(caminho, encoding='utf-8') as f:
+            dados = json.load(f)
+        if dados.get('versao') != ARMAZEM_VERSAO:
+            raise ValueError(f'Versão de armazém incompatível: {dados.get("versao")}')
+        armazem = cls(dados['ordem_niveis'], list(dados['contagens']), faixas={})
+        armazem.base = dados['base']
+        armazem.linhas_adicionadas = dados['linhas_adicionadas']
+        armazem.por_nivel = np.asarray(dados['por_nivel'], dtype=np.int64)
+        armazem.contagens = {
+            atributo: pd.DataFrame(
+                np.asarray(tabela['valores'], dtype=np.int64).reshape(len(armazem.ordem_niveis), -1),
+                index=armazem.ordem_niveis, columns=tabela['categorias'],
+            )
+            for atributo, tabela in dados['contagens'].items()
+        }
+        armazem.esbocos = {coluna: EsbocoQuantis.de_dict(esboco) for coluna, esboco in dados['esbocos'].items()}
+        return armazem
+
+    @classmethod
+    def abrir(cls, caminho, base, ler_base):
+        """Carrega o armazém gravado para esta base ou o reconstrói com ler_base()"""
+        if os.path.exists(caminho):
+            try:
+                armazem = cls.carregar(caminho)
+                if armazem.base == base:
+                    return armazem
+            except (OSError, ValueError, KeyError):
+                pass
+        armazem = cls().adicionar(ler_base())
+        armazem.base = base
+        # Só contam como adicionadas as linhas que chegaram depois da base
+        armazem.linhas_adicionadas = 0
+        try:
+            armazem.salvar(caminho)
+        except OSError:
+            # Sem disco gravável a página usa o armazém em memória e o recalcula na próxima vez
+            pass
+        return armazem
+
+
+def caminho_armazem(model_dir='artefatos'):
+    return os.path.join(model_dir, 'agregados_eda.json')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Soma novas linhas rotuladas ao armazém de agregados da EDA')
+    parser.add_argument('entrada', help='CSV com as colunas de Obesity.csv, incluindo Obesity')
+    parser.add_argument('--data', default='Obesity.csv', help='CSV base do armazém')
+    parser.add_argument('--model-dir', default='artefatos')
+    args = parser.parse_args()
+
+    caminho = caminho_armazem(args.model_dir)
+    armazem = ArmazemAgregados.abrir(caminho, file_sha256(args.data), lambda: load_dataset(args.data, args.model_dir))
+    lote = pd.read_csv(args.entrada)
+    armazem.adicionar(lote)
+    armazem.salvar(caminho)
+    print(f'{len(lote)} linhas somadas; armazém com {armazem.total_linhas} linhas em {caminho}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,10 @@
+import queue
+
 import streamlit as st
-import pandas as pd
-from machine_learning import ObesityPredictor
+import clinical_rules
+from audit_log import AuditLog
+from machine_learning import ModelWarmup, ObesityPredictor
+from patient_reports import build_probability_bars, get_class_info, get_recommendations
 
 # --- CONFIGURAÇÃO DA PÁGINA ---
 st.set_page_config(page_title="Prevendo Obesidade", layout="wide")
@@ -108,182 +112,73 @@ st.markdown("""
 
 # --- FUNÇÕES AUXILIARES ---
 
-def get_class_info(classe_ingles):
-    # (Nome em Português, Cor Hexadecimal)
-    mapa = {
-        'Insufficient_Weight': ('Abaixo do Peso', '#00E676'),      # Verde Neon
-        'Normal_Weight':       ('Peso Normal',    '#00C853'),      # Verde Forte
-        'Overweight_Level_I':  ('Sobrepeso G1',   '#FFD600'),      # Amarelo Ouro
-        'Overweight_Level_II': ('Sobrepeso G2',   '#FFAB00'),      # Laranja Vivo
-        'Obesity_Type_I':      ('Obesidade G1',   '#FF6D00'),      # Laranja Avermelhado
-        'Obesity_Type_II':     ('Obesidade G2',   '#D50000'),      # Vermelho Intenso
-        'Obesity_Type_III':    ('Obesidade G3',   '#C51162')       # Magenta/Vinho
-    }
-    return mapa.get(classe_ingles, (classe_ingles, '#ccc'))
-
-def get_recommendations(classe_pt):
-    # Retorna (Texto da recomendação, Texto do Link, URL do Link)
-    if 'Obesidade' in classe_pt:
-        return (
-            "A obesidade é uma doença crônica. Recomendamos buscar orientação médica (endocrinologista) e nutricional para um plano seguro.",
-            "Diretrizes Brasileiras de Obesidade (ABESO)",
-            "https://abeso.org.br/diretrizes/"
-        )
-    elif 'Sobrepeso' in classe_pt:
-        return (
-            "Sinal de alerta. Pequenas mudanças nos hábitos, como aumentar a ingestão de água e caminhar 30min por dia, podem reverter esse quadro.",
-            "Guia Alimentar para a População Brasileira",
-            "https://bvsms.saude.gov.br/bvs/publicacoes/guia_alimentar_populacao_brasileira_2ed.pdf"
-        )
-    elif 'Abaixo do Peso' in classe_pt:
-        return (
-            "Estar abaixo do peso requer atenção para evitar deficiências nutricionais. Consulte um nutricionista para adequar a dieta.",
-            "Dicas de Nutrição (Saúde Brasil)",
-            "https://www.gov.br/saude/pt-br"
-        )
-    else: # Peso Normal
-        return (
-            "Excelente! Para manter seu peso saudável, priorize alimentos in natura e mantenha uma rotina ativa de exercícios.",
-            "Recomendações da OMS para Atividade Física",
-            "https://www.who.int/news-room/fact-sheets/detail/physical-activity"
-        )
-
 def build_clinical_insights(user_data, pred_label):
     """Gera alertas praticos com base no perfil informado e no nivel previsto."""
-    severity = {
-        'Insufficient_Weight': 0,
-        'Normal_Weight': 1,
-        'Overweight_Level_I': 2,
-        'Overweight_Level_II': 3,
-        'Obesity_Type_I': 4,
-        'Obesity_Type_II': 5,
-        'Obesity_Type_III': 6,
-    }.get(pred_label, 0)
-
-    insights = []  # cada item: {"title": str, "lines": [str, ...]}
-    gender = user_data.get('Gender')
-    age = user_data.get('Age')
-
-    if user_data.get('family_history') == 'yes' and severity >= 4:
-        insights.append({
-            "title": "Historico familiar",
-            "lines": [
-                "Pacientes em graus II e III costumam ter historico de obesidade na familia; inclua a triagem familiar no plano de ação.",
-                "Considere intervenções que envolvam rotina alimentar e atividade fisica do nucleo familiar."
-            ]
-        })
-    elif user_data.get('family_history') == 'yes':
-        insights.append({
-            "title": "Historico familiar",
-            "lines": [
-                "Familia com obesidade aumenta a chance de progressão; acompanhe com revisões periodicas.",
-                "Oriente a familia sobre sinais precoces e metas conjuntas."
-            ]
-        })
-
-    if user_data.get('SCC') == 'no':
-        insights.append({
-            "title": "Monitoração calórica",
-            "lines": [
-                "O registro alimentar costuma ser ausente nos graus graves; introduza o uso de um diario/cálculo simples para controle de calorias.",
-                "Sugira aplicativos ou planilhas rápidas que somem calorias de forma prática."
-            ]
-        })
-
-    faf = user_data.get('FAF', 0)
-    if faf == 0 and severity >= 4:
-        insights.append({
-            "title": "Atividade fisica",
-            "lines": [
-                "O paciente apresenta sedentarismo total com obesidade avançada: iniciar plano supervisionado e progressivo para evitar lesão.",
-                "Combine fortalecimento leve + caminhada curta e aumente gradualmente."
-            ]
-        })
-    elif faf <= 1 and severity >= 2:
-        insights.append({
-            "title": "Atividade fisica",
-            "lines": [
-                "Baixa atividade: alinhar dieta estruturada e progressão de exercicios para conter ganho.",
-                "Metas semanais curtas (ex.: 2-3 sessões leves) ajudam na adesão."
-            ]
-        })
-
-    if age is not None and age <= 30 and severity >= 3:
-        insights.append({
-            "title": "Adulto jovem",
-            "lines": [
-                "Obesidade severa em faixa jovem pede abordagem precoce e intensiva.",
-                "Reforce orientações sobre fertilidade, metabolismo e longo prazo."
-            ]
-        })
-
-    if gender == 'Male' and pred_label == 'Obesity_Type_II':
-        insights.append({
-            "title": "Perfil masculino",
-            "lines": [
-                "Homens tendem a aparecer em Grau II; avalie rotina laboral, sono e ingestão proteica.",
-                "Cheque circunferência abdominal e risco cardiometabolico."
-            ]
-        })
-    if gender == 'Female' and pred_label == 'Obesity_Type_III':
-        insights.append({
-            "title": "Perfil feminino",
-            "lines": [
-                "Mulheres em Grau III se beneficiam de acompanhamento multidisciplinar intensivo.",
-                "Inclua suporte psicologico e manejo de deficiências micronutricionais."
-            ]
-        })
-
-    if user_data.get('FCVC') == 3 and severity >= 4:
-        insights.append({
-            "title": "Consumo de vegetais",
-            "lines": [
-                "Mesmo relatando vegetais sempre, o balanco calórico pode estar positivo.",
-                "Revise molhos, porções e acompanhamentos calóricos."
-            ]
-        })
-
-    if user_data.get('CH2O') == 3 and severity >= 4:
-        insights.append({
-            "title": "Liquidos",
-            "lines": [
-                "Alto consumo de líquidos pode incluir bebidas calóricas; diferencie água de sucos/refrigerantes.",
-                "Estimule água pura e reduza bebidas adoçadas."
-            ]
-        })
-
-    calc = user_data.get('CALC')
-    if calc in ['Sometimes', 'Frequently', 'Always'] and severity >= 3:
-        insights.append({
-            "title": "Alcool",
-            "lines": [
-                "Mesmo ocasional, alcool soma calorias vazias e piora controle de apetite.",
-                "Negocie redução ou pausas semanais, especialmente em graus elevados."
-            ]
-        })
+    # Mesmas regras da pontuação em lote (clinical_rules), avaliadas para um único paciente
+    # cada item: {"title": str, "lines": [str, ...]}
+    return clinical_rules.clinical_insights({col: [value] for col, value in user_data.items()}, [pred_label])[0]
+
+# Rótulos dos campos e valores (como no menu lateral), usados na simulação "E se...?" e nos fatores da predição
+FIELD_LABELS = {
+    'Gender': 'Gênero', 'Age': 'Idade', 'Height': 'Altura', 'Weight': 'Peso (kg)',
+    'family_history': 'Histórico familiar', 'FAVC': 'Alta caloria', 'FCVC': 'Vegetais',
+    'NCP': 'Refeições/dia', 'CAEC': 'Entre refeições', 'SMOKE': 'Fumante', 'CH2O': 'Água',
+    'SCC': 'Monitora calorias', 'FAF': 'Atividade física', 'TUE': 'Telas', 'CALC': 'Álcool',
+    'MTRANS': 'Transporte',
+}
+WHAT_IF_VALUE_LABELS = {
+    'yes': 'Sim', 'no': 'Não', 'Sometimes': 'Às Vezes', 'Frequently': 'Frequentemente', 'Always': 'Sempre',
+    'Public_Transportation': 'Transporte Público', 'Walking': 'Caminhada', 'Automobile': 'Carro',
+    'Motorbike': 'Moto', 'Bike': 'Bicicleta',
+}
 
-    if user_data.get('SMOKE') == 'yes':
-        insights.append({
-            "title": "Tabagismo",
-            "lines": [
-                "Apesar de raro, obesidade + tabagismo aumenta risco cardiometabolico.",
-                "Ofereça apoio para cessação e ajuste de peso no processo."
-            ]
+def build_what_if_rows(simulacao, user_data, pred_label):
+    """Linhas da tabela "E se...?": mudança, classe prevista e variação da probabilidade da classe atual."""
+    idx = simulacao['classes'].index(pred_label)
+    base = simulacao['base'][idx]
+    coluna_prob = f"Prob. {get_class_info(pred_label)[0]} (%)"
+    linhas = []
+    for changes, probas, label in zip(simulacao['changes'], simulacao['probas'], simulacao['labels']):
+        mudanca = ' + '.join(
+            f"{FIELD_LABELS[campo]}: {WHAT_IF_VALUE_LABELS.get(user_data[campo], user_data[campo])} → "
+            f"{WHAT_IF_VALUE_LABELS.get(valor, valor)}"
+            for campo, valor in changes.items()
+        )
+        linhas.append({
+            'Mudança': mudanca,
+            'Classe prevista': get_class_info(label)[0],
+            coluna_prob: round(probas[idx] * 100, 1),
+            'Variação (p.p.)': round((probas[idx] - base) * 100, 1),
         })
-
-    return insights
+    # Primeiro as mudanças que trocam a classe prevista, depois as de maior efeito
+    return sorted(linhas, key=lambda l: (l['Classe prevista'] == get_class_info(pred_label)[0], -abs(l['Variação (p.p.)'])))
 
 @st.cache_resource
-def get_model():
-    model = ObesityPredictor('Obesity.csv')
-    acc = model.train()
-    return model, acc
+def get_model_warmup():
+    # Carrega (ou treina, se o CSV/parâmetros mudaram) em segundo plano: a página renderiza na hora
+    # engine 'flat': floresta exportada para vetores NumPy, bem mais rápida por paciente
+    # evaluate=True: em seguida roda a validação cruzada (em cache no disco) para a acurácia exibida
+    # monitor_source: snapshots de deriva das entradas em artefatos/monitoramento (página Monitoramento)
+    return ModelWarmup(lambda: ObesityPredictor('Obesity.csv', engine='flat'), evaluate=True,
+                       monitor_source='app').start()
 
-try:
-    predictor, accuracy = get_model()
-except Exception as e:
-    st.error(f"Erro ao carregar modelo. {e}")
-    st.stop()
+@st.cache_resource
+def get_audit_log():
+    # Cada diagnóstico vai para uma fila; uma thread grava em lotes em artefatos/auditoria,
+    # então o clique não espera o disco
+    return AuditLog('artefatos/auditoria').start()
+
+warmup = get_model_warmup()
+# Estado fixado no início da execução, para a página não mudar de ideia no meio do script;
+# refresh() troca de modelo entre execuções quando uma nova geração é publicada
+predictor = warmup.refresh()
+
+@st.fragment(run_every=1)
+def acompanhar_carregamento():
+    # Recarrega a página inteira assim que o modelo fica pronto (ou falha)
+    if warmup.ready or warmup.failed:
+        st.rerun()
+    st.info(f"⏳ Carregando o modelo... ({warmup.status()['elapsed_seconds']:.0f}s)")
 
 # --- INTERFACE SIDEBAR ---
 st.sidebar.header("📋 Dados do Paciente")
@@ -310,7 +205,10 @@ calc = st.sidebar.selectbox("Consumo de Álcool", ["Não", "Às Vezes", "Frequen
 mtrans = st.sidebar.selectbox("Transporte Principal", ["Transporte Público", "Caminhada", "Carro", "Moto", "Bicicleta"])
 
 st.sidebar.markdown("---")
-botao_diagnostico = st.sidebar.button("🔍 Realizar Diagnóstico")
+if predictor is not None:
+    botao_diagnostico = st.sidebar.button("🔍 Realizar Diagnóstico")
+else:
+    botao_diagnostico = st.sidebar.button("⏳ Modelo carregando...", disabled=True)
 
 # Mapeamento Inputs -> Modelo
 user_data = {
@@ -342,10 +240,25 @@ with header_cols[1]:
         except Exception:
             st.info("Abra a página 'Análise Exploratória' no menu lateral (modo multipágina).")
 
-if botao_diagnostico:
+if warmup.failed:
+    st.error(f"Erro ao carregar modelo. {warmup.error}")
+    # O cache_resource guardaria o ModelWarmup com falha para sempre: a próxima execução tenta de novo
+    get_model_warmup.clear()
+    if st.button("🔄 Tentar novamente"):
+        st.rerun()
+
+elif predictor is None:
+    acompanhar_carregamento()
+
+elif botao_diagnostico:
     
     # 1. Predição
     pred_label, confidence, all_probs = predictor.predict(user_data)
+    try:
+        # Fila cheia (disco lento ou parado) não pode travar o diagnóstico
+        get_audit_log().log(user_data, pred_label, confidence, all_probs, predictor.model_version(), timeout=5)
+    except queue.Full:
+        st.warning("O log de auditoria está sobrecarregado; este diagnóstico não foi registrado.")
     label_pt, cor_res = get_class_info(pred_label)
     
     # 2. Recomendação
@@ -373,36 +286,38 @@ if botao_diagnostico:
     st.subheader("📊 Análise de Probabilidades por Classe")
     st.markdown("Probabilidade estimada do paciente pertencer a cada grupo:")
 
-    ordem_visual = [
-        'Insufficient_Weight', 'Normal_Weight', 
-        'Overweight_Level_I', 'Overweight_Level_II',
-        'Obesity_Type_I', 'Obesity_Type_II', 'Obesity_Type_III'
-    ]
-    
-    # --- CONSTRUÇÃO DO HTML DAS BARRAS ---
-    html_bars = '<div class="bar-chart-container">'
-    
-    for class_name in ordem_visual:
-        prob = all_probs.get(class_name, 0.0)
-        nome_pt, cor = get_class_info(class_name)
-        
-        # Altura da barra
-        height_px = max(prob * 100 * 2.5, 4) 
-        
-        # Se probabilidade < 1%, mostra vazio
-        text_display = f"{prob*100:.1f}%" if prob > 0.01 else ""
-        
-        # HTML sem indentação interna
-        html_bars += f'<div class="bar-wrapper">'
-        html_bars += f'<span class="probability-text">{text_display}</span>'
-        html_bars += f'<div class="bar" style="height: {height_px}px; background-color: {cor};"></div>'
-        html_bars += f'<span class="label-text">{nome_pt}</span>'
-        html_bars += f'</div>'
-    
-    html_bars += '</div>'
+    # Barras na ordem de gravidade (mesmo HTML dos relatórios em lote)
+    html_bars = build_probability_bars(all_probs)
     
     # RENDERIZAÇÃO FINAL
-    st.markdown(html_bars, unsafe_allow_html=True)
+    col_barras, col_fatores = st.columns([3, 1])
+    with col_barras:
+        st.markdown(html_bars, unsafe_allow_html=True)
+    with col_fatores:
+        # Decomposição pelos caminhos de decisão da floresta (custo próximo ao de uma predição)
+        st.markdown(f"**O que mais pesou para {label_pt}:**")
+        for feature, valor in predictor.explain(user_data)[:6]:
+            seta = "🔺" if valor > 0 else "🔻"
+            st.markdown(f"{seta} {FIELD_LABELS.get(feature, feature)}: {valor * 100:+.1f} p.p.")
+
+    st.subheader("👥 Pacientes semelhantes na base histórica")
+    # Índice de vizinhos construído com o modelo (distância de Gower sobre as features codificadas)
+    semelhantes = predictor.similar_patients(user_data, k=5)
+    mesmo_nivel = sum(p['Obesity'] == pred_label for p in semelhantes)
+    st.markdown(f"{mesmo_nivel} dos {len(semelhantes)} pacientes mais parecidos têm o nível previsto registrado.")
+    st.dataframe([
+        {
+            'Distância': round(p['distance'], 3),
+            'Nível registrado': get_class_info(p['Obesity'])[0],
+            'Gênero': 'Masculino' if p['Gender'] == 'Male' else 'Feminino',
+            'Idade': round(p['Age']),
+            'Altura (m)': round(p['Height'], 2),
+            'Peso (kg)': round(p['Weight'], 1),
+            'Histórico familiar': WHAT_IF_VALUE_LABELS.get(p['family_history'], p['family_history']),
+            'Atividade física': p['FAF'],
+        }
+        for p in semelhantes
+    ], hide_index=True)
 
     st.subheader("Alertas clínicos orientados por dados")
     clinical_insights = build_clinical_insights(user_data, pred_label)
@@ -414,6 +329,26 @@ if botao_diagnostico:
     else:
         st.markdown("- Perfil sem alertas adicionais relevantes com base na análise exploratória.")
 
+    st.subheader("🔀 E se...? Simulação de hábitos")
+    st.markdown("Como a predição mudaria alterando um hábito (ou dois ao mesmo tempo), mantendo o restante do perfil:")
+    # Todas as variações (algumas centenas) pontuadas numa única chamada à floresta
+    simulacao = predictor.what_if(user_data)
+    linhas = build_what_if_rows(simulacao, user_data, pred_label)
+    um_fator = [l for l in linhas if ' + ' not in l['Mudança']]
+    pares = [l for l in linhas if ' + ' in l['Mudança']]
+    st.markdown("**Um hábito por vez**")
+    st.dataframe(um_fator, hide_index=True)
+    st.markdown(f"**Dois hábitos combinados** ({len(pares)} combinações; as 25 de maior efeito)")
+    st.dataframe(pares[:25], hide_index=True)
+
 else:
     st.info("👈 Utilize o menu lateral para inserir os dados do paciente.")
-    st.markdown(f"**Modelo:** Random Forest | Acurácia Validada: **{accuracy:.1%}**")
+    status = warmup.status()
+    evaluation = predictor.evaluation
+    if evaluation:
+        ci_low, ci_high = evaluation['accuracy_ci95']
+        acuracia = (f"**{evaluation['accuracy_mean']:.1%}** (IC 95%: {ci_low:.1%}–{ci_high:.1%}, "
+                    f"validação cruzada {evaluation['n_splits']} folds x {evaluation['n_repeats']})")
+    else:
+        acuracia = f"**{predictor.accuracy:.1%}** (holdout 80/20)"
+    st.markdown(f"**Modelo:** Random Forest | Acurácia Validada: {acuracia} | Carregado em {status['load_seconds']:.2f}s")
@@ -0,0 +1,247 @@
+"""Log de auditoria das predições, gravado em lotes gzip por uma thread em segundo plano.
+
+Uso:
+    python audit_log.py artefatos/auditoria --output auditoria.csv
+"""
+import argparse
+import atexit
+import glob
+import gzip
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import zlib
+
+MAX_BYTES = 8 * 1024 * 1024
+MAX_QUEUE = 10000
+BATCH_SIZE = 256
+# Espera máxima (s) de um registro na fila antes de ir para o disco: sob tráfego
+# leve, o lote junta o que chegar nesse intervalo em vez de gravar um registro por vez
+FLUSH_INTERVAL = 1.0
+# Espera máxima (s) de close() pela gravação do que resta na fila
+CLOSE_TIMEOUT = 10.0
+
+_CLOSE = object()
+
+
+def _jsonable(value):
+    # Escalares NumPy (probabilidades, códigos) viram tipos nativos
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+class AuditLog:
+    """Fila limitada de registros de auditoria e a thread que os grava em directory"""
+
+    def __init__(self, directory, max_bytes=MAX_BYTES, max_queue=MAX_QUEUE, batch_size=BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._path = None
+        self._size = 0
+        self.written = 0
+        self.batches = 0
+        self.files = 0
+        self.failed = 0
+        self.error = None
+        self._closed = False
+        self._close_sent = False
+        # log() em andamento; close() só envia _CLOSE quando não há nenhum, para
+        # que nenhum registro entre na fila depois do sinal de encerramento
+        self._pending = 0
+        self._idle = threading.Condition()
+
+    def start(self):
+        if self._thread is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name='audit-log', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        return self
+
+    def log(self, user_data, prediction, confidence, probabilities, model=None, timeout=None):
+        """Enfileira uma predição; probabilities: dict classe -> probabilidade, como em predict()"""
+        record = {
+            'ts': time.time(),
+            'model': model,
+            'input': dict(user_data),
+            'prediction': prediction,
+            'confidence': confidence,
+            'probabilities': probabilities,
+        }
+        with self._idle:
+            if self._closed:
+                raise RuntimeError('log de auditoria já encerrado')
+            self._pending += 1
+        try:
+            self._queue.put(record, timeout=timeout)
+        finally:
+            with self._idle:
+                self._pending -= 1
+                self._idle.notify_all()
+
+    def flush(self):
+        """Bloqueia até que tudo o que já foi enfileirado esteja no disco"""
+        self._queue.join()
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        """Grava o que falta na fila e encerra a thread, esperando no máximo timeout segundos (idempotente)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def remaining():
+            return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+        with self._idle:
+            self._closed = True
+            idle = self._idle.wait_for(lambda: self._pending == 0, remaining())
+        if self._thread is None or not self._thread.is_alive():
+            return
+        if not self._close_sent:
+            try:
+                if not idle:
+                    raise queue.Full
+                self._queue.put(_CLOSE, timeout=remaining())
+                self._close_sent = True
+            except queue.Full:
+                print(f"audit-log: encerrando sem gravar {self._queue.qsize()} registro(s) na fila",
+                      file=sys.stderr)
+                return
+        self._thread.join(remaining())
+
+    def stats(self):
+        return {'queued': self._queue.qsize(), 'written': self.written, 'batches': self.batches,
+                'files': self.files, 'failed': self.failed, 'current_file': self._path,
+                'error': repr(self.error) if self.error else None}
+
+    def _run(self):
+        closing = False
+        while not closing:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            item = first
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _CLOSE:
+                    closing = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            try:
+                if batch:
+                    self._write(batch)
+            except Exception as exc:
+                # Falha num lote (disco, registro não serializável) não derruba a
+                # thread: os registros seguintes continuam sendo gravados
+                self.error = exc
+                self.failed += len(batch)
+                print(f"audit-log: {len(batch)} registro(s) não gravados: {exc!r}", file=sys.stderr)
+            finally:
+                for _ in range(len(batch) + closing):
+                    self._queue.task_done()
+
+    def _write(self, batch):
+        lines = ''.join(json.dumps(record, default=_jsonable, ensure_ascii=False) + '\n' for record in batch)
+        data = gzip.compress(lines.encode('utf-8'))
+        if self._path is None or (self._size and self._size + len(data) > self.max_bytes):
+            # O nome ordena os arquivos no tempo; o pid separa processos do mesmo app
+            self._path = os.path.join(self.directory, f'audit-{time.time_ns()}-{os.getpid()}.jsonl.gz')
+            self._size = 0
+            self.files += 1
+        with open(self._path, 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._size += len(data)
+        self.written += len(batch)
+        self.batches += 1
+
+
+def audit_files(directory):
+    """Arquivos de auditoria em ordem de criação"""
+    return sorted(glob.glob(os.path.join(directory, 'audit-*.jsonl.gz')),
+                  key=lambda path: int(os.path.basename(path).split('-')[1]))
+
+
+def _records(path):
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+    except (EOFError, zlib.error, ValueError):
+        # Último lote interrompido no meio (queda do processo): os anteriores valem
+        return
+
+
+def _flatten(record):
+    model = record.get('model') or {}
+    row = {'timestamp': record['ts']}
+    row.update({f'model_{key}': value for key, value in model.items()})
+    row.update(record['input'])
+    row['prediction'] = record['prediction']
+    row['confidence'] = record['confidence']
+    row.update({f'proba_{name}': p for name, p in record['probabilities'].items()})
+    return row
+
+
+def read_audit_log(directory, chunk_size=10000, start=None, end=None):
+    """Gera DataFrames de até chunk_size registros, dos mais antigos aos mais recentes, entre start e end (timestamps Unix)"""
+    import pandas as pd
+
+    rows = []
+    for path in audit_files(directory):
+        for record in _records(path):
+            if (start is not None and record['ts'] < start) or (end is not None and record['ts'] >= end):
+                continue
+            rows.append(_flatten(record))
+            if len(rows) >= chunk_size:
+                yield _frame(pd, rows)
+                rows = []
+    if rows:
+        yield _frame(pd, rows)
+
+
+def _frame(pd, rows):
+    df = pd.DataFrame(rows)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Exporta o log de auditoria das predições.')
+    parser.add_argument('directory', nargs='?', default=os.path.join('artefatos', 'auditoria'))
+    parser.add_argument('--output', help='CSV de saída (sem ele, só o resumo)')
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    n_rows = 0
+    counts = {}
+    for df in read_audit_log(args.directory, args.chunk_size):
+        if args.output:
+            df.to_csv(args.output, mode='w' if n_rows == 0 else 'a', header=n_rows == 0, index=False)
+        n_rows += len(df)
+        for label, count in df['prediction'].value_counts().items():
+            counts[label] = counts.get(label, 0) + int(count)
+    print(f"{n_rows} predições em {len(audit_files(args.directory))} arquivo(s)", file=sys.stderr)
+    for label, count in sorted(counts.items(), key=lambda item: -item[1]):
+        print(f"   {label:<24}{count:>8}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
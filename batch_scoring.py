@@ -0,0 +1,153 @@
+"""Pontuação em lote, em blocos de tamanho fixo, de arquivos de pacientes no formato de Obesity.csv.
+
+Uso:
+    python batch_scoring.py pacientes.csv predicoes.csv --chunk-size 5000 --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from clinical_rules import CLINICAL_RULES, evaluate_rules
+from machine_learning import ObesityPredictor, bounded_map, clean_data
+
+# Modelo carregado uma única vez por processo do pool (ver _init_worker)
+_worker_predictor = None
+
+
+def load_predictor(data_path, model_dir, engine):
+    predictor = ObesityPredictor(data_path, model_dir=model_dir, engine=engine)
+    predictor.load_or_train()
+    return predictor
+
+
+def _init_worker(data_path, model_dir, engine):
+    global _worker_predictor
+    _worker_predictor = load_predictor(data_path, model_dir, engine)
+
+
+def score_chunk(predictor, chunk, early_exit=False, confidence=None, insights=False, explain=0):
+    """Devolve o bloco de entrada acrescido das colunas de predição"""
+    rows = chunk.drop(columns='Obesity', errors='ignore')
+    trees_used = None
+    if early_exit or confidence is not None:
+        labels, confidences, probas, unknown, trees_used = predictor.predict_batch_early_exit(rows, confidence=confidence)
+    else:
+        labels, confidences, probas, unknown = predictor.predict_batch(rows)
+    scored = chunk.reset_index(drop=True)
+    scored['prediction'] = labels
+    scored['confidence'] = confidences
+    for idx, class_name in enumerate(predictor.target_names):
+        scored[f'proba_{class_name}'] = probas[:, idx]
+    scored['unknown_categories'] = [';'.join(cols) for cols in unknown]
+    if trees_used is not None:
+        scored['trees_used'] = trees_used
+    if insights:
+        rule_ids = np.asarray([rule['id'] for rule in CLINICAL_RULES])
+        # Regras sobre as entradas limpas, como predict() e o app as veem (ordinais inteiras)
+        fired = evaluate_rules(clean_data(rows.reset_index(drop=True)), labels)
+        scored['clinical_alerts'] = [';'.join(rule_ids[mask]) for mask in fired]
+    if explain:
+        _, contributions = predictor.explain_batch(rows)
+        # Contribuições de cada feature para a classe prevista de cada linha
+        pred_idx = probas.argmax(axis=1)
+        per_class = contributions[np.arange(len(rows)), :, pred_idx]
+        features = np.asarray(predictor.feature_names)
+        top = np.argsort(-np.abs(per_class), axis=1, kind='stable')[:, :explain]
+        scored['top_features'] = [
+            ';'.join(f'{features[j]}:{values[j]:+.3f}' for j in order)
+            for order, values in zip(top, per_class)
+        ]
+    return scored
+
+
+def save_monitoring(predictor):
+    """Grava o snapshot de deriva deste processo (sobrescreve o anterior)"""
+    return predictor.monitor.write_snapshot(predictor.monitoring_path(), 'batch_scoring')
+
+
+def _score_in_worker(chunk, early_exit, confidence, insights, explain, monitor):
+    scored = score_chunk(_worker_predictor, chunk, early_exit, confidence, insights, explain)
+    if monitor:
+        # O worker não sabe qual bloco é o último: atualiza a cada bloco
+        save_monitoring(_worker_predictor)
+    return scored
+
+
+def score_file(input_path, output_path, data_path='Obesity.csv', model_dir='artefatos',
+               engine='flat', chunk_size=5000, workers=1, early_exit=False, confidence=None,
+               insights=False, explain=0, monitor=False):
+    """Pontua input_path em blocos e grava em output_path; retorna (linhas, segundos)"""
+    # Garante o artefato em disco antes de abrir o pool, para que os workers só o carreguem
+    predictor = load_predictor(data_path, model_dir, engine)
+
+    start = time.perf_counter()
+    n_rows = 0
+    header = True
+
+    def write(scored):
+        nonlocal n_rows, header
+        scored.to_csv(output_path, mode='w' if header else 'a', header=header, index=False)
+        header = False
+        n_rows += len(scored)
+
+    chunks = pd.read_csv(input_path, chunksize=chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            write(score_chunk(predictor, chunk, early_exit, confidence, insights, explain))
+        if monitor:
+            save_monitoring(predictor)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(data_path, model_dir, engine)) as pool:
+            # Grava na ordem de leitura
+            for scored in bounded_map(pool, _score_in_worker, chunks, workers * 2,
+                                      args=(early_exit, confidence, insights, explain, monitor)):
+                write(scored)
+
+    if header:
+        # Entrada vazia: ainda assim produz um arquivo de saída
+        open(output_path, 'w').close()
+
+    return n_rows, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pontua um CSV de pacientes em blocos.')
+    parser.add_argument('input', help='CSV com o esquema de Obesity.csv (sem a coluna Obesity)')
+    parser.add_argument('output', help='CSV de saída com predição e probabilidades')
+    parser.add_argument('--data', default='Obesity.csv', help='CSV de treino do modelo')
+    parser.add_argument('--model-dir', default='artefatos')
+    parser.add_argument('--engine', default='flat', choices=ObesityPredictor.ENGINES)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='processos do pool (0 = todos os núcleos)')
+    parser.add_argument('--early-exit', action='store_true',
+                        help='para de avaliar árvores quando o rótulo está decidido (mesmos rótulos)')
+    parser.add_argument('--confidence', type=float,
+                        help='para também quando a classe líder atinge esta probabilidade (implica --early-exit)')
+    parser.add_argument('--insights', action='store_true',
+                        help='acrescenta a coluna clinical_alerts com as regras clínicas disparadas')
+    parser.add_argument('--explain', type=int, default=0, metavar='N',
+                        help='acrescenta a coluna top_features com as N features que mais pesaram na predição')
+    parser.add_argument('--monitor', action='store_true',
+                        help='grava as contagens de deriva das entradas para a página de monitoramento')
+    args = parser.parse_args(argv)
+
+    workers = args.workers or os.cpu_count() or 1
+    n_rows, elapsed = score_file(args.input, args.output, data_path=args.data,
+                                 model_dir=args.model_dir, engine=args.engine,
+                                 chunk_size=args.chunk_size, workers=workers,
+                                 early_exit=args.early_exit, confidence=args.confidence,
+                                 insights=args.insights, explain=args.explain, monitor=args.monitor)
+    rate = n_rows / elapsed if elapsed > 0 else float('inf')
+    print(f"{n_rows} linhas em {elapsed:.2f}s ({rate:,.0f} linhas/s) -> {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
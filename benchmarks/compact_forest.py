@@ -0,0 +1,54 @@
+"""Divergência, memória e latência da exportação compacta da floresta (engine 'compact').
+
+Uso:
+    python benchmarks/compact_forest.py [--repeats 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from machine_learning import CompactForest, ObesityPredictor  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', default=os.path.join(ROOT, 'Obesity.csv'))
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    predictor = ObesityPredictor(args.data, model_dir=os.path.join(ROOT, 'artefatos'), engine='flat', cache_size=0)
+    predictor.load_or_train()
+    rows = pd.read_csv(args.data)
+    X, _ = predictor._encode(rows.drop(columns='Obesity'))
+    X = X.to_numpy()
+
+    def latency(forest):
+        forest.predict_proba(X)
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            forest.predict_proba(X)
+        return (time.perf_counter() - start) / args.repeats / len(X) * 1e6
+
+    flat = predictor.flat_forest
+    print(f"{'folhas':<10}{'memória (KB)':>14}{'µs/linha':>10}{'rótulos ≠':>11}{'máx |Δp|':>11}{'limite':>9}{'em risco':>10}")
+    print(f"{'float64':<10}{flat.nbytes / 1024:>14.0f}{latency(flat):>10.2f}{'-':>11}{'-':>11}{'-':>9}{'-':>10}")
+    ok = True
+    for leaf_dtype in CompactForest.LEAF_DTYPES:
+        compact, report = predictor.export_compact(leaf_dtype, rows)
+        ok &= report['label_disagreements'] <= report['rows_within_error_bound']
+        ok &= report['max_abs_proba_diff'] <= report['proba_error_bound']
+        print(f"{leaf_dtype:<10}{report['compact_bytes'] / 1024:>14.0f}{latency(compact):>10.2f}"
+              f"{report['label_disagreements']:>11}{report['max_abs_proba_diff']:>11.2e}"
+              f"{report['proba_error_bound']:>9.4f}{report['rows_within_error_bound']:>10}")
+    print(f"Divergência dentro dos limites em {len(X)} linhas: {ok}")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
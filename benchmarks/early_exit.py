@@ -0,0 +1,59 @@
+"""Compara predict_batch() e predict_batch_early_exit() em lotes grandes, nos engines 'flat' e 'compact'.
+
+Uso:
+    python benchmarks/early_exit.py [--copies 10] [--repeats 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from machine_learning import ObesityPredictor  # noqa: E402
+
+
+def best_time(fn, repeats):
+    # Melhor de repeats execuções: o lote é grande, o ruído vem de fora
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', default=os.path.join(ROOT, 'Obesity.csv'))
+    parser.add_argument('--copies', type=int, default=10, help='cópias do CSV no lote')
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = pd.read_csv(args.data).drop(columns='Obesity')
+    rows = pd.concat([rows] * args.copies, ignore_index=True)
+
+    same = True
+    print(f"{len(rows)} linhas")
+    print(f"{'engine':<10}{'completo ms':>14}{'early exit ms':>16}{'ganho':>8}{'árvores/linha':>16}")
+    for engine in ('flat', 'compact'):
+        predictor = ObesityPredictor(args.data, model_dir=os.path.join(ROOT, 'artefatos'), engine=engine, cache_size=0)
+        predictor.load_or_train()
+        labels = predictor.predict_batch(rows)[0]
+        early_labels, _, _, _, trees_used = predictor.predict_batch_early_exit(rows)
+        same &= bool((labels == early_labels).all())
+
+        full = best_time(lambda: predictor.predict_batch(rows), args.repeats)
+        early = best_time(lambda: predictor.predict_batch_early_exit(rows), args.repeats)
+        print(f"{engine:<10}{full * 1e3:>14.1f}{early * 1e3:>16.1f}{full / early:>7.2f}x{np.mean(trees_used):>16.1f}")
+
+    print(f"Rótulos idênticos: {same}")
+    return 0 if same else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Teste de carga local do inference_server com clientes HTTP concorrentes.
+
+Uso:
+    python benchmarks/http_load.py --clients 64 --requests 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from inference_server import InferenceServer  # noqa: E402
+from machine_learning import ModelWarmup, ObesityPredictor  # noqa: E402
+
+
+async def request(reader, writer, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b''
+    writer.write(
+        f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+        f'Content-Length: {len(body)}\r\n\r\n'.encode() + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line == b'\r\n':
+            break
+        name, _, value = line.decode().partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(port, rows, n_requests):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    failures = 0
+    for i in range(n_requests):
+        status, _ = await request(reader, writer, 'POST', '/predict', rows[i % len(rows)])
+        failures += status != 200
+    writer.close()
+    return failures
+
+
+async def run(args):
+    rows = pd.read_csv(os.path.join(ROOT, 'Obesity.csv')).drop(columns='Obesity').to_dict('records')
+    server = None
+    port = args.port
+    if port is None:
+        warmup = ModelWarmup(lambda: ObesityPredictor(os.path.join(ROOT, 'Obesity.csv'),
+                                                      model_dir=os.path.join(ROOT, 'artefatos'),
+                                                      engine=args.engine)).start()
+        if warmup.wait() is None:
+            raise RuntimeError(f'falha ao carregar o modelo: {warmup.error!r}')
+        server = await InferenceServer(warmup, port=0, max_batch_size=args.max_batch_size,
+                                       max_wait_ms=args.max_wait_ms).start()
+        port = server.port
+
+    start = time.perf_counter()
+    failures = await asyncio.gather(*(client(port, rows[c::args.clients], args.requests)
+                                      for c in range(args.clients)))
+    elapsed = time.perf_counter() - start
+
+    total = args.clients * args.requests
+    print(f"{total} requisições em {elapsed:.2f}s ({total / elapsed:,.0f} req/s), falhas: {sum(failures)}")
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    _, metrics = await request(reader, writer, 'GET', '/metrics')
+    writer.close()
+    print(json.dumps(metrics, indent=2))
+
+    if server is not None:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=None, help='servidor já em execução')
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=50, help='requisições por cliente')
+    parser.add_argument('--engine', default='flat', choices=ObesityPredictor.ENGINES)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
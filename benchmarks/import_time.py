@@ -0,0 +1,100 @@
+"""Tempo de importação dos pontos de entrada; o cenário 'serving' falha se importar sklearn, scipy, pandas ou joblib.
+
+Uso:
+    python benchmarks/import_time.py [--top 10] [--scenario serving]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ('sklearn', 'scipy', 'pandas', 'joblib', 'pyarrow', 'matplotlib', 'seaborn', 'PIL')
+# Dependências que o caminho de inferência não pode voltar a importar
+SERVING_FORBIDDEN = ('sklearn', 'scipy', 'pandas', 'joblib')
+
+SERVING_CODE = f"""
+from machine_learning import ObesityPredictor
+predictor = ObesityPredictor({os.path.join(ROOT, 'Obesity.csv')!r}, model_dir={os.path.join(ROOT, 'artefatos')!r}, engine='flat')
+predictor.load_or_train()
+predictor.predict({{'Gender': 'Female', 'Age': 25, 'Height': 1.65, 'Weight': 70, 'family_history': 'yes',
+                   'FAVC': 'yes', 'FCVC': 2, 'NCP': 3, 'CAEC': 'Sometimes', 'SMOKE': 'no', 'CH2O': 2,
+                   'SCC': 'no', 'FAF': 1, 'TUE': 1, 'CALC': 'Sometimes', 'MTRANS': 'Public_Transportation'}})
+"""
+
+SCENARIOS = {
+    # Imports de topo do app.py
+    'app': 'import streamlit, machine_learning',
+    'serving': SERVING_CODE,
+    'eda': 'import streamlit, pandas, agregados_eda, dataset_cache',
+    'graficos': 'import graficos_eda',
+    'inference_server': 'import inference_server',
+    'batch_scoring': 'import batch_scoring',
+}
+
+
+def profile(code):
+    """Executa code num processo novo; devolve (ms por pacote, ms das dependências pesadas, ms do processo)"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, 'PYTHONPATH': ROOT},
+    )
+    wall_ms = (time.perf_counter() - start) * 1e3
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    per_package = defaultdict(float)
+    heavy = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if not cumulative.strip().isdigit():
+            continue
+        module = name.strip()
+        if module in HEAVY:
+            heavy[module] = int(cumulative) / 1e3
+        # Só módulos de primeiro nível: os aninhados já estão no cumulativo do pai
+        if not name.startswith('  '):
+            per_package[module.split('.')[0]] += int(cumulative) / 1e3
+    return dict(per_package), heavy, wall_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top', type=int, default=10, help='pacotes mais lentos exibidos por cenário')
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), action='append',
+                        help='cenário a medir (pode repetir; padrão: todos)')
+    args = parser.parse_args()
+
+    if 'serving' in (args.scenario or SCENARIOS):
+        # Garante o artefato salvo, para medir a carga e não um treino
+        subprocess.run([sys.executable, '-c', SERVING_CODE], cwd=ROOT, check=True,
+                       env={**os.environ, 'PYTHONPATH': ROOT})
+
+    # Módulos que o interpretador importa mesmo sem código nenhum ficam de fora
+    startup, _, _ = profile('pass')
+
+    regression = False
+    for name in args.scenario or SCENARIOS:
+        per_package, heavy, wall_ms = profile(SCENARIOS[name])
+        per_package = {pkg: ms for pkg, ms in per_package.items() if pkg not in startup}
+        print(f"\n== {name}: {sum(per_package.values()):.0f} ms em imports, {wall_ms:.0f} ms no processo")
+        print("   dependências pesadas: " + (', '.join(f'{pkg} ({ms:.0f} ms)' for pkg, ms in heavy.items()) or 'nenhuma'))
+        for pkg, ms in sorted(per_package.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"   {pkg:<24}{ms:>10.1f} ms")
+        if name == 'serving':
+            leaked = [pkg for pkg in SERVING_FORBIDDEN if pkg in heavy]
+            if leaked:
+                regression = True
+                print(f"   REGRESSÃO: o caminho de inferência importou {', '.join(leaked)}")
+    return 1 if regression else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""Compara a latência de inferência dos engines do ObesityPredictor ('sklearn', 'flat', 'compact').
+
+Uso:
+    python benchmarks/inference_latency.py [--repeats 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from machine_learning import ObesityPredictor  # noqa: E402
+
+
+def time_per_call(fn, repeats):
+    fn()  # aquece caches/encoders antes de medir
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', default=os.path.join(ROOT, 'Obesity.csv'))
+    parser.add_argument('--repeats', type=int, default=200)
+    args = parser.parse_args()
+
+    predictors = {}
+    for engine in ObesityPredictor.ENGINES:
+        # cache_size=0: mede a floresta, não o cache de predições
+        predictor = ObesityPredictor(args.data, model_dir=os.path.join(ROOT, 'artefatos'), engine=engine, cache_size=0)
+        predictor.load_or_train()
+        predictors[engine] = predictor
+
+    rows = pd.read_csv(args.data).drop(columns='Obesity')
+    user_data = rows.iloc[0].to_dict()
+
+    # Garante que o engine rápido não altera nenhuma probabilidade
+    _, _, proba_sklearn, _ = predictors['sklearn'].predict_batch(rows)
+    _, _, proba_flat, _ = predictors['flat'].predict_batch(rows)
+    identical = np.array_equal(proba_sklearn, proba_flat)
+
+    print(f"Probabilidades idênticas em {len(rows)} linhas: {identical}")
+    print(f"{'engine':<10}{'predict() ms/linha':>22}{'predict_batch() µs/linha':>28}")
+    results = {}
+    for engine, predictor in predictors.items():
+        single = time_per_call(lambda: predictor.predict(user_data), args.repeats)
+        batch = time_per_call(lambda: predictor.predict_batch(rows), max(args.repeats // 20, 3))
+        results[engine] = single
+        print(f"{engine:<10}{single * 1e3:>22.3f}{batch / len(rows) * 1e6:>28.2f}")
+
+    print(f"Ganho por linha (predict): {results['sklearn'] / results['flat']:.1f}x")
+    return 0 if identical else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""Regras dos alertas clínicos como dados, avaliadas coluna a coluna sobre lotes de pacientes."""
+import numpy as np
+
+SEVERITY = {
+    'Insufficient_Weight': 0,
+    'Normal_Weight': 1,
+    'Overweight_Level_I': 2,
+    'Overweight_Level_II': 3,
+    'Obesity_Type_I': 4,
+    'Obesity_Type_II': 5,
+    'Obesity_Type_III': 6,
+}
+
+# Valor usado quando o campo não vem na entrada (os demais contam como ausentes)
+FIELD_DEFAULTS = {'FAF': 0}
+
+CLINICAL_RULES = [
+    {
+        'id': 'family_history_severe', 'group': 'family_history', 'title': "Historico familiar",
+        'when': [('family_history', '==', 'yes'), ('severity', '>=', 4)],
+        'lines': [
+            "Pacientes em graus II e III costumam ter historico de obesidade na familia; inclua a triagem familiar no plano de ação.",
+            "Considere intervenções que envolvam rotina alimentar e atividade fisica do nucleo familiar.",
+        ],
+    },
+    {
+        'id': 'family_history', 'group': 'family_history', 'title': "Historico familiar",
+        'when': [('family_history', '==', 'yes')],
+        'lines': [
+            "Familia com obesidade aumenta a chance de progressão; acompanhe com revisões periodicas.",
+            "Oriente a familia sobre sinais precoces e metas conjuntas.",
+        ],
+    },
+    {
+        'id': 'calorie_monitoring', 'title': "Monitoração calórica",
+        'when': [('SCC', '==', 'no')],
+        'lines': [
+            "O registro alimentar costuma ser ausente nos graus graves; introduza o uso de um diario/cálculo simples para controle de calorias.",
+            "Sugira aplicativos ou planilhas rápidas que somem calorias de forma prática.",
+        ],
+    },
+    {
+        'id': 'sedentary_severe', 'group': 'physical_activity', 'title': "Atividade fisica",
+        'when': [('FAF', '==', 0), ('severity', '>=', 4)],
+        'lines': [
+            "O paciente apresenta sedentarismo total com obesidade avançada: iniciar plano supervisionado e progressivo para evitar lesão.",
+            "Combine fortalecimento leve + caminhada curta e aumente gradualmente.",
+        ],
+    },
+    {
+        'id': 'low_activity', 'group': 'physical_activity', 'title': "Atividade fisica",
+        'when': [('FAF', '<=', 1), ('severity', '>=', 2)],
+        'lines': [
+            "Baixa atividade: alinhar dieta estruturada e progressão de exercicios para conter ganho.",
+            "Metas semanais curtas (ex.: 2-3 sessões leves) ajudam na adesão.",
+        ],
+    },
+    {
+        'id': 'young_adult', 'title': "Adulto jovem",
+        'when': [('Age', '<=', 30), ('severity', '>=', 3)],
+        'lines': [
+            "Obesidade severa em faixa jovem pede abordagem precoce e intensiva.",
+            "Reforce orientações sobre fertilidade, metabolismo e longo prazo.",
+        ],
+    },
+    {
+        'id': 'male_obesity_ii', 'title': "Perfil masculino",
+        'when': [('Gender', '==', 'Male'), ('prediction', '==', 'Obesity_Type_II')],
+        'lines': [
+            "Homens tendem a aparecer em Grau II; avalie rotina laboral, sono e ingestão proteica.",
+            "Cheque circunferência abdominal e risco cardiometabolico.",
+        ],
+    },
+    {
+        'id': 'female_obesity_iii', 'title': "Perfil feminino",
+        'when': [('Gender', '==', 'Female'), ('prediction', '==', 'Obesity_Type_III')],
+        'lines': [
+            "Mulheres em Grau III se beneficiam de acompanhamento multidisciplinar intensivo.",
+            "Inclua suporte psicologico e manejo de deficiências micronutricionais.",
+        ],
+    },
+    {
+        'id': 'vegetables', 'title': "Consumo de vegetais",
+        'when': [('FCVC', '==', 3), ('severity', '>=', 4)],
+        'lines': [
+            "Mesmo relatando vegetais sempre, o balanco calórico pode estar positivo.",
+            "Revise molhos, porções e acompanhamentos calóricos.",
+        ],
+    },
+    {
+        'id': 'liquids', 'title': "Liquidos",
+        'when': [('CH2O', '==', 3), ('severity', '>=', 4)],
+        'lines': [
+            "Alto consumo de líquidos pode incluir bebidas calóricas; diferencie água de sucos/refrigerantes.",
+            "Estimule água pura e reduza bebidas adoçadas.",
+        ],
+    },
+    {
+        'id': 'alcohol', 'title': "Alcool",
+        'when': [('CALC', 'in', ('Sometimes', 'Frequently', 'Always')), ('severity', '>=', 3)],
+        'lines': [
+            "Mesmo ocasional, alcool soma calorias vazias e piora controle de apetite.",
+            "Negocie redução ou pausas semanais, especialmente em graus elevados.",
+        ],
+    },
+    {
+        'id': 'smoking', 'title': "Tabagismo",
+        'when': [('SMOKE', '==', 'yes')],
+        'lines': [
+            "Apesar de raro, obesidade + tabagismo aumenta risco cardiometabolico.",
+            "Ofereça apoio para cessação e ajuste de peso no processo.",
+        ],
+    },
+]
+
+
+def severity_of(predictions):
+    """Grau (0 a 6) de cada classe prevista; classes desconhecidas contam como 0"""
+    classes, inverse = np.unique(np.asarray(predictions, dtype=object).astype(str), return_inverse=True)
+    return np.asarray([SEVERITY.get(c, 0) for c in classes], dtype=np.int64)[inverse]
+
+
+def _numeric(values):
+    """Coluna como float64; valores ausentes ou não numéricos viram NaN (toda comparação dá False)"""
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.asarray([v if isinstance(v, (int, float)) else np.nan for v in values], dtype=np.float64)
+
+
+def _column(data, field, n_rows):
+    if field in data:
+        return np.asarray(data[field], dtype=object)
+    return np.full(n_rows, FIELD_DEFAULTS.get(field), dtype=object)
+
+
+def _condition(column, op, value):
+    if op == 'in':
+        return np.isin(column, list(value))
+    if isinstance(value, (int, float)):
+        column = _numeric(column)
+    if op == '==':
+        return column == value
+    if op == '<=':
+        return column <= value
+    if op == '>=':
+        return column >= value
+    raise ValueError(f"Operador desconhecido: {op!r}")
+
+
+def evaluate_rules(data, predictions, rules=CLINICAL_RULES):
+    """Matriz booleana (linhas x regras) de alertas disparados; num mesmo grupo, só a primeira regra que casar"""
+    predictions = np.asarray(predictions, dtype=object)
+    n_rows = len(predictions)
+    derived = {'prediction': predictions, 'severity': severity_of(predictions)}
+    columns = {}
+    fired = np.zeros((n_rows, len(rules)), dtype=bool)
+    taken = {}
+    for idx, rule in enumerate(rules):
+        mask = np.ones(n_rows, dtype=bool)
+        for field, op, value in rule['when']:
+            if field not in columns:
+                columns[field] = derived[field] if field in derived else _column(data, field, n_rows)
+            mask &= _condition(columns[field], op, value)
+        group = rule.get('group')
+        if group is not None:
+            if group in taken:
+                mask &= ~taken[group]
+                taken[group] = taken[group] | mask
+            else:
+                taken[group] = mask
+        fired[:, idx] = mask
+    return fired
+
+
+def clinical_insights(data, predictions, rules=CLINICAL_RULES):
+    """Alertas de cada linha: lista de {"title": str, "lines": [str, ...]} na ordem das regras"""
+    fired = evaluate_rules(data, predictions, rules)
+    return [
+        [{'title': rules[idx]['title'], 'lines': list(rules[idx]['lines'])} for idx in np.flatnonzero(row)]
+        for row in fired
+    ]
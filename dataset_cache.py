@@ -0,0 +1,94 @@
+"""Cache colunar e tipado de Obesity.csv (Arrow IPC mapeado em memória), compartilhado entre modelo e EDA."""
+import contextlib
+import hashlib
+import os
+
+import numpy as np
+
+# Incrementar quando o esquema mudar, para não reaproveitar caches antigos
+SCHEMA_VERSION = 1
+
+CATEGORY_COLS = ['Gender', 'family_history', 'FAVC', 'CAEC', 'SMOKE', 'SCC', 'CALC', 'MTRANS', 'Obesity']
+# Colunas ordinais do dicionário de dados; no CSV vêm com ruído decimal
+ORDINAL_COLS = ['FCVC', 'NCP', 'CH2O', 'FAF', 'TUE']
+MEASUREMENT_COLS = ['Age', 'Height', 'Weight']
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Hash do conteúdo de um arquivo, lido em blocos"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextlib.contextmanager
+def atomic_path(path):
+    """Caminho temporário para gravar path; ao sair do bloco, troca atômica (leitores nunca veem o arquivo pela metade)"""
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+
+
+def apply_schema(df):
+    """Converte colunas no formato de Obesity.csv para os tipos compactos"""
+    df = df.copy()
+    for col in CATEGORY_COLS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    for col in ORDINAL_COLS:
+        if col in df.columns:
+            df[col] = df[col].round().astype(np.int8)
+    for col in MEASUREMENT_COLS:
+        if col in df.columns:
+            df[col] = df[col].astype(np.float32)
+    return df
+
+
+def read_csv_typed(path):
+    """Lê o CSV já com os campos de texto como category (sem colunas object intermediárias)"""
+    import pandas as pd
+
+    dtypes = {col: 'category' for col in CATEGORY_COLS}
+    # Medidas e ordinais são lidas em float64 e convertidas depois, para que
+    # o arredondamento seja idêntico ao de um DataFrame lido sem esquema
+    dtypes.update({col: np.float64 for col in ORDINAL_COLS + MEASUREMENT_COLS})
+    return apply_schema(pd.read_csv(path, dtype=dtypes))
+
+
+def dataset_cache_path(data_path, cache_dir='artefatos', sha256=None):
+    sha256 = sha256 or file_sha256(data_path)
+    return os.path.join(cache_dir, f'dataset_{sha256[:16]}_v{SCHEMA_VERSION}.arrow')
+
+
+def load_dataset(data_path, cache_dir='artefatos', sha256=None):
+    """DataFrame tipado do CSV, lido do cache Arrow mapeado em memória (somente leitura) quando existir"""
+    try:
+        import pyarrow.feather as feather
+    except ImportError:
+        return read_csv_typed(data_path)
+
+    cache_path = dataset_cache_path(data_path, cache_dir, sha256)
+    if os.path.exists(cache_path):
+        try:
+            table = feather.read_table(cache_path, memory_map=True)
+            # split_blocks evita consolidar colunas numa cópia contígua; as colunas
+            # numéricas apontam para o arquivo mapeado e não devem ser alteradas no lugar
+            return table.to_pandas(split_blocks=True)
+        except (OSError, ValueError):
+            pass
+
+    df = read_csv_typed(data_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with atomic_path(cache_path) as tmp_path:
+            feather.write_feather(df, tmp_path, compression='uncompressed')
+    except OSError:
+        # Sem disco gravável o CSV continua servindo, só não fica em cache
+        pass
+    return df
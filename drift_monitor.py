@@ -0,0 +1,262 @@
+"""Monitor de deriva das entradas: compara os pacientes pontuados com a distribuição de treino."""
+import atexit
+import glob
+import json
+import os
+import socket
+import threading
+import time
+
+import numpy as np
+
+from dataset_cache import atomic_path
+
+SNAPSHOT_VERSION = 1
+# Faixas numéricas: bordas nos decis do treino (valores repetidos viram uma faixa só)
+REFERENCE_QUANTILES = np.linspace(0.1, 0.9, 9)
+# Linhas acumuladas antes de agregar as contagens
+BUFFER_ROWS = 1024
+# Proporção mínima de cada faixa no cálculo de PSI/KL (evita log de zero)
+EPSILON = 1e-4
+# PSI abaixo de 0.1: estável; até 0.25: deriva moderada; acima: significativa
+PSI_THRESHOLDS = (0.1, 0.25)
+
+
+def build_reference(X, y, feature_names, categorical, categories, classes, fingerprint=None):
+    """Estatísticas de referência do treino (faixas e contagens por feature, mix de classes), serializáveis em JSON"""
+    X = np.asarray(X, dtype=np.float64)
+    edges, labels, counts = [], [], []
+    for j, (feature, is_cat) in enumerate(zip(feature_names, categorical)):
+        if is_cat:
+            names = [str(name) for name in categories[feature]]
+            edges.append(None)
+            labels.append(names + ['outras'])
+        else:
+            bounds = np.unique(np.quantile(X[:, j], REFERENCE_QUANTILES))
+            edges.append(bounds.tolist())
+            labels.append(_interval_labels(bounds))
+        counts.append(np.bincount(_bin_column(X[:, j], edges[-1], len(labels[-1])),
+                                  minlength=len(labels[-1])).tolist())
+    return {
+        'fingerprint': fingerprint,
+        'features': list(feature_names),
+        'categorical': [bool(is_cat) for is_cat in categorical],
+        'edges': edges,
+        'bin_labels': labels,
+        'counts': counts,
+        'classes': [str(name) for name in classes],
+        'class_counts': np.bincount(np.asarray(y, dtype=np.int64), minlength=len(classes)).tolist(),
+    }
+
+
+def _interval_labels(bounds):
+    labels = [f'≤ {bounds[0]:g}']
+    labels += [f'({low:g}, {high:g}]' for low, high in zip(bounds[:-1], bounds[1:])]
+    return labels + [f'> {bounds[-1]:g}']
+
+
+def _bin_column(values, edges, n_bins):
+    """Faixa de cada valor: intervalos fechados à direita, ou o código da categoria"""
+    if edges is not None:
+        # NaN cai na última faixa
+        return np.searchsorted(np.asarray(edges), values, side='left')
+    codes = np.where((values >= 0) & (values < n_bins - 1), values, n_bins - 1)
+    return codes.astype(np.int64)
+
+
+def _proportions(counts):
+    counts = np.asarray(counts, dtype=np.float64)
+    total = counts.sum()
+    p = counts / total if total > 0 else np.full(len(counts), 1 / len(counts))
+    p = np.maximum(p, EPSILON)
+    return p / p.sum()
+
+
+def psi(expected, actual):
+    """Population Stability Index entre duas contagens nas mesmas faixas"""
+    p, q = _proportions(actual), _proportions(expected)
+    return float(((p - q) * np.log(p / q)).sum())
+
+
+def kl_divergence(expected, actual):
+    """KL(actual || expected), em nats, entre duas contagens nas mesmas faixas"""
+    p, q = _proportions(actual), _proportions(expected)
+    return float((p * np.log(p / q)).sum())
+
+
+def drift_status(value):
+    """0 (estável), 1 (moderada) ou 2 (significativa), pelos limites de PSI_THRESHOLDS"""
+    return int(np.searchsorted(PSI_THRESHOLDS, value, side='right'))
+
+
+def drift_report(reference, feature_counts, class_counts):
+    """PSI e KL de cada feature e do mix de classes previstas contra a referência"""
+    features = []
+    for feature, expected, actual in zip(reference['features'], reference['counts'], feature_counts):
+        value = psi(expected, actual)
+        features.append({'feature': feature, 'psi': value, 'kl': kl_divergence(expected, actual),
+                         'status': drift_status(value)})
+    classes = psi(reference['class_counts'], class_counts)
+    return {
+        'rows': int(np.sum(class_counts)),
+        'features': features,
+        'classes': {'psi': classes, 'kl': kl_divergence(reference['class_counts'], class_counts),
+                    'status': drift_status(classes)},
+    }
+
+
+class DriftMonitor:
+    """Contagens por faixa das linhas pontuadas, em memória fixa e seguro entre threads"""
+
+    def __init__(self, reference, buffer_rows=BUFFER_ROWS):
+        self.reference = reference
+        n_features = len(reference['features'])
+        self._edges = [None if edges is None else np.asarray(edges) for edges in reference['edges']]
+        self._n_bins = [len(labels) for labels in reference['bin_labels']]
+        self._offsets = np.concatenate([[0], np.cumsum(self._n_bins)[:-1]]).astype(np.int64)
+        self._counts = np.zeros(sum(self._n_bins), dtype=np.int64)
+        self._class_counts = np.zeros(len(reference['classes']), dtype=np.int64)
+        self._buffer = np.empty((buffer_rows, n_features), dtype=np.float64)
+        self._buffer_pred = np.empty(buffer_rows, dtype=np.int64)
+        self._filled = 0
+        self._lock = threading.Lock()
+        self.rows = 0
+        self.started_at = time.time()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def observe(self, X, pred_idx, unknown=None):
+        """Registra as linhas codificadas X, as classes previstas e a máscara de categorias desconhecidas"""
+        X = np.asarray(X, dtype=np.float64)
+        if unknown is not None and unknown.any():
+            X = np.where(unknown, -1.0, X)
+        n = len(X)
+        with self._lock:
+            self.rows += n
+            if self._filled + n > len(self._buffer):
+                self._flush()
+                if n > len(self._buffer):
+                    self._aggregate(X, np.asarray(pred_idx))
+                    return
+            self._buffer[self._filled:self._filled + n] = X
+            self._buffer_pred[self._filled:self._filled + n] = pred_idx
+            self._filled += n
+
+    def observe_row(self, x, pred_idx, unknown=None):
+        """observe() para uma única linha (vetor de features), o caso de predict(); unknown: índices das features desconhecidas"""
+        with self._lock:
+            self.rows += 1
+            if self._filled == len(self._buffer):
+                self._flush()
+            i = self._filled
+            self._buffer[i] = x
+            if unknown:
+                # Atribuições escalares: indexar com a lista custa mais que o resto da chamada
+                for j in unknown:
+                    self._buffer[i, j] = -1.0
+            self._buffer_pred[i] = pred_idx
+            self._filled = i + 1
+
+    def _flush(self):
+        if self._filled:
+            self._aggregate(self._buffer[:self._filled], self._buffer_pred[:self._filled])
+            self._filled = 0
+
+    def _aggregate(self, X, pred_idx):
+        bins = [
+            _bin_column(X[:, j], edges, n_bins) + offset
+            for j, (edges, n_bins, offset) in enumerate(zip(self._edges, self._n_bins, self._offsets))
+        ]
+        self._counts += np.bincount(np.concatenate(bins), minlength=len(self._counts))
+        self._class_counts += np.bincount(pred_idx, minlength=len(self._class_counts))
+
+    def counts(self):
+        """(contagens por feature, contagens por classe prevista) acumuladas até agora"""
+        with self._lock:
+            self._flush()
+            counts = self._counts.copy()
+            class_counts = self._class_counts.copy()
+        bounds = np.cumsum(self._n_bins)[:-1]
+        return [part.tolist() for part in np.split(counts, bounds)], class_counts.tolist()
+
+    def report(self):
+        return drift_report(self.reference, *self.counts())
+
+    def snapshot_path(self, directory, source):
+        fingerprint = (self.reference.get('fingerprint') or 'sem-fingerprint')[:16]
+        return os.path.join(directory, f'drift_{fingerprint}_{source}_{socket.gethostname()}_{os.getpid()}.json')
+
+    def write_snapshot(self, directory, source):
+        """Grava as contagens deste processo (com a referência) num JSON; devolve o caminho"""
+        feature_counts, class_counts = self.counts()
+        snapshot = {
+            'version': SNAPSHOT_VERSION,
+            'fingerprint': self.reference.get('fingerprint'),
+            'source': source,
+            'host': socket.gethostname(),
+            'pid': os.getpid(),
+            'started_at': self.started_at,
+            'updated_at': time.time(),
+            'rows': int(sum(class_counts)),
+            'feature_counts': feature_counts,
+            'class_counts': class_counts,
+            'reference': self.reference,
+        }
+        path = self.snapshot_path(directory, source)
+        os.makedirs(directory, exist_ok=True)
+        with atomic_path(path) as tmp_path, open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+        return path
+
+    def start(self, directory, source, interval=60.0):
+        """Grava snapshots a cada interval segundos numa thread em segundo plano, e um último ao sair"""
+        if self._thread is not None:
+            return self
+
+        def run():
+            written = -1
+            while not self._stop.wait(interval):
+                # Sem tráfego novo não há o que regravar
+                if self.rows != written:
+                    written = self.rows
+                    self._safe_write(directory, source)
+
+        self._thread = threading.Thread(target=run, name='drift-monitor', daemon=True)
+        self._thread.start()
+        atexit.register(self._safe_write, directory, source)
+        return self
+
+    def _safe_write(self, directory, source):
+        try:
+            self.write_snapshot(directory, source)
+        except OSError:
+            # Disco somente leitura não deve derrubar a inferência
+            pass
+
+    def stop(self):
+        self._stop.set()
+
+
+def load_snapshots(directory, fingerprint=None):
+    """Snapshots gravados em directory; sem fingerprint, só os do modelo atualizado por último"""
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, 'drift_*.json')):
+        try:
+            with open(path, encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if snapshot.get('version') == SNAPSHOT_VERSION:
+            snapshots.append(snapshot)
+    if fingerprint is None and snapshots:
+        fingerprint = max(snapshots, key=lambda s: s['updated_at'])['fingerprint']
+    return sorted((s for s in snapshots if s['fingerprint'] == fingerprint), key=lambda s: -s['updated_at'])
+
+
+def merge_snapshots(snapshots):
+    """Soma as contagens de snapshots do mesmo modelo; devolve (reference, feature_counts, class_counts)"""
+    reference = snapshots[0]['reference']
+    feature_counts = [np.sum([s['feature_counts'][j] for s in snapshots], axis=0).tolist()
+                      for j in range(len(reference['features']))]
+    class_counts = np.sum([s['class_counts'] for s in snapshots], axis=0).tolist()
+    return reference, feature_counts, class_counts
@@ -0,0 +1,235 @@
+"""Figuras da análise exploratória, separadas da página para só importar seaborn/matplotlib quando preciso."""
+import io
+
+import matplotlib.pyplot as plt
+import seaborn as sns
+from PIL import Image
+
+sns.set_theme(style="whitegrid")
+
+# Paletas conforme notebook
+binary_colors = ['#2a08c2', '#d606d0']
+
+# Largura máxima com que o st.image exibe imagens; acima dela ele redimensiona
+# a imagem de novo a cada execução da página
+LARGURA_MAXIMA_PX = 1460
+
+FIGURAS = {}
+
+
+def figura(construir):
+    """Registra uma função que monta uma figura a partir de (agregados, ordem_obesidade)"""
+    FIGURAS[construir.__name__.removeprefix("fig_")] = construir
+    return construir
+
+
+def renderizar_png(nome, agregados):
+    """Monta a figura, grava o PNG e fecha a figura para não acumular memória no pyplot"""
+    fig = FIGURAS[nome](agregados, agregados.ordem_niveis)
+    try:
+        buffer = io.BytesIO()
+        # Mesmos parâmetros que o st.pyplot usa internamente
+        fig.savefig(buffer, format="png", dpi=200, bbox_inches="tight")
+    finally:
+        plt.close(fig)
+
+    imagem = Image.open(buffer)
+    if imagem.width > LARGURA_MAXIMA_PX:
+        # Redimensiona uma vez aqui (como o st.image faria) para servir os bytes sem reprocessar
+        altura = int(imagem.height * LARGURA_MAXIMA_PX / imagem.width)
+        buffer = io.BytesIO()
+        imagem.resize((LARGURA_MAXIMA_PX, altura), resample=Image.BILINEAR).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+# 1) Gênero x Obesidade
+@figura
+def fig_genero(agregados, ordem_obesidade):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sns.barplot(data=agregados.longa('Genero'), y='Nivel_Obesidade', x='Quantidade', hue='Genero',
+                palette=binary_colors, order=ordem_obesidade, errorbar=None, ax=ax)
+    ax.set_title('Distribuição dos Níveis de Obesidade por Gênero')
+    ax.set_xlabel('Quantidade')
+    ax.set_ylabel('Nível de Obesidade')
+    ax.legend(title='Gênero')
+    fig.tight_layout()
+    return fig
+
+
+# 2) Histórico Familiar
+@figura
+def fig_historico_familiar(agregados, ordem_obesidade):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    sns.barplot(data=agregados.longa('Historico_Familiar'), y='Nivel_Obesidade', x='Quantidade', hue='Historico_Familiar',
+                order=ordem_obesidade, palette=binary_colors, errorbar=None, ax=ax)
+    ax.set_title('Influência do Histórico Familiar na Obesidade')
+    ax.set_xlabel('Quantidade de Pacientes')
+    ax.set_ylabel('Nível de Obesidade')
+    ax.legend(title='Histórico Familiar de Obesidade')
+    fig.tight_layout()
+    return fig
+
+
+# 3) Idade x Obesidade
+@figura
+def fig_idade(agregados, ordem_obesidade):
+    fig, ax = plt.subplots(figsize=(14, 7))
+    # Boxplot desenhado a partir dos quartis/bigodes pré-calculados por nível
+    estatisticas = agregados.boxplots['Idade']
+    cor = sns.desaturate(sns.color_palette()[0], 0.75)
+    linha = {'color': '#3f3f3f'}
+    ax.bxp(estatisticas, positions=range(len(estatisticas)), widths=0.8, patch_artist=True,
+           boxprops={'facecolor': cor, 'edgecolor': '#3f3f3f'}, medianprops=linha, whiskerprops=linha, capprops=linha,
+           flierprops={'marker': 'd', 'markerfacecolor': '#3f3f3f', 'markeredgecolor': '#3f3f3f', 'markersize': 5})
+    ax.set_xticks(range(len(estatisticas)), [e['label'] for e in estatisticas])
+    ax.set_title('Distribuição de Idade por Categoria de Peso')
+    ax.set_xlabel('Nível de Obesidade')
+    ax.set_ylabel('Idade (Anos)')
+    ax.tick_params(axis='x', rotation=45)
+    return fig
+
+
+# 4) Consumo de Vegetais
+@figura
+def fig_vegetais(agregados, ordem_obesidade):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    sns.barplot(
+        data=agregados.longa('Freq_Vegetais_Label'),
+        y='Nivel_Obesidade',
+        x='Quantidade',
+        hue='Freq_Vegetais_Label',
+        order=ordem_obesidade,
+        hue_order=['Raramente', 'Às Vezes', 'Sempre'],
+        palette='Greens',
+        errorbar=None,
+        ax=ax
+    )
+    ax.set_title('Consumo de Vegetais por Nível de Obesidade')
+    ax.set_xlabel('Quantidade de Pacientes')
+    ax.set_ylabel('Nível de Obesidade')
+    ax.legend(title='Consome Vegetais?')
+    return fig
+
+
+# 5) Consumo de Água
+@figura
+def fig_agua(agregados, ordem_obesidade):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    sns.barplot(
+        data=agregados.longa('Consumo_Agua_Label'),
+        y='Nivel_Obesidade',
+        x='Quantidade',
+        hue='Consumo_Agua_Label',
+        order=ordem_obesidade,
+        hue_order=['Menos de 1L', 'Entre 1L e 2L', 'Mais de 2L'],
+        palette='Blues',
+        errorbar=None,
+        ax=ax
+    )
+    ax.set_title('Consumo Diário de Água por Nível de Obesidade')
+    ax.set_xlabel('Quantidade de Pacientes')
+    ax.set_ylabel('Nível de Obesidade')
+    ax.legend(title='Consumo Diário')
+    return fig
+
+
+# 6) Consumo de Álcool
+@figura
+def fig_alcool(agregados, ordem_obesidade):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    sns.barplot(
+        data=agregados.longa('Consumo_Alcool'),
+        y='Nivel_Obesidade',
+        x='Quantidade',
+        hue='Consumo_Alcool',
+        order=ordem_obesidade,
+        hue_order=['Não bebe', 'Às Vezes', 'Frequentemente', 'Sempre'],
+        palette='Purples',
+        errorbar=None,
+        ax=ax
+    )
+    ax.set_title('Frequência de Consumo de Álcool por Nível de Obesidade')
+    ax.set_xlabel('Quantidade de Pacientes')
+    ax.set_ylabel('Nível de Obesidade')
+    ax.legend(title='Consumo de Álcool')
+    return fig
+
+
+# 7) Atividade Física
+@figura
+def fig_atividade_fisica(agregados, ordem_obesidade):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    sns.barplot(
+        data=agregados.longa('Freq_Ativ_Fisica_Label'),
+        y='Nivel_Obesidade',
+        x='Quantidade',
+        hue='Freq_Ativ_Fisica_Label',
+        order=ordem_obesidade,
+        hue_order=['Nenhuma', '1 a 2 dias/sem', '3 a 4 dias/sem', 'Mais de 4 dias/sem'],
+        palette='Oranges',
+        errorbar=None,
+        ax=ax
+    )
+    ax.set_title('Frequência de Atividade Física Semanal por Nível de Obesidade')
+    ax.set_xlabel('Quantidade de Pacientes')
+    ax.set_ylabel('Nível de Obesidade')
+    ax.legend(title='Frequência Semanal')
+    return fig
+
+
+# 8) Tabagismo
+@figura
+def fig_tabagismo(agregados, ordem_obesidade):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    sns.barplot(
+        data=agregados.longa('Fumante'),
+        y='Nivel_Obesidade',
+        x='Quantidade',
+        hue='Fumante',
+        order=ordem_obesidade,
+        palette={'Sim': '#596275', 'Não': '#dcdde1'},
+        errorbar=None,
+        ax=ax
+    )
+    ax.set_title('Relação: Tabagismo x Obesidade')
+    ax.set_xlabel('Quantidade de Pacientes')
+    ax.set_ylabel('Nível de Obesidade')
+    ax.legend(title='É Fumante?')
+    return fig
+
+
+# 9) Monitoramento de Calorias
+@figura
+def fig_calorias(agregados, ordem_obesidade):
+    ct_calorias = agregados.percentual('Monitora_Calorias').reindex(ordem_obesidade)
+    fig, ax = plt.subplots(figsize=(12, 6))
+    sns.barplot(x=ct_calorias.index, y=ct_calorias['Sim'], palette='viridis', order=ordem_obesidade, ax=ax)
+    ax.set_title('Percentual de Pessoas que Monitoram Calorias por Nível de Obesidade')
+    ax.set_xlabel('Nível de Obesidade')
+    ax.set_ylabel('% que Monitora Calorias')
+    for index, value in enumerate(ct_calorias['Sim']):
+        ax.text(index, value + 0.2, f'{value:.1f}%', ha='center', fontweight='bold')
+    ax.tick_params(axis='x', rotation=15)
+    return fig
+
+
+# 10) Tempo de Tela
+@figura
+def fig_tempo_tela(agregados, ordem_obesidade):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    sns.barplot(
+        data=agregados.longa('Tempo_Dispositivos_Label'),
+        y='Nivel_Obesidade',
+        x='Quantidade',
+        hue='Tempo_Dispositivos_Label',
+        order=ordem_obesidade,
+        hue_order=['0-2 horas', '3-5 horas', 'Mais de 5 horas'],
+        palette='cool_r',
+        errorbar=None,
+        ax=ax
+    )
+    ax.set_title('Tempo Diário em Dispositivos Eletrônicos por Nível de Obesidade')
+    ax.set_xlabel('Quantidade de Pacientes')
+    ax.set_ylabel('Nível de Obesidade')
+    ax.legend(title='Tempo de Tela')
+    return fig
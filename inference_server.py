@@ -0,0 +1,320 @@
+"""Serviço HTTP local de inferência com micro-batching (POST /predict, GET /metrics, GET /health).
+
+Uso:
+    python inference_server.py --port 8080 --max-batch-size 64 --max-wait-ms 5
+"""
+import argparse
+import asyncio
+import json
+import math
+import queue
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+from audit_log import AuditLog
+from machine_learning import CATEGORICAL_COLS, ModelWarmup, ObesityPredictor
+
+MAX_BODY_BYTES = 1 << 20
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class BatchFailed(Exception):
+    """O lote inteiro falhou por um erro do serviço, não dos dados enviados"""
+
+
+def validate_user_data(user_data, feature_names):
+    """Levanta ValueError se user_data não traz todas as features com tipos válidos"""
+    if not isinstance(user_data, dict):
+        raise ValueError('o corpo deve ser um objeto JSON com os dados do paciente')
+    missing = [col for col in feature_names if col not in user_data]
+    if missing:
+        raise ValueError(f"campos ausentes: {', '.join(missing)}")
+    for col in feature_names:
+        value = user_data[col]
+        if col in CATEGORICAL_COLS:
+            if not isinstance(value, str):
+                raise ValueError(f'{col} deve ser texto')
+        # null, NaN e Infinity não são pontuados (a floresta trataria como ausentes)
+        elif isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError(f'{col} deve ser um número finito')
+
+
+class ServiceMetrics:
+    """Contadores de vazão e janela deslizante de latências"""
+
+    def __init__(self, window=10000):
+        self.started_at = time.perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_rows = 0
+        self.latencies = deque(maxlen=window)
+
+    def observe_request(self, seconds, ok=True):
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+        self.latencies.append(seconds)
+
+    def observe_batch(self, size):
+        self.batches += 1
+        self.batched_rows += size
+
+    def snapshot(self):
+        uptime = time.perf_counter() - self.started_at
+        latencies = np.asarray(self.latencies) * 1e3
+        p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (0.0, 0.0)
+        return {
+            'uptime_s': round(uptime, 3),
+            'requests': self.requests,
+            'errors': self.errors,
+            'throughput_rps': round(self.requests / uptime, 2) if uptime > 0 else 0.0,
+            'latency_p50_ms': round(float(p50), 3),
+            'latency_p99_ms': round(float(p99), 3),
+            'batches': self.batches,
+            'mean_batch_size': round(self.batched_rows / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+class MicroBatcher:
+    """Agrupa requisições concorrentes e as pontua com uma chamada a predict_batch"""
+
+    def __init__(self, warmup, max_batch_size=64, max_wait_ms=5.0, metrics=None):
+        self.warmup = warmup
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.metrics = metrics or ServiceMetrics()
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, user_data):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((user_data, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _score(self, rows):
+        """Executa fora do event loop; isola linhas inválidas se o lote falhar"""
+        # Uma referência por lote: uma troca de geração vale a partir do próximo
+        predictor = self.warmup.refresh()
+        try:
+            return [self._format(predictor, *result) for result in zip(*predictor.predict_batch(rows))]
+        except Exception:
+            results = []
+            for row in rows:
+                try:
+                    results.append(self._format(predictor, *(r[0] for r in predictor.predict_batch([row]))))
+                except Exception as exc:
+                    results.append(exc)
+            return results
+
+    @staticmethod
+    def _format(predictor, label, confidence, proba, unknown):
+        return {
+            'prediction': str(label),
+            'confidence': float(confidence),
+            'probabilities': {str(name): float(p) for name, p in zip(predictor.target_names, proba)},
+            'unknown_categories': list(unknown),
+            'model_version': predictor.model_version(),
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            rows = [user_data for user_data, _ in batch]
+            self.metrics.observe_batch(len(rows))
+            try:
+                results = await loop.run_in_executor(None, self._score, rows)
+            except Exception as exc:
+                # Ex.: falha ao trocar de geração; o laço segue atendendo os próximos lotes
+                results = [BatchFailed(repr(exc))] * len(batch)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+class InferenceServer:
+    """Servidor HTTP mínimo; aceita conexões antes de o modelo (ModelWarmup) terminar de carregar"""
+
+    def __init__(self, warmup, host='127.0.0.1', port=8080, max_batch_size=64, max_wait_ms=5.0, audit=None):
+        self.warmup = warmup
+        self.audit = audit
+        self.host = host
+        self.port = port
+        self.metrics = ServiceMetrics()
+        self.batcher = MicroBatcher(warmup, max_batch_size, max_wait_ms, self.metrics)
+        self._server = None
+
+    async def start(self):
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        await self.batcher.stop()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload = await self._dispatch(method, path, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError as exc:
+            self._write_response(writer, 400, {'error': str(exc)}, keep_alive=False)
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, path, _ = request_line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            raise ValueError('linha de requisição inválida')
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length', 0) or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError('corpo da requisição muito grande')
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), path.split('?', 1)[0], headers, body
+
+    async def _dispatch(self, method, path, body):
+        if path == '/health':
+            return (200 if self.warmup.ready else 503), self.warmup.status()
+        if path == '/metrics':
+            return 200, self.metrics.snapshot()
+        if path != '/predict':
+            return 404, {'error': 'rota não encontrada'}
+        if method != 'POST':
+            return 405, {'error': 'use POST'}
+        if not self.warmup.ready:
+            return 503, {'error': 'modelo carregando', **self.warmup.status()}
+
+        start = time.perf_counter()
+        try:
+            user_data = json.loads(body)
+            validate_user_data(user_data, self.warmup.predictor.feature_names)
+        except ValueError as exc:
+            self.metrics.observe_request(time.perf_counter() - start, ok=False)
+            return 400, {'error': str(exc)}
+
+        try:
+            result = await self.batcher.submit(user_data)
+        except BatchFailed as exc:
+            self.metrics.observe_request(time.perf_counter() - start, ok=False)
+            return 500, {'error': f'falha no serviço de inferência: {exc}'}
+        except Exception as exc:
+            self.metrics.observe_request(time.perf_counter() - start, ok=False)
+            return 400, {'error': f'falha ao pontuar: {exc!r}'}
+        if self.audit is not None:
+            try:
+                # Sem esperar: bloquear aqui pararia o event loop inteiro
+                self.audit.log(user_data, result['prediction'], result['confidence'],
+                               result['probabilities'], result['model_version'], timeout=0)
+            except (queue.Full, RuntimeError):
+                self.metrics.observe_request(time.perf_counter() - start, ok=False)
+                return 503, {'error': 'log de auditoria cheio; tente novamente'}
+        self.metrics.observe_request(time.perf_counter() - start)
+        return 200, result
+
+    @staticmethod
+    def _write_response(writer, status, payload, keep_alive=True):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (
+            f'HTTP/1.1 {status} {STATUS_TEXT.get(status, "")}\r\n'
+            'Content-Type: application/json; charset=utf-8\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'
+        )
+        writer.write(head.encode('latin-1') + body)
+
+
+async def _serve(args):
+    # O servidor começa a ouvir enquanto o modelo carrega; /health responde 503 até ficar pronto
+    warmup = ModelWarmup(lambda: ObesityPredictor(args.data, model_dir=args.model_dir, engine=args.engine),
+                         monitor_source='inference_server').start()
+    audit = AuditLog(args.audit_dir).start() if args.audit_dir else None
+    server = await InferenceServer(warmup, args.host, args.port,
+                                   args.max_batch_size, args.max_wait_ms, audit).start()
+    print(f"Servindo em http://{server.host}:{server.port}", file=sys.stderr)
+    await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serviço HTTP local de inferência.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--data', default='Obesity.csv')
+    parser.add_argument('--model-dir', default='artefatos')
+    parser.add_argument('--engine', default='flat', choices=ObesityPredictor.ENGINES)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    parser.add_argument('--audit-dir', help='grava cada predição no log de auditoria deste diretório')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
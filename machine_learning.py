@@ -1,71 +1,1469 @@
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
-from sklearn.metrics import accuracy_score
+import argparse
+import copy
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from dataset_cache import atomic_path, file_sha256, load_dataset
+from drift_monitor import DriftMonitor, build_reference
+
+# pandas, sklearn, scipy e joblib são importados dentro das funções que os
+# usam: com o engine 'flat' (ou 'compact') e um artefato já salvo, a inferência carrega só
+# o pacote .serving e nenhuma dessas bibliotecas entra no processo
+
+# Versão do formato do artefato; incremente ao mudar o que é salvo em disco
+ARTIFACT_VERSION = 7
+
+DEFAULT_PARAMS = {'n_estimators': 100, 'random_state': 42, 'max_depth': 10}
+
+# Colunas ordinais que chegam com ruído decimal e são arredondadas para inteiro
+INTEGER_COLS = ['FCVC', 'NCP', 'CH2O', 'FAF', 'TUE']
+
+CATEGORICAL_COLS = ['Gender', 'family_history', 'FAVC', 'CAEC', 'SMOKE',
+                    'SCC', 'CALC', 'MTRANS', 'Obesity']
+
+# Fração do conjunto de treino mantida como janela de linhas recentes para as árvores de update()
+RECENT_FRACTION = 0.5
+# Gerações do pacote de inferência mantidas em disco além da atual, para que
+# processos que ainda não trocaram de geração não percam os arquivos mapeados
+SERVING_GENERATIONS_KEPT = 2
+# Formato das distribuições das folhas no pacote de inferência do engine 'compact'
+COMPACT_LEAF_DTYPE = 'uint8'
+
+# Hábitos modificáveis e os valores testados por what_if() (mais o peso, em passos de kg)
+WHAT_IF_VALUES = {
+    'FAVC': ['yes', 'no'],
+    'FCVC': [1, 2, 3],
+    'NCP': [1, 2, 3, 4],
+    'CAEC': ['no', 'Sometimes', 'Frequently', 'Always'],
+    'CH2O': [1, 2, 3],
+    'SCC': ['yes', 'no'],
+    'FAF': [0, 1, 2, 3],
+    'TUE': [0, 1, 2],
+    'CALC': ['no', 'Sometimes', 'Frequently', 'Always'],
+    'MTRANS': ['Public_Transportation', 'Walking', 'Automobile', 'Motorbike', 'Bike'],
+}
+WHAT_IF_WEIGHT_STEPS = (-15, -10, -5, 5, 10)
+
+
+def clean_data(df):
+    """Limpeza de ruídos decimais conforme dicionário (ordinais arredondadas), in-place"""
+    for col in INTEGER_COLS:
+        if col in df.columns:
+            df[col] = df[col].round().astype(int)
+    return df
+
+
+def bounded_map(pool, fn, items, max_in_flight, args=(), ordered=True):
+    """Como pool.map, lendo items sob demanda e com no máximo max_in_flight tarefas em voo"""
+    pending = deque() if ordered else set()
+    for item in items:
+        future = pool.submit(fn, item, *args)
+        if ordered:
+            pending.append(future)
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        else:
+            pending.add(future)
+            if len(pending) >= max_in_flight:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    yield future.result()
+    if ordered:
+        while pending:
+            yield pending.popleft().result()
+    else:
+        for future in wait(pending).done:
+            yield future.result()
+
+
+# Dados compartilhados com os processos do pool de validação cruzada (ver _init_cv_worker)
+_cv_data = {}
+
+
+def _init_cv_worker(X, y, params, n_classes):
+    _cv_data.update(X=X, y=y, params=params, n_classes=n_classes)
+
+
+def _evaluate_fold(train_idx, test_idx):
+    """Treina e avalia um fold; devolve (acurácia, matriz de confusão)"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import accuracy_score, confusion_matrix
+
+    X, y = _cv_data['X'], _cv_data['y']
+    model = RandomForestClassifier(**_cv_data['params'])
+    model.fit(X.iloc[train_idx], y.iloc[train_idx])
+    y_pred = model.predict(X.iloc[test_idx])
+    y_true = y.iloc[test_idx]
+    labels = np.arange(_cv_data['n_classes'])
+    return accuracy_score(y_true, y_pred), confusion_matrix(y_true, y_pred, labels=labels)
+
+
+def _read_generation(serving_dir):
+    """Nome da geração publicada no pacote de inferência (conteúdo do arquivo CURRENT)"""
+    with open(os.path.join(serving_dir, 'CURRENT'), encoding='utf-8') as f:
+        return f.read().strip()
+
+
+def leaderboard_path(data_path, model_dir='artefatos'):
+    """Leaderboard da busca de hiperparâmetros (tuning.py) para o conteúdo deste CSV"""
+    return os.path.join(model_dir, f'leaderboard_{file_sha256(data_path)[:16]}.json')
+
+
+class FlatForest:
+    """Floresta exportada para vetores NumPy contíguos, com as mesmas probabilidades do sklearn"""
+
+    ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'roots', 'missing_left')
+    # Arrays de contributions(), gravados no pacote de inferência (ver _path_deltas)
+    EXPLAIN_ARRAYS = ('delta', 'via', 'bias')
+    # Maior diferença que uma árvore pode somar entre duas classes (ver predict_proba_early_exit)
+    tree_weight = 1.0
+
+    def __init__(self, forest):
+        features, thresholds, lefts, rights, values, roots, missing_left = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(n_nodes)
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            values.append(self._leaf_distribution(tree.value[:, 0, :forest.n_classes_]))
+            roots.append(offset)
+            # Lado de NaN em cada split (sklearn >= 1.3); antes disso o sklearn recusa NaN
+            missing = getattr(tree, 'missing_go_to_left', None)
+            missing_left.append(np.zeros(n_nodes, dtype=bool) if missing is None else np.asarray(missing, dtype=bool))
+
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        self.feature = np.ascontiguousarray(np.concatenate(features), dtype=np.intp)
+        self.threshold = np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64)
+        self.left = np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp)
+        self.right = np.ascontiguousarray(np.concatenate(rights), dtype=np.intp)
+        self.value = np.ascontiguousarray(np.concatenate(values), dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.missing_left = np.concatenate(missing_left)
+        self.max_depth = max_depth
+        self.n_classes = forest.n_classes_
+
+    @classmethod
+    def from_arrays(cls, max_depth, n_classes, **arrays):
+        """Reconstrói a floresta a partir de to_arrays(), sem precisar do sklearn"""
+        flat = cls.__new__(cls)
+        for name in cls.ARRAYS:
+            setattr(flat, name, np.ascontiguousarray(arrays[name]))
+        flat.max_depth = int(max_depth)
+        flat.n_classes = int(n_classes)
+        if all(name in arrays for name in cls.EXPLAIN_ARRAYS):
+            flat._deltas = tuple(arrays[name] for name in cls.EXPLAIN_ARRAYS)
+        return flat
+
+    def to_arrays(self):
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+    def explain_arrays(self):
+        return dict(zip(self.EXPLAIN_ARRAYS, self._path_deltas()))
+
+    @property
+    def nbytes(self):
+        """Memória ocupada pelos vetores da floresta"""
+        return sum(getattr(self, name).nbytes for name in self.ARRAYS)
+
+    @staticmethod
+    def _leaf_distribution(value):
+        # Versões antigas do sklearn guardam contagens em tree_.value e normalizam
+        # em predict_proba; as recentes já guardam frações e as usam como estão
+        sums = value.sum(axis=1, keepdims=True)
+        if np.any(sums > 1 + 1e-6):
+            sums[sums == 0] = 1
+            return value / sums
+        return value
+
+    def apply(self, X, roots=None):
+        """Folha alcançada por cada linha em cada árvore de roots (padrão: todas): (árvores, linhas)"""
+        node = None
+        for node in self._walk(X, roots):
+            pass
+        return node
+
+    def _walk(self, X, roots=None):
+        """Gera o nó atual de cada (árvore, linha) a cada passo da descida, da raiz até max_depth"""
+        roots = self.roots if roots is None else roots
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        row_offsets = np.arange(n_rows) * n_features
+        # Valores ausentes seguem missing_left, como no sklearn; sem NaN no lote, nada muda no laço
+        has_missing = np.isnan(flat_X).any()
+        node = np.repeat(roots[:, None], n_rows, axis=1)
+        yield node
+        # take() em vetores 1-D é bem mais barato que indexação avançada 2-D
+        for _ in range(self.max_depth):
+            x = flat_X.take(row_offsets + self.feature.take(node))
+            go_left = x <= self.threshold.take(node)
+            if has_missing:
+                go_left |= np.isnan(x) & self.missing_left.take(node)
+            node = np.where(go_left, self.left.take(node), self.right.take(node))
+            yield node
+
+    def _path_deltas(self):
+        """Variação da distribuição de cada nó em relação ao pai, feature do split do pai e média das raízes"""
+        cached = getattr(self, '_deltas', None)
+        if cached is None:
+            node_ids = np.arange(len(self.left))
+            internal = np.asarray(self.left) != node_ids
+            # Raízes ficam como pai de si mesmas (variação zero)
+            parent = node_ids.copy()
+            parent[np.asarray(self.left)[internal]] = node_ids[internal]
+            parent[np.asarray(self.right)[internal]] = node_ids[internal]
+            values = np.asarray(self.value, dtype=np.float64) / self.tree_weight
+            cached = (values - values[parent], np.asarray(self.feature)[parent],
+                      values[self.roots].mean(axis=0))
+            self._deltas = cached
+        return cached
+
+    def contributions(self, X, chunk_size=512):
+        """Contribuição de cada feature para cada probabilidade pelos caminhos de decisão: (bias, contrib)"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        delta, via, bias = self._path_deltas()
+        n_features = X.shape[1]
+        out = np.empty((X.shape[0], n_features, self.n_classes), dtype=np.float64)
+        for start in range(0, X.shape[0], chunk_size):
+            chunk = X[start:start + chunk_size]
+            # Acumulador achatado (linha, feature, classe): um único bincount por passo
+            acc = np.zeros(len(chunk) * n_features * self.n_classes, dtype=np.float64)
+            row_slots = np.arange(len(chunk)) * n_features
+            class_offsets = np.arange(self.n_classes)
+            node = None
+            for step in self._walk(chunk):
+                if node is not None:
+                    # Folhas apontam para si mesmas: só conta quem desceu neste passo
+                    moved = step != node
+                    target = step[moved]
+                    slots = np.broadcast_to(row_slots, step.shape)[moved] + via.take(target)
+                    acc += np.bincount((slots[:, None] * self.n_classes + class_offsets).ravel(),
+                                       weights=delta.take(target, axis=0).ravel(), minlength=len(acc))
+                node = step
+            out[start:start + chunk_size] = acc.reshape(len(chunk), n_features, self.n_classes) / len(self.roots)
+        return bias, out
+
+    def predict_proba(self, X, chunk_size=512):
+        """X: matriz (linhas x features) na ordem de treino, avaliada em float32 como no sklearn"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        out = np.zeros((X.shape[0], self.n_classes), dtype=np.float64)
+        for start in range(0, X.shape[0], chunk_size):
+            leaves = self.apply(X[start:start + chunk_size])
+            # Soma na ordem das árvores, como o sklearn, para manter os mesmos bits.
+            # Em lotes pequenos uma única cumsum evita o custo do laço em Python
+            if leaves.shape[1] <= 64:
+                out[start:start + chunk_size] = self.value[leaves].cumsum(axis=0)[-1]
+            else:
+                acc = out[start:start + chunk_size]
+                for tree_leaves in leaves:
+                    acc += self.value.take(tree_leaves, axis=0)
+        out /= len(self.roots)
+        return out
+
+    def _normalize(self, totals, n_trees):
+        """Probabilidades a partir das somas das folhas de n_trees árvores (escalar ou por linha)"""
+        return totals / n_trees
+
+    def _block_ends(self, block_size, confidence):
+        """Árvores avaliadas ao fim de cada bloco de predict_proba_early_exit"""
+        n_trees = len(self.roots)
+        # Sem confidence, a vantagem da líder (no máximo `last` árvores) só supera as
+        # restantes depois da metade: conferir antes disso só custaria tempo
+        first = block_size if confidence is not None else max(block_size, n_trees // 2 + 1)
+        return list(range(min(first, n_trees), n_trees, block_size)) + [n_trees]
+
+    def predict_proba_early_exit(self, X, block_size=10, confidence=None, chunk_size=4096):
+        """Avalia as árvores em blocos e para cada linha quando o voto está decidido"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_trees = len(self.roots)
+        weight = self.tree_weight
+        # Mesmo tipo de acumulador de predict_proba (inteiro para folhas uint8)
+        totals = np.zeros((X.shape[0], self.n_classes), dtype=np.int32 if self.value.dtype == np.uint8 else np.float64)
+        used = np.full(X.shape[0], n_trees, dtype=np.intp)
+        ends = self._block_ends(block_size, confidence)
+        for start in range(0, X.shape[0], chunk_size):
+            # Linhas ainda em avaliação, compactadas: posição em X, features e somas
+            rows = np.arange(start, min(start + chunk_size, X.shape[0]))
+            active_X = X[rows]
+            acc = totals[rows]
+            first = 0
+            for last in ends:
+                # Soma árvore a árvore, como predict_proba: quem usa todas as
+                # árvores termina com exatamente as mesmas probabilidades
+                for tree_leaves in self.apply(active_X, self.roots[first:last]):
+                    acc += self.value.take(tree_leaves, axis=0)
+                first = last
+                if last == n_trees or self.n_classes < 2:
+                    break
+                remaining = (n_trees - last) * weight + 1e-9
+                top = acc.max(axis=1)
+                # Só quem tem a líder acima do que ainda falta pode ter terminado
+                candidates = np.flatnonzero(top > remaining if confidence is None
+                                            else (top > remaining) | (top >= confidence * last * weight))
+                if not len(candidates):
+                    continue
+                top2 = np.partition(acc[candidates], -2, axis=1)[:, -2:]
+                decided = top2[:, 1] - top2[:, 0] > remaining
+                if confidence is not None:
+                    decided |= top2[:, 1] >= confidence * last * weight
+                done = candidates[decided]
+                if not len(done):
+                    continue
+                totals[rows[done]] = acc[done]
+                used[rows[done]] = last
+                keep = np.ones(len(rows), dtype=bool)
+                keep[done] = False
+                rows, active_X, acc = rows[keep], active_X[keep], acc[keep]
+                if not len(rows):
+                    break
+            totals[rows] = acc
+        return self._normalize(totals, used[:, None]), used
+
+
+def _round_down_float32(values):
+    """Maior float32 <= cada valor: para x float32, x <= t equivale a x <= _round_down_float32(t)"""
+    rounded = values.astype(np.float32)
+    over = rounded.astype(np.float64) > values
+    rounded[over] = np.nextafter(rounded[over], np.float32(-np.inf))
+    return rounded
+
+
+def _quantize_uint8(dist):
+    """Distribuições (linhas somando 1) em uint8 somando exatamente 255, com erro < 1/255"""
+    scaled = dist * 255
+    quantized = np.floor(scaled)
+    missing = np.clip(np.rint(255 - quantized.sum(axis=1)), 0, dist.shape[1])
+    order = np.argsort(quantized - scaled, axis=1, kind='stable')
+    rank = np.empty_like(order)
+    np.put_along_axis(rank, order, np.broadcast_to(np.arange(dist.shape[1]), order.shape), axis=1)
+    quantized += rank < missing[:, None]
+    # Nós internos não têm distribuição normalizada garantida; nunca são lidos
+    return np.clip(quantized, 0, 255).astype(np.uint8)
+
+
+class CompactForest(FlatForest):
+    """FlatForest com tipos estreitos: mesma descida, folhas em uint8 ou float16"""
+
+    LEAF_DTYPES = ('uint8', 'float16')
+
+    def __init__(self, flat, leaf_dtype=COMPACT_LEAF_DTYPE):
+        if leaf_dtype not in self.LEAF_DTYPES:
+            raise ValueError(f"leaf_dtype deve ser um de {self.LEAF_DTYPES}, recebido {leaf_dtype!r}")
+        if flat.feature.max(initial=0) > np.iinfo(np.int8).max:
+            raise ValueError("CompactForest suporta no máximo 128 features")
+        if len(flat.feature) > np.iinfo(np.int32).max:
+            raise ValueError("Floresta grande demais para índices int32")
+        self.feature = flat.feature.astype(np.int8)
+        self.threshold = _round_down_float32(np.asarray(flat.threshold, dtype=np.float64))
+        self.left = flat.left.astype(np.int32)
+        self.right = flat.right.astype(np.int32)
+        if leaf_dtype == 'uint8':
+            self.value = _quantize_uint8(np.asarray(flat.value))
+        else:
+            self.value = np.asarray(flat.value).astype(np.float16)
+        self.roots = flat.roots.astype(np.int32)
+        self.missing_left = flat.missing_left
+        self.max_depth = flat.max_depth
+        self.n_classes = flat.n_classes
+
+    @property
+    def leaf_dtype(self):
+        return self.value.dtype.name
+
+    @property
+    def tree_weight(self):
+        # Cada folha uint8 soma 255; em float16 os valores continuam <= 1
+        return 255 if self.value.dtype == np.uint8 else 1.0
+
+    @property
+    def proba_error_bound(self):
+        """Limite da diferença absoluta de cada probabilidade em relação à FlatForest"""
+        if self.value.dtype == np.uint8:
+            # Folhas somam 255 exatamente: a média de erros < 1/255 não é renormalizada
+            return 1 / 255
+        # Erro de arredondamento do float16 (meio ulp, <= 2**-12 para p < 1) no
+        # numerador mais o da renormalização pela soma das n_classes probabilidades
+        return (self.n_classes + 1) * 2.0 ** -12
+
+    def predict_proba(self, X, chunk_size=512):
+        """Mesma interface de FlatForest.predict_proba; linhas somam 1"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        out = np.empty((X.shape[0], self.n_classes), dtype=np.float64)
+        # uint8 soma em inteiros (exato, independente da ordem das árvores)
+        acc_dtype = np.int32 if self.value.dtype == np.uint8 else np.float64
+        for start in range(0, X.shape[0], chunk_size):
+            leaves = self.apply(X[start:start + chunk_size])
+            totals = self.value.take(leaves, axis=0).sum(axis=0, dtype=acc_dtype)
+            out[start:start + chunk_size] = self._normalize(totals, len(self.roots))
+        return out
+
+    def _normalize(self, totals, n_trees):
+        # Folhas quantizadas: normaliza pela soma, para que cada linha some 1
+        return totals / totals.sum(axis=1, keepdims=True)
+
+
+class NeighborIndex:
+    """Índice exato de vizinhos na coorte de treino, com distância de Gower"""
+
+    ARRAYS = ('numeric', 'codes', 'labels', 'categorical', 'low', 'span')
+    # Elementos (consultas x linhas x features) comparados por vez em query()
+    BLOCK_ELEMENTS = 1 << 22
+
+    def __init__(self, X, y, categorical):
+        """X: matriz (linhas x features) na ordem de treino; y: códigos da classe; categorical: máscara das colunas categóricas"""
+        X = np.asarray(X, dtype=np.float64)
+        self.categorical = np.asarray(categorical, dtype=bool)
+        numeric = X[:, ~self.categorical]
+        self.low = numeric.min(axis=0)
+        span = numeric.max(axis=0) - self.low
+        # Coluna constante: qualquer diferença conta inteira
+        self.span = np.where(span > 0, span, 1.0)
+        numeric, codes = self._split(X)
+        self.numeric, self.codes = np.ascontiguousarray(numeric.T), np.ascontiguousarray(codes.T)
+        self.labels = np.asarray(y, dtype=np.int16)
+
+    @classmethod
+    def from_arrays(cls, **arrays):
+        index = cls.__new__(cls)
+        for name in cls.ARRAYS:
+            setattr(index, name, arrays[name])
+        return index
+
+    def to_arrays(self):
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+    def __len__(self):
+        return len(self.labels)
+
+    def _split(self, X):
+        """Separa um lote codificado em parte numérica escalada e códigos categóricos (linhas x features)"""
+        X = np.asarray(X, dtype=np.float64)
+        numeric = ((X[:, ~self.categorical] - self.low) / self.span).astype(np.float32)
+        return np.ascontiguousarray(numeric), np.ascontiguousarray(X[:, self.categorical], dtype=np.int16)
+
+    def add(self, X, y):
+        """Acrescenta linhas rotuladas (mesma escala do treino, para manter as distâncias comparáveis)"""
+        numeric, codes = self._split(X)
+        self.numeric = np.concatenate([self.numeric, numeric.T], axis=1)
+        self.codes = np.concatenate([self.codes, codes.T], axis=1)
+        self.labels = np.concatenate([self.labels, np.asarray(y, dtype=np.int16)])
+
+    def query(self, X, k=5):
+        """Os k vizinhos de cada linha de X: (distâncias, índices), ambos (consultas x k), do mais próximo ao mais distante"""
+        numeric, codes = self._split(X)
+        n_rows = len(self.labels)
+        k = min(k, n_rows)
+        n_features = len(self.categorical)
+        distances = np.empty((len(numeric), k), dtype=np.float64)
+        indices = np.empty((len(numeric), k), dtype=np.intp)
+        step = max(1, self.BLOCK_ELEMENTS // max(n_rows * n_features, 1))
+        for start in range(0, len(numeric), step):
+            stop = start + step
+            block = np.zeros((len(numeric[start:stop]), n_rows), dtype=np.float32)
+            for query_col, column in zip(numeric[start:stop].T, self.numeric):
+                block += np.abs(query_col[:, None] - column)
+            for query_col, column in zip(codes[start:stop].T, self.codes):
+                block += query_col[:, None] != column
+            nearest = np.argpartition(block, k - 1, axis=1)[:, :k] if k < n_rows else np.tile(np.arange(n_rows), (len(block), 1))
+            nearest_d = np.take_along_axis(block, nearest, axis=1)
+            # Empates desfeitos pela ordem das linhas, para um resultado determinístico
+            order = np.lexsort((nearest, nearest_d), axis=1)
+            indices[start:stop] = np.take_along_axis(nearest, order, axis=1)
+            distances[start:stop] = np.take_along_axis(nearest_d, order, axis=1) / n_features
+        return distances, indices
+
+    def decode(self, indices):
+        """Valores numéricos (na escala original) e códigos categóricos das linhas indicadas"""
+        return self.numeric[:, indices].T * self.span + self.low, self.codes[:, indices].T
+
 
 class ObesityPredictor:
-    def __init__(self, data_path):
+    ENGINES = ('sklearn', 'flat', 'compact')
+
+    def __init__(self, data_path, model_dir='artefatos', engine='sklearn', cache_size=1024, **params):
+        if engine not in self.ENGINES:
+            raise ValueError(f"engine deve ser um de {self.ENGINES}, recebido {engine!r}")
         self.data_path = data_path
-        self.model = RandomForestClassifier(n_estimators=100, random_state=42, max_depth=10)
+        self.model_dir = model_dir
+        self.engine = engine
+        self.params = {**DEFAULT_PARAMS, **params}
+        # Criado (ou lido do artefato completo) no primeiro acesso a self.model
+        self._model = None
+        self._pending_artifact = None
+        # Artefato carregado/salvo e geração do pacote de inferência em uso
+        self._artifact_path = None
+        self.serving_generation = None
+        # Impressão digital (fingerprint()) do modelo treinado ou carregado
+        self.model_fingerprint = None
         self.encoders = {}
+        # Categorias de cada feature categórica na ordem dos códigos: as do treino
+        # (ordenadas, como no LabelEncoder) seguidas das acrescentadas por update()
+        self.categories = {}
         self.accuracy = 0.0
         self.target_names = []
+        self.feature_names = []
+        self.evaluation = None
+        # Número de atualizações incrementais (update()) aplicadas desde o treino
+        self.updates = 0
+        # Dados codificados (features + 'Obesity') para update(): janela de linhas
+        # recentes e conjunto de validação usado antes de trocar o modelo
+        self._recent = None
+        self._holdout = None
+        self._code_maps = {}
+        self._flat_forest = None
+        self._compact_forest = None
+        # Coorte de treino para similar_patients() (ver NeighborIndex)
+        self.neighbor_index = None
+        # Estatísticas de treino (drift_monitor.build_reference) e contagens do tráfego pontuado
+        self.drift_reference = None
+        self.monitor = None
+        # Cache LRU de predict(): vetor de features canônico -> resultado
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
         
+    @classmethod
+    def from_leaderboard(cls, data_path, latency_budget_ms=None, model_dir='artefatos', **kwargs):
+        """Predictor com a configuração mais precisa de tuning.py dentro de latency_budget_ms"""
+        try:
+            with open(leaderboard_path(data_path, model_dir), encoding='utf-8') as f:
+                results = json.load(f)['results']
+        except (OSError, ValueError, KeyError):
+            results = []
+
+        eligible = [r for r in results if r.get('final')
+                    and (latency_budget_ms is None or r['latency_ms'] <= latency_budget_ms)]
+        params = {}
+        if eligible:
+            params = max(eligible, key=lambda r: (r['accuracy'], -r['latency_ms']))['params']
+        return cls(data_path, model_dir=model_dir, **{**params, **kwargs})
+
+    @property
+    def model(self):
+        """RandomForestClassifier do sklearn, lido do artefato completo no primeiro uso"""
+        if self._model is None:
+            if self._pending_artifact is not None:
+                self._ensure_full()
+            else:
+                from sklearn.ensemble import RandomForestClassifier
+                self._model = RandomForestClassifier(**self.params)
+        return self._model
+
+    @model.setter
+    def model(self, value):
+        self._model = value
+
     def _clean_data(self, df):
         """Limpeza de ruídos decimais conforme dicionário"""
-        cols_to_fix = ['FCVC', 'NCP', 'CH2O', 'FAF', 'TUE']
-        for col in cols_to_fix:
-            if col in df.columns:
-                df[col] = df[col].round().astype(int)
-        return df
+        return clean_data(df)
 
-    def train(self):
-        """Carrega, limpa e treina o modelo"""
-        df = pd.read_csv(self.data_path)
-        df = self._clean_data(df)
-        
-        categorical_cols = ['Gender', 'family_history', 'FAVC', 'CAEC', 'SMOKE', 
-                            'SCC', 'CALC', 'MTRANS', 'Obesity']
+    def fingerprint(self):
+        """Identifica o modelo pelo conteúdo do CSV de treino e pelos hiperparâmetros"""
+        digest = hashlib.sha256()
+        digest.update(file_sha256(self.data_path).encode())
+        digest.update(json.dumps(self.params, sort_keys=True).encode())
+        digest.update(str(ARTIFACT_VERSION).encode())
+        return digest.hexdigest()
+
+    def artifact_path(self, fingerprint=None):
+        fingerprint = fingerprint or self.fingerprint()
+        return os.path.join(self.model_dir, f'obesity_model_{fingerprint[:16]}.joblib')
+
+    @staticmethod
+    def serving_path(artifact_path):
+        """Diretório do pacote de inferência, gravado ao lado do artefato joblib"""
+        return os.path.splitext(artifact_path)[0] + '.serving'
+
+    def published_generation(self):
+        """Geração que o arquivo CURRENT do pacote de inferência aponta agora (None se não houver)"""
+        if self._artifact_path is None:
+            return None
+        try:
+            return _read_generation(self.serving_path(self._artifact_path))
+        except OSError:
+            return None
+
+    def _load_training_data(self):
+        """Lê o CSV tipado (cache colunar) e ajusta um LabelEncoder por coluna categórica; devolve (X, y, encoders)"""
+        # load_dataset já arredonda as colunas ordinais (mesma limpeza de _clean_data)
+        from sklearn.preprocessing import LabelEncoder
+
+        df = load_dataset(self.data_path, self.model_dir)
         
-        for col in categorical_cols:
+        encoders = {}
+        for col in CATEGORICAL_COLS:
             le = LabelEncoder()
             df[col] = le.fit_transform(df[col])
-            self.encoders[col] = le
+            encoders[col] = le
             
+        return df.drop('Obesity', axis=1), df['Obesity'], encoders
+
+    def train(self):
+        """Carrega, limpa e treina o modelo"""
+        from sklearn.metrics import accuracy_score
+        from sklearn.model_selection import train_test_split
+
+        self._pending_artifact = None
+        X, y, self.encoders = self._load_training_data()
         self.target_names = self.encoders['Obesity'].classes_
+        self.categories = {col: le.classes_.tolist() for col, le in self.encoders.items() if col != 'Obesity'}
         
-        X = df.drop('Obesity', axis=1)
-        y = df['Obesity']
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
         self.model.fit(X_train, y_train)
         
         y_pred = self.model.predict(X_test)
         self.accuracy = accuracy_score(y_test, y_pred)
+        self.updates = 0
+        self._recent = X_train.assign(Obesity=y_train).tail(int(len(X_train) * RECENT_FRACTION))
+        self._holdout = X_test.assign(Obesity=y_test)
+        self.model_fingerprint = self.fingerprint()
+        self.neighbor_index = NeighborIndex(X.to_numpy(), y.to_numpy(), X.columns.isin(CATEGORICAL_COLS))
+        self._set_drift_reference(build_reference(
+            X.to_numpy(), y.to_numpy(), list(X.columns), X.columns.isin(CATEGORICAL_COLS),
+            {col: le.classes_.tolist() for col, le in self.encoders.items()},
+            self.target_names, self.model_fingerprint,
+        ))
+        self._refresh_runtime()
         
         return self.accuracy
 
+    def _set_drift_reference(self, reference):
+        """Troca a referência de deriva; as contagens recomeçam do zero"""
+        self.drift_reference = reference
+        self.monitor = DriftMonitor(reference)
+
+    def model_version(self):
+        """Identificação do modelo em uso, gravada com cada predição no log de auditoria"""
+        return {
+            'fingerprint': self.model_fingerprint,
+            'updates': self.updates,
+            'generation': self.serving_generation,
+            'engine': self.engine,
+        }
+
+    def monitoring_path(self):
+        """Diretório dos snapshots de deriva lidos pela página de monitoramento"""
+        return os.path.join(self.model_dir, 'monitoramento')
+
+    def start_monitoring(self, source, interval=60.0):
+        """Grava snapshots do monitor de deriva a cada interval segundos (e ao sair do processo)"""
+        return self.monitor.start(self.monitoring_path(), source, interval)
+
+    def _observe(self, X, probas, unknown_per_row):
+        if self.monitor is not None:
+            self.monitor.observe(X, probas.argmax(axis=1), self._unknown_mask(unknown_per_row))
+
+    def _unknown_mask(self, unknown_per_row):
+        """Máscara (linhas x features) das categorias desconhecidas, na ordem de feature_names"""
+        mask = np.zeros((len(unknown_per_row), len(self.feature_names)), dtype=bool)
+        for i, cols in enumerate(unknown_per_row):
+            for col in cols:
+                mask[i, self.feature_names.index(col)] = True
+        return mask
+
+    def _refresh_runtime(self, feature_names=None):
+        """Recalcula as estruturas derivadas do modelo após treino ou carga"""
+        if feature_names is None:
+            feature_names = self.model.feature_names_in_
+        self.feature_names = list(feature_names)
+        # Tabelas categoria -> código, equivalentes ao LabelEncoder.transform para as
+        # categorias do treino, para codificar colunas inteiras com um único .map()
+        self._code_maps = {
+            col: {category: code for code, category in enumerate(classes)}
+            for col, classes in self.categories.items()
+        }
+        self._flat_forest = None
+        self._compact_forest = None
+        # O estado em memória deixou de ser uma geração publicada (até o próximo save())
+        self.serving_generation = None
+        self.clear_cache()
+
+    def clear_cache(self):
+        """Esvazia o cache de predições (chamado sempre que o modelo muda)"""
+        with self._cache_lock:
+            self._cache.clear()
+            self._cache_hits = 0
+            self._cache_misses = 0
+
+    def cache_info(self):
+        with self._cache_lock:
+            return {'hits': self._cache_hits, 'misses': self._cache_misses,
+                    'size': len(self._cache), 'max_size': self.cache_size}
+
+    @property
+    def flat_forest(self):
+        """Versão vetorizada da floresta, exportada na primeira utilização"""
+        if self._flat_forest is None:
+            self._flat_forest = FlatForest(self.model)
+        return self._flat_forest
+
+    @property
+    def compact_forest(self):
+        """Versão compacta (COMPACT_LEAF_DTYPE) da floresta, usada pelo engine 'compact'"""
+        if self._compact_forest is None:
+            self._compact_forest = CompactForest(self.flat_forest)
+        return self._compact_forest
+
+    def export_compact(self, leaf_dtype=COMPACT_LEAF_DTYPE, rows=None):
+        """Floresta compacta e relatório da divergência em relação à floresta completa"""
+        import pandas as pd
+
+        compact = CompactForest(self.flat_forest, leaf_dtype)
+        if rows is None:
+            rows = pd.read_csv(self.data_path)
+        X, _ = self._encode(pd.DataFrame(rows).reset_index(drop=True))
+        X = X.to_numpy(dtype=np.float32)
+
+        reference = self.flat_forest.predict_proba(X)
+        approx = compact.predict_proba(X)
+        top2 = np.sort(reference, axis=1)[:, -2:]
+        margin = top2[:, 1] - top2[:, 0]
+        bound = compact.proba_error_bound
+        disagreements = int((reference.argmax(axis=1) != approx.argmax(axis=1)).sum())
+        report = {
+            'leaf_dtype': compact.leaf_dtype,
+            'rows': len(X),
+            'label_disagreements': disagreements,
+            'label_disagreement_rate': disagreements / len(X) if len(X) else 0.0,
+            'max_abs_proba_diff': float(np.abs(reference - approx).max()) if len(X) else 0.0,
+            'proba_error_bound': bound,
+            # Só estas linhas podem mudar de rótulo: limite superior de label_disagreements
+            'rows_within_error_bound': int((margin <= 2 * bound).sum()),
+            'flat_bytes': self.flat_forest.nbytes,
+            'compact_bytes': compact.nbytes,
+        }
+        return compact, report
+
+    def _predict_proba(self, X):
+        """X: DataFrame ou matriz numérica com as colunas na ordem de feature_names"""
+        if len(X) == 0:
+            # O sklearn rejeita lotes vazios
+            return np.empty((0, len(self.target_names)))
+        if self.engine == 'flat':
+            return self.flat_forest.predict_proba(np.asarray(X, dtype=np.float32))
+        if self.engine == 'compact':
+            return self.compact_forest.predict_proba(np.asarray(X, dtype=np.float32))
+        import pandas as pd
+
+        if not isinstance(X, pd.DataFrame):
+            X = pd.DataFrame(X, columns=self.feature_names)
+        return self.model.predict_proba(X)
+
+    def save(self, path=None):
+        """Grava floresta, encoders e métricas num artefato versionado, mais o pacote de inferência"""
+        import joblib
+
+        self._ensure_full()
+        fingerprint = self.fingerprint()
+        path = path or self.artifact_path(fingerprint)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        artifact = {
+            'version': ARTIFACT_VERSION,
+            'fingerprint': fingerprint,
+            'params': self.params,
+            'model': self.model,
+            'encoders': self.encoders,
+            'categories': self.categories,
+            'target_names': self.target_names,
+            'accuracy': self.accuracy,
+            'updates': self.updates,
+            'recent': self._recent,
+            'holdout': self._holdout,
+            'neighbors': self.neighbor_index.to_arrays(),
+            'drift_reference': self.drift_reference,
+        }
+        # Outro processo nunca lê um artefato pela metade
+        with atomic_path(path) as tmp_path:
+            joblib.dump(artifact, tmp_path)
+        self._artifact_path = path
+        self._save_serving(path, fingerprint)
+        return path
+
+    def _save_serving(self, path, fingerprint):
+        """Publica os arrays e metadados de inferência como uma nova geração do pacote .serving"""
+        forest = self.flat_forest
+        compact = self.compact_forest
+        meta = {
+            'version': ARTIFACT_VERSION,
+            'fingerprint': fingerprint,
+            'feature_names': self.feature_names,
+            'categories': self.categories,
+            'target_names': list(self.target_names),
+            'accuracy': self.accuracy,
+            'updates': self.updates,
+            'max_depth': forest.max_depth,
+            'n_classes': forest.n_classes,
+            'compact_leaf_dtype': compact.leaf_dtype,
+            'drift_reference': self.drift_reference,
+        }
+        serving_dir = self.serving_path(path)
+        generation = f'gen-{time.time_ns()}-{os.getpid()}'
+        tmp_dir = os.path.join(serving_dir, f'.{generation}.tmp')
+        os.makedirs(tmp_dir)
+        for prefix, arrays in (('', forest.to_arrays()), ('compact_', compact.to_arrays()),
+                               ('explain_', forest.explain_arrays()),
+                               ('compact_explain_', compact.explain_arrays())):
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp_dir, f'{prefix}{name}.npy'), array)
+        for name, array in self.neighbor_index.to_arrays().items():
+            np.save(os.path.join(tmp_dir, f'neighbors_{name}.npy'), array)
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.rename(tmp_dir, os.path.join(serving_dir, generation))
+
+        pointer = os.path.join(serving_dir, 'CURRENT')
+        with atomic_path(pointer) as tmp_path, open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(generation)
+        self.serving_generation = generation
+
+        previous = sorted(name for name in os.listdir(serving_dir) if name.startswith('gen-') and name != generation)
+        for name in previous[:max(len(previous) - SERVING_GENERATIONS_KEPT, 0)]:
+            # No Linux os arquivos continuam válidos para quem ainda os mapeia;
+            # no Windows a remoção falha enquanto estiverem abertos e fica para depois
+            shutil.rmtree(os.path.join(serving_dir, name), ignore_errors=True)
+        return os.path.join(serving_dir, generation)
+
+    def _load_serving(self, path, fingerprint):
+        """Carga só de inferência: mapeia a geração atual do pacote, sem sklearn/joblib"""
+        serving_dir = self.serving_path(path)
+        # Cada engine mapeia só a versão da floresta que usa
+        prefix = 'compact_' if self.engine == 'compact' else ''
+        try:
+            generation = _read_generation(serving_dir)
+            generation_dir = os.path.join(serving_dir, generation)
+            with open(os.path.join(generation_dir, 'meta.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+            arrays = {
+                name: np.load(os.path.join(generation_dir, f'{prefix}{name}.npy'), mmap_mode='r', allow_pickle=False)
+                for name in FlatForest.ARRAYS
+            }
+            arrays.update({
+                name: np.load(os.path.join(generation_dir, f'{prefix}explain_{name}.npy'), mmap_mode='r',
+                              allow_pickle=False)
+                for name in FlatForest.EXPLAIN_ARRAYS
+            })
+            neighbors = {
+                name: np.load(os.path.join(generation_dir, f'neighbors_{name}.npy'), mmap_mode='r', allow_pickle=False)
+                for name in NeighborIndex.ARRAYS
+            }
+        except (OSError, ValueError):
+            return False
+        if meta.get('version') != ARTIFACT_VERSION or meta.get('fingerprint') != fingerprint:
+            return False
+
+        self._model = None
+        self._pending_artifact = path
+        self.encoders = {}
+        self.categories = meta['categories']
+        self.target_names = np.asarray(meta['target_names'], dtype=object)
+        self.accuracy = meta['accuracy']
+        self.updates = meta['updates']
+        self._recent = None
+        self._holdout = None
+        self.neighbor_index = NeighborIndex.from_arrays(**neighbors)
+        self._set_drift_reference(meta['drift_reference'])
+        self._refresh_runtime(meta['feature_names'])
+        forest_cls = CompactForest if prefix else FlatForest
+        forest = forest_cls.from_arrays(meta['max_depth'], meta['n_classes'], **arrays)
+        if prefix:
+            self._compact_forest = forest
+        else:
+            self._flat_forest = forest
+        self.serving_generation = generation
+        return True
+
+    def _ensure_full(self):
+        """Completa uma carga só de inferência com o artefato joblib (modelo, encoders, janelas do update)"""
+        path, self._pending_artifact = self._pending_artifact, None
+        if path is None:
+            return
+        import joblib
+
+        artifact = joblib.load(path)
+        updates = self.updates
+        self._model = artifact['model']
+        self.encoders = artifact['encoders']
+        self.categories = artifact['categories']
+        self.target_names = artifact['target_names']
+        self.accuracy = artifact['accuracy']
+        self.updates = artifact['updates']
+        self._recent = artifact['recent']
+        self._holdout = artifact['holdout']
+        self.neighbor_index = NeighborIndex.from_arrays(**artifact['neighbors'])
+        if self.updates != updates:
+            # O artefato foi regravado (update() em outro processo) depois do pacote lido
+            self._refresh_runtime()
+
+    def load(self, path=None, fingerprint=None):
+        """Carrega o artefato se ele corresponder ao CSV e aos hiperparâmetros atuais"""
+        fingerprint = fingerprint or self.fingerprint()
+        path = path or self.artifact_path(fingerprint)
+        if not os.path.exists(path):
+            return False
+        # Para os engines 'flat' e 'compact' basta o pacote de inferência; o artefato
+        # completo (e o sklearn) só é carregado se update()/save()/self.model forem usados
+        if self.engine != 'sklearn' and self._load_serving(path, fingerprint):
+            self._artifact_path = path
+            self.model_fingerprint = fingerprint
+            return True
+        import joblib
+
+        try:
+            artifact = joblib.load(path)
+        except Exception:
+            # Artefato corrompido ou de outra versão do sklearn: retreina
+            return False
+        if artifact.get('version') != ARTIFACT_VERSION or artifact.get('fingerprint') != fingerprint:
+            return False
+
+        self.model = artifact['model']
+        self.encoders = artifact['encoders']
+        self.categories = artifact['categories']
+        self.target_names = artifact['target_names']
+        self.accuracy = artifact['accuracy']
+        self.updates = artifact['updates']
+        self._recent = artifact['recent']
+        self._holdout = artifact['holdout']
+        self.neighbor_index = NeighborIndex.from_arrays(**artifact['neighbors'])
+        self._set_drift_reference(artifact['drift_reference'])
+        self._pending_artifact = None
+        self._artifact_path = path
+        self.model_fingerprint = fingerprint
+        self._refresh_runtime()
+        if self.engine != 'sklearn':
+            try:
+                # Artefato gravado antes do pacote de inferência existir
+                self._save_serving(path, fingerprint)
+            except OSError:
+                pass
+        return True
+
+    def evaluation_path(self, n_splits, n_repeats, fingerprint=None):
+        fingerprint = fingerprint or self.fingerprint()
+        return os.path.join(self.model_dir, f'evaluation_{fingerprint[:16]}_{n_splits}x{n_repeats}.json')
+
+    def load_evaluation(self, n_splits=5, n_repeats=2):
+        """Resultado de evaluate() gravado em model_dir para os dados e parâmetros atuais, ou None"""
+        fingerprint = self.fingerprint()
+        try:
+            with open(self.evaluation_path(n_splits, n_repeats, fingerprint), encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cached.get('fingerprint') != fingerprint:
+            return None
+        self.evaluation = cached
+        return cached
+
+    def evaluate_in_subprocess(self, n_splits=5, n_repeats=2):
+        """Como evaluate(), mas num interpretador novo; o resultado volta pelo cache em model_dir"""
+        cached = self.load_evaluation(n_splits, n_repeats)
+        if cached is not None:
+            return cached
+        # Num processo com threads (servidor do Streamlit) o fork do pool de evaluate()
+        # herdaria locks presos por outras threads; o subprocesso usa fork+exec e só ele cria o pool
+        command = [sys.executable, os.path.abspath(__file__), '--data', os.path.abspath(self.data_path),
+                   '--model-dir', os.path.abspath(self.model_dir), '--params', json.dumps(self.params),
+                   '--n-splits', str(n_splits), '--n-repeats', str(n_repeats)]
+        done = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        evaluation = self.load_evaluation(n_splits, n_repeats)
+        if evaluation is None:
+            raise RuntimeError(f"validação cruzada falhou (código {done.returncode}): {done.stderr[-2000:]}")
+        return evaluation
+
+    def evaluate(self, n_splits=5, n_repeats=2, n_jobs=None, use_cache=True):
+        """Validação cruzada estratificada repetida, em paralelo e com cache em model_dir"""
+        fingerprint = self.fingerprint()
+        path = self.evaluation_path(n_splits, n_repeats, fingerprint)
+        if use_cache:
+            cached = self.load_evaluation(n_splits, n_repeats)
+            if cached is not None:
+                return cached
+
+        from scipy import stats
+        from sklearn.model_selection import RepeatedStratifiedKFold
+
+        X, y, encoders = self._load_training_data()
+        class_names = [str(c) for c in encoders['Obesity'].classes_]
+        cv = RepeatedStratifiedKFold(n_splits=n_splits, n_repeats=n_repeats, random_state=42)
+        splits = list(cv.split(X, y))
+
+        n_jobs = n_jobs or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(splits)), initializer=_init_cv_worker,
+                                 initargs=(X, y, self.params, len(class_names))) as pool:
+            results = list(pool.map(_evaluate_fold, *zip(*splits)))
+
+        accuracies = np.array([acc for acc, _ in results])
+        matrix = sum(cm for _, cm in results)
+        mean = accuracies.mean()
+        # IC da média pelos folds (t de Student); folds repetidos não são
+        # independentes, então o intervalo é uma aproximação
+        half_width = stats.t.ppf(0.975, len(accuracies) - 1) * accuracies.std(ddof=1) / np.sqrt(len(accuracies))
+
+        predicted = matrix.sum(axis=0)
+        actual = matrix.sum(axis=1)
+        per_class = {
+            name: {
+                'precision': float(matrix[i, i] / predicted[i]) if predicted[i] else 0.0,
+                'recall': float(matrix[i, i] / actual[i]) if actual[i] else 0.0,
+                'support': int(actual[i] // n_repeats),
+            }
+            for i, name in enumerate(class_names)
+        }
+
+        self.evaluation = {
+            'fingerprint': fingerprint,
+            'n_splits': n_splits,
+            'n_repeats': n_repeats,
+            'accuracy_mean': float(mean),
+            'accuracy_std': float(accuracies.std(ddof=1)),
+            'accuracy_ci95': [float(mean - half_width), float(mean + half_width)],
+            'fold_accuracies': accuracies.tolist(),
+            'per_class': per_class,
+            'labels': class_names,
+            'confusion_matrix': matrix.tolist(),
+        }
+        try:
+            os.makedirs(self.model_dir, exist_ok=True)
+            with atomic_path(path) as tmp_path, open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.evaluation, f, indent=2)
+        except OSError:
+            pass
+        return self.evaluation
+
+    def load_or_train(self):
+        """Usa o artefato em disco quando possível; senão treina e salva"""
+        fingerprint = self.fingerprint()
+        path = self.artifact_path(fingerprint)
+        if self.load(path, fingerprint):
+            return self.accuracy
+
+        self.train()
+        try:
+            self.save(path)
+        except OSError:
+            # Disco somente leitura não deve impedir o uso do modelo treinado
+            pass
+        return self.accuracy
+
+    def update(self, new_rows, n_new_trees=20, max_trees=None, holdout_fraction=0.2, tolerance=0.01,
+               recent_window=None, holdout_window=None):
+        """Atualiza o modelo com novas linhas rotuladas (warm start), sem retreinar tudo"""
+        import pandas as pd
+        from sklearn.metrics import accuracy_score
+
+        self._ensure_full()
+        new_df = self._clean_data(pd.DataFrame(new_rows).reset_index(drop=True))
+        missing = [col for col in self.feature_names + ['Obesity'] if col not in new_df.columns]
+        if missing:
+            raise ValueError(f"Colunas ausentes nas novas linhas: {missing}")
+        unknown_targets = set(new_df['Obesity']) - set(self.target_names)
+        if unknown_targets:
+            raise ValueError(f"Classes novas exigem treino completo: {sorted(unknown_targets)}")
+
+        # Categorias novas recebem os próximos códigos. Os LabelEncoders do treino não
+        # são tocados: transform() usa busca binária e exige classes_ ordenado
+        categories = dict(self.categories)
+        new_categories = {}
+        for col, classes in self.categories.items():
+            known = set(classes)
+            unseen = [str(v) for v in pd.unique(new_df[col]) if v not in known]
+            if unseen:
+                categories[col] = list(classes) + unseen
+                new_categories[col] = unseen
+        for col, classes in [*categories.items(), ('Obesity', list(self.target_names))]:
+            codes = {category: code for code, category in enumerate(classes)}
+            new_df[col] = new_df[col].map(codes).astype(int)
+        new_df = new_df[self.feature_names + ['Obesity']]
+
+        holdout_mask = np.random.RandomState(self.updates).rand(len(new_df)) < holdout_fraction
+        holdout_window = holdout_window or len(self._holdout)
+        recent_window = recent_window or len(self._recent)
+        holdout = pd.concat([self._holdout, new_df[holdout_mask]], ignore_index=True).tail(holdout_window)
+        recent = pd.concat([self._recent, new_df[~holdout_mask]], ignore_index=True).tail(recent_window)
+        if recent['Obesity'].nunique() < len(self.target_names):
+            # Com warm start o sklearn recalcula classes_ a partir do y recebido
+            raise ValueError("A janela recente não contém todas as classes; use train()")
+
+        candidate = copy.deepcopy(self.model)
+        candidate.set_params(warm_start=True, n_estimators=len(candidate.estimators_) + n_new_trees)
+        candidate.fit(recent[self.feature_names], recent['Obesity'])
+        max_trees = max_trees or 2 * self.params['n_estimators']
+        if len(candidate.estimators_) > max_trees:
+            candidate.estimators_ = candidate.estimators_[-max_trees:]
+            candidate.n_estimators = max_trees
+
+        X_holdout, y_holdout = holdout[self.feature_names], holdout['Obesity']
+        accuracy_before = accuracy_score(y_holdout, self.model.predict(X_holdout))
+        accuracy_after = accuracy_score(y_holdout, candidate.predict(X_holdout))
+        accepted = accuracy_after >= accuracy_before - tolerance
+
+        if accepted:
+            self.model = candidate
+            self.categories = categories
+            self.accuracy = accuracy_after
+            self.updates += 1
+            self._recent = recent
+            self._holdout = holdout
+            # Todas as novas linhas (treino e validação) passam a ser vizinhos consultáveis
+            self.neighbor_index.add(new_df[self.feature_names].to_numpy(), new_df['Obesity'].to_numpy())
+            self._refresh_runtime()
+
+        return {
+            'accepted': bool(accepted),
+            'accuracy_before': float(accuracy_before),
+            'accuracy_after': float(accuracy_after),
+            'n_trees': len(self.model.estimators_),
+            'new_rows': int((~holdout_mask).sum()),
+            'holdout_rows': int(holdout_mask.sum()),
+            'new_categories': new_categories,
+        }
+
+    def _encode(self, input_df):
+        """Limpa e codifica o lote; devolve X e a máscara de categorias desconhecidas"""
+        import pandas as pd
+
+        input_df = self._clean_data(input_df.copy())
+        unknown = pd.DataFrame(False, index=input_df.index, columns=list(self._code_maps))
+
+        for col, mapping in self._code_maps.items():
+            if col not in input_df.columns:
+                unknown[col] = True
+                input_df[col] = 0
+                continue
+            codes = input_df[col].map(mapping)
+            unknown[col] = codes.isna()
+            input_df[col] = codes.fillna(0).astype(int)
+
+        return input_df[self.feature_names], unknown
+
+    def _encode_record(self, user_data):
+        """Equivalente a _encode para um único dict, sem o custo de montar DataFrames; devolve (X, índices desconhecidos)"""
+        row = []
+        unknown = []
+        for i, col in enumerate(self.feature_names):
+            mapping = self._code_maps.get(col)
+            if mapping is not None:
+                # Categoria desconhecida ou ausente vira 0, como em _encode
+                code = mapping.get(user_data.get(col))
+                if code is None:
+                    code = 0
+                    unknown.append(i)
+                row.append(code)
+            elif col in INTEGER_COLS:
+                # round() do Python arredonda metades para o par, como o pandas
+                row.append(int(round(user_data[col])))
+            else:
+                row.append(user_data[col])
+        return np.asarray([row], dtype=np.float64), unknown
+
+    def _encode_rows(self, rows):
+        """Codifica um lote (DataFrame ou lista de dicts); devolve (X, colunas desconhecidas por linha)"""
+        if len(rows) == 0:
+            return np.empty((0, len(self.feature_names))), []
+        if isinstance(rows, (list, tuple)):
+            # Listas de dicts (ex.: micro-lotes do inference_server) são codificadas
+            # registro a registro, sem montar DataFrame nem importar pandas
+            encoded = [self._encode_record(row) for row in rows]
+            X = np.concatenate([x for x, _ in encoded])
+            unknown_per_row = [[self.feature_names[i] for i in unknown] for _, unknown in encoded]
+        else:
+            import pandas as pd
+
+            input_df = pd.DataFrame(rows).reset_index(drop=True)
+            X, unknown = self._encode(input_df)
+            unknown_cols = np.asarray(unknown.columns)
+            unknown_per_row = [list(unknown_cols[mask]) for mask in unknown.to_numpy()]
+        return X, unknown_per_row
+
+    def _label_batch(self, probas):
+        pred_idx = probas.argmax(axis=1)
+        labels = np.asarray(self.target_names)[pred_idx]
+        return labels, probas[np.arange(len(probas)), pred_idx]
+
+    def predict_batch(self, rows):
+        """Prediz um lote (DataFrame ou lista de dicts): (labels, confidences, probas, unknown)"""
+        X, unknown_per_row = self._encode_rows(rows)
+        probas = self._predict_proba(X)
+        self._observe(X, probas, unknown_per_row)
+        labels, confidences = self._label_batch(probas)
+        return labels, confidences, probas, unknown_per_row
+
+    def explain_batch(self, rows):
+        """Contribuição de cada feature para as probabilidades de um lote: (bias, contributions)"""
+        X, _ = self._encode_rows(rows)
+        forest = self.compact_forest if self.engine == 'compact' else self.flat_forest
+        return forest.contributions(np.asarray(X, dtype=np.float32))
+
+    def explain(self, user_data):
+        """Features ordenadas pelo peso na probabilidade da classe prevista: lista de (feature, contribuição)"""
+        bias, contributions = self.explain_batch([user_data])
+        pred_idx = (bias + contributions[0].sum(axis=0)).argmax()
+        ranked = sorted(zip(self.feature_names, contributions[0][:, pred_idx]), key=lambda item: -abs(item[1]))
+        return [(feature, float(value)) for feature, value in ranked]
+
+    def predict_batch_early_exit(self, rows, block_size=10, confidence=None):
+        """Como predict_batch, parando cada linha quando o voto está decidido; acrescenta trees_used"""
+        X, unknown_per_row = self._encode_rows(rows)
+        forest = self.compact_forest if self.engine == 'compact' else self.flat_forest
+        probas, trees_used = forest.predict_proba_early_exit(
+            np.asarray(X, dtype=np.float32), block_size=block_size, confidence=confidence)
+        self._observe(X, probas, unknown_per_row)
+        labels, confidences = self._label_batch(probas)
+        return labels, confidences, probas, unknown_per_row, trees_used
+
+    def nearest_neighbors(self, rows, k=5):
+        """Vizinhos de um lote na coorte de treino: (distances, indices, labels)"""
+        X, _ = self._encode_rows(rows)
+        distances, indices = self.neighbor_index.query(np.asarray(X, dtype=np.float64), k)
+        labels = np.asarray(self.target_names)[self.neighbor_index.labels[indices]]
+        return distances, indices, labels
+
+    def similar_patients(self, user_data, k=5):
+        """Os k pacientes mais parecidos da coorte de treino, como dicts com os valores originais"""
+        distances, indices, labels = self.nearest_neighbors([user_data], k)
+        numeric, codes = self.neighbor_index.decode(indices[0])
+        categorical = self.neighbor_index.categorical
+        numeric_cols = [col for col, is_cat in zip(self.feature_names, categorical) if not is_cat]
+        categorical_cols = [col for col, is_cat in zip(self.feature_names, categorical) if is_cat]
+        categories = {col: list(mapping) for col, mapping in self._code_maps.items()}
+        patients = []
+        for distance, row, label, values, row_codes in zip(distances[0], indices[0], labels[0], numeric, codes):
+            patient = {'row': int(row), 'distance': float(distance), 'Obesity': label}
+            # Desfaz a escala (float32): ordinais voltam a inteiros, medidas com 3 casas
+            patient.update({col: int(round(value)) if col in INTEGER_COLS else round(float(value), 3)
+                            for col, value in zip(numeric_cols, values)})
+            patient.update({col: categories[col][code] for col, code in zip(categorical_cols, row_codes)})
+            patients.append(patient)
+        return patients
+
+    def what_if(self, user_data, fields=None, pair_fields=None, weight_steps=WHAT_IF_WEIGHT_STEPS):
+        """Simula mudanças de hábitos de um paciente numa única passada pela floresta"""
+        fields = list(WHAT_IF_VALUES) + ['Weight'] if fields is None else list(fields)
+        pair_fields = fields if pair_fields is None else list(pair_fields)
+        base = self._encode_record(user_data)[0][0]
+        index = {col: i for i, col in enumerate(self.feature_names)}
+
+        # Campo -> [(valor original, valor codificado)] das alternativas ao perfil atual
+        options = {}
+        for field in dict.fromkeys(fields + pair_fields):
+            if field == 'Weight':
+                candidates = [(round(float(user_data['Weight']) + step, 1), None) for step in weight_steps]
+                candidates = [(value, value) for value, _ in candidates if value > 0]
+            else:
+                mapping = self._code_maps.get(field)
+                candidates = [(value, value if mapping is None else mapping.get(value))
+                              for value in WHAT_IF_VALUES[field]]
+            options[field] = [(value, code) for value, code in candidates
+                              if code is not None and code != base[index[field]]]
+
+        variants = [((field, value, code),) for field in fields for value, code in options[field]]
+        for first, second in itertools.combinations(pair_fields, 2):
+            variants.extend(itertools.product(
+                [(first, value, code) for value, code in options[first]],
+                [(second, value, code) for value, code in options[second]],
+            ))
+
+        # Linha 0 é o perfil informado: uma única chamada pontua tudo
+        X = np.repeat(base[None, :], len(variants) + 1, axis=0)
+        for row, variant in enumerate(variants, start=1):
+            for field, _, code in variant:
+                X[row, index[field]] = code
+        probas = self._predict_proba(X)
+        return {
+            'classes': list(self.target_names),
+            'base': probas[0],
+            'changes': [{field: value for field, value, _ in variant} for variant in variants],
+            'probas': probas[1:],
+            'labels': np.asarray(self.target_names)[probas[1:].argmax(axis=1)],
+        }
+
+    def _observe_record(self, X, pred_idx, unknown):
+        if self.monitor is not None:
+            # unknown vem de _encode_record, e não do cache: categoria desconhecida e
+            # código 0 têm a mesma chave
+            self.monitor.observe_row(X[0], pred_idx, unknown)
+
     def predict(self, user_data):
         """Recebe dados do usuário e retorna predição + probabilidades"""
-        input_df = pd.DataFrame([user_data])
-        input_df = self._clean_data(input_df)
-        
-        for col, le in self.encoders.items():
-            if col != 'Obesity':
-                try:
-                    # Tenta transformar usando o encoder aprendido
-                    input_df[col] = le.transform(input_df[col])
-                except:
-                    # Fallback para evitar erro em produção
-                    input_df[col] = 0 
-
-        pred_idx = self.model.predict(input_df)[0]
+        # Categorias desconhecidas viram 0 (fallback para evitar erro em produção)
+        X, unknown = self._encode_record(user_data)
+
+        # A floresta compara as features em float32, então perfis com o mesmo
+        # vetor float32 após limpeza/codificação têm exatamente a mesma predição
+        key = X.astype(np.float32).tobytes()
+        if self.cache_size > 0:
+            with self._cache_lock:
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    self._cache_hits += 1
+                else:
+                    self._cache_misses += 1
+            if cached is not None:
+                pred_label, confidence, all_probs, pred_idx = cached
+                self._observe_record(X, pred_idx, unknown)
+                return pred_label, confidence, dict(all_probs)
+
+        # argmax de predict_proba equivale a model.predict, sem percorrer a floresta duas vezes
+        proba = self._predict_proba(X)[0]
+        # int nativo: guardado no cache e copiado para o buffer do monitor a cada chamada
+        pred_idx = int(proba.argmax())
         pred_label = self.target_names[pred_idx]
-        
-        proba = self.model.predict_proba(input_df)[0]
         confidence = proba[pred_idx]
         
         all_probs = dict(zip(self.target_names, proba))
+        self._observe_record(X, pred_idx, unknown)
+
+        if self.cache_size > 0:
+            with self._cache_lock:
+                self._cache[key] = (pred_label, confidence, all_probs, pred_idx)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
         
-        return pred_label, confidence, all_probs
\ No newline at end of file
+        return pred_label, confidence, dict(all_probs)
+
+class ModelWarmup:
+    """Carrega (ou treina) um ObesityPredictor numa thread em segundo plano"""
+
+    def __init__(self, factory, evaluate=False, monitor_source=None):
+        self._factory = factory
+        self._evaluate = evaluate
+        self._monitor_source = monitor_source
+        self._swap_lock = threading.Lock()
+        self._last_check = 0.0
+        self._done = threading.Event()
+        self._thread = None
+        self.predictor = None
+        self.error = None
+        self.started_at = None
+        self.load_seconds = None
+
+    def start(self):
+        if self._thread is None:
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name='model-warmup', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            predictor = self._factory()
+            predictor.load_or_train()
+            if self._monitor_source is not None:
+                predictor.start_monitoring(self._monitor_source)
+            self.predictor = predictor
+        except Exception as exc:
+            self.error = exc
+        finally:
+            self.load_seconds = time.perf_counter() - start
+            self._done.set()
+
+        if self._evaluate and self.predictor is not None:
+            try:
+                self.predictor.evaluate_in_subprocess()
+            except Exception:
+                # Sem validação cruzada o app segue exibindo a acurácia do holdout
+                pass
+
+    def refresh(self, min_interval=2.0):
+        """Devolve o predictor atual, antes trocando-o se uma nova geração foi publicada"""
+        predictor = self.predictor
+        if predictor is None or predictor.serving_generation is None:
+            return predictor
+        now = time.monotonic()
+        if now - self._last_check < min_interval:
+            return predictor
+        self._last_check = now
+
+        generation = predictor.published_generation()
+        if generation is None or generation == predictor.serving_generation:
+            return predictor
+        with self._swap_lock:
+            if self.predictor is not predictor:
+                # Outra thread já trocou
+                return self.predictor
+            candidate = self._factory()
+            if not candidate.load() or candidate.serving_generation is None:
+                return predictor
+            # Mesmo CSV e hiperparâmetros: a validação cruzada continua valendo
+            candidate.evaluation = predictor.evaluation
+            if predictor.monitor is not None and candidate.drift_reference == predictor.drift_reference:
+                candidate.monitor = predictor.monitor
+            self.predictor = candidate
+        return candidate
+
+    @property
+    def ready(self):
+        return self.predictor is not None
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+    def wait(self, timeout=None):
+        """Bloqueia até o fim do carregamento (ou timeout); devolve o predictor ou None"""
+        self._done.wait(timeout)
+        return self.predictor
+
+    def status(self):
+        """Resumo para health checks: estado, tempo de carga e erro, se houver"""
+        if self.ready:
+            state = 'ready'
+        elif self.failed:
+            state = 'failed'
+        else:
+            state = 'loading'
+        return {
+            'state': state,
+            'ready': self.ready,
+            'load_seconds': round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            'elapsed_seconds': round(time.time() - self.started_at, 3) if self.started_at else None,
+            'accuracy': float(self.predictor.accuracy) if self.ready else None,
+            'error': repr(self.error) if self.failed else None,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Validação cruzada do modelo, gravada no cache de model_dir.')
+    parser.add_argument('--data', default='Obesity.csv')
+    parser.add_argument('--model-dir', default='artefatos')
+    parser.add_argument('--params', default='{}', help='hiperparâmetros da floresta, em JSON')
+    parser.add_argument('--n-splits', type=int, default=5)
+    parser.add_argument('--n-repeats', type=int, default=2)
+    parser.add_argument('--n-jobs', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    predictor = ObesityPredictor(args.data, model_dir=args.model_dir, **json.loads(args.params))
+    evaluation = predictor.evaluate(args.n_splits, args.n_repeats, args.n_jobs)
+    low, high = evaluation['accuracy_ci95']
+    print(f"acurácia {evaluation['accuracy_mean']:.4f} (IC 95%: {low:.4f}-{high:.4f})", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,11 @@
+import os
+
 import streamlit as st
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
 
-st.set_page_config(page_title="Análise Exploratória", layout="wide")
-sns.set_theme(style="whitegrid")
+from agregados_eda import ORDEM_NIVEIS, ArmazemAgregados, caminho_armazem, calcular_agregados, preparar_dados
+from dataset_cache import atomic_path, file_sha256, load_dataset
 
-# Paletas conforme notebook
-binary_colors = ['#2a08c2', '#d606d0']
+st.set_page_config(page_title="Análise Exploratória", layout="wide")
 
 # Oculta sidebar e navegação de páginas nesta tela; ajusta padding/topo e largura máxima
 st.markdown(
@@ -28,98 +26,101 @@ st.markdown(
 )
 
 
-@st.cache_data
-def carregar_dados():
-    doc = "Obesity.csv"
-    df = pd.read_csv(doc)
-
-    novas_colunas = {
-        'Gender': 'Genero',
-        'Age': 'Idade',
-        'Height': 'Altura',
-        'Weight': 'Peso',
-        'family_history': 'Historico_Familiar',
-        'FAVC': 'Consumo_Alta_Caloria',
-        'FCVC': 'Freq_Vegetais',
-        'NCP': 'Num_Refeicoes',
-        'CAEC': 'Comer_Entre_Refeicoes',
-        'SMOKE': 'Fumante',
-        'CH2O': 'Consumo_Agua',
-        'SCC': 'Monitora_Calorias',
-        'FAF': 'Freq_Ativ_Fisica',
-        'TUE': 'Tempo_Dispositivos',
-        'CALC': 'Consumo_Alcool',
-        'MTRANS': 'Transporte',
-        'Obesity': 'Nivel_Obesidade'
-    }
-    df = df.rename(columns=novas_colunas)
-
-    traducao_obesidade = {
-        'Insufficient_Weight': 'Abaixo do Peso',
-        'Normal_Weight': 'Peso Normal',
-        'Overweight_Level_I': 'Sobrepeso Grau I',
-        'Overweight_Level_II': 'Sobrepeso Grau II',
-        'Obesity_Type_I': 'Obesidade Grau I',
-        'Obesity_Type_II': 'Obesidade Grau II',
-        'Obesity_Type_III': 'Obesidade Grau III'
-    }
-    traducao_genero = {'Male': 'Masculino', 'Female': 'Feminino'}
-    df['Nivel_Obesidade'] = df['Nivel_Obesidade'].replace(traducao_obesidade)
-    df['Genero'] = df['Genero'].replace(traducao_genero)
-
-    ordem_obesidade = [
-        'Abaixo do Peso', 'Peso Normal',
-        'Sobrepeso Grau I', 'Sobrepeso Grau II',
-        'Obesidade Grau I', 'Obesidade Grau II', 'Obesidade Grau III'
-    ]
-    df['Nivel_Obesidade'] = pd.Categorical(df['Nivel_Obesidade'], categories=ordem_obesidade, ordered=True)
-
-    # Demais traduções (mesmo fluxo do notebook)
-    df['Historico_Familiar'] = df['Historico_Familiar'].replace({'yes': 'Sim', 'no': 'Não'})
-    df['Consumo_Alta_Caloria'] = df['Consumo_Alta_Caloria'].replace({'yes': 'Sim', 'no': 'Não'})
-    df['Comer_Entre_Refeicoes'] = df['Comer_Entre_Refeicoes'].replace(
-        {'no': 'Não', 'Sometimes': 'Às Vezes', 'Frequently': 'Frequentemente', 'Always': 'Sempre'}
-    )
-    df['Fumante'] = df['Fumante'].replace({'yes': 'Sim', 'no': 'Não'})
-    df['Monitora_Calorias'] = df['Monitora_Calorias'].replace({'yes': 'Sim', 'no': 'Não'})
-    df['Consumo_Alcool'] = df['Consumo_Alcool'].replace({
-        'no': 'Não bebe',
-        'Sometimes': 'Às Vezes',
-        'Frequently': 'Frequentemente',
-        'Always': 'Sempre'
-    })
-    df['Transporte'] = df['Transporte'].replace({
-        'Public_Transportation': 'Transporte Público',
-        'Walking': 'Caminhada',
-        'Automobile': 'Carro',
-        'Motorbike': 'Moto',
-        'Bike': 'Bicicleta'
-    })
-
-    # Colunas derivadas usadas nos plots
-    df['Freq_Vegetais_Label'] = df['Freq_Vegetais'].map({1: 'Raramente', 2: 'Às Vezes', 3: 'Sempre'})
-    df['Consumo_Agua_Label'] = df['Consumo_Agua'].round().astype(int).map({1: 'Menos de 1L', 2: 'Entre 1L e 2L', 3: 'Mais de 2L'})
-    df['Freq_Ativ_Fisica_Label'] = df['Freq_Ativ_Fisica'].round().astype(int).map({
-        0: 'Nenhuma',
-        1: '1 a 2 dias/sem',
-        2: '3 a 4 dias/sem',
-        3: 'Mais de 4 dias/sem'
-    })
-    df['Tempo_Dispositivos_Label'] = df['Tempo_Dispositivos'].round().astype(int).map({
-        0: '0-2 horas',
-        1: '3-5 horas',
-        2: 'Mais de 5 horas'
-    })
-
-    return df, ordem_obesidade
-
-
-df, ordem_obesidade = carregar_dados()
+DOC = "Obesity.csv"
+# PNGs renderizados, identificados pelo hash do CSV; incrementar VERSAO_FIGURAS
+# ao mudar graficos_eda.py para não servir PNGs antigos do disco
+PASTA_FIGURAS = os.path.join("artefatos", "figuras")
+VERSAO_FIGURAS = 1
+
+
+@st.cache_data(max_entries=4)
+def _hash_arquivo(caminho, mtime, tamanho):
+    return file_sha256(caminho)
+
+
+def impressao_digital(caminho=DOC):
+    """Hash do CSV, recalculado só quando data de modificação ou tamanho mudam"""
+    info = os.stat(caminho)
+    return _hash_arquivo(caminho, info.st_mtime_ns, info.st_size)
+
+
+@st.cache_data(max_entries=2)
+def carregar_dados(fingerprint=None):
+    # fingerprint só entra na chave do cache: um CSV novo invalida os dados em memória
+    return preparar_dados(load_dataset(DOC, sha256=fingerprint)), ORDEM_NIVEIS
+
+
+@st.cache_data(max_entries=2)
+def carregar_agregados(fingerprint):
+    """Tabelas pequenas (contagens e quantis por nível) de onde saem todos os gráficos"""
+    df, ordem_obesidade = carregar_dados(fingerprint)
+    return calcular_agregados(df, ordem_obesidade)
+
+
+@st.cache_data(max_entries=2)
+def carregar_estatisticas(fingerprint, versao_armazem):
+    """Contagens e quantis do armazém incremental (versao_armazem só invalida o cache)"""
+    return ArmazemAgregados.abrir(caminho_armazem(), fingerprint, lambda: load_dataset(DOC, sha256=fingerprint))
+
+
+def estatisticas_atuais(fingerprint):
+    """Lê o armazém de novo apenas quando o arquivo muda (novo lote somado)"""
+    try:
+        versao = os.stat(caminho_armazem()).st_mtime_ns
+    except FileNotFoundError:
+        versao = None
+    return carregar_estatisticas(fingerprint, versao)
+
+
+fingerprint = impressao_digital()
+estatisticas = estatisticas_atuais(fingerprint)
+
+
+def formatar_pct(valor, casas=0):
+    if casas == 0 and 0 < valor < 1:
+        return '<1%'
+    return f'{valor:.{casas}f}%'
+
+
+def pct(atributo, nivel, categoria, casas=0):
+    """Percentual do texto da análise, lido do armazém em vez de fixo no código"""
+    return formatar_pct(estatisticas.percentual(atributo, nivel, categoria), casas)
+
+
+def faixa(valores, sufixo='%', separador=' a '):
+    menor, maior = round(min(valores)), round(max(valores))
+    return f'{menor}{sufixo}' if menor == maior else f'{menor}{sufixo}{separador}{maior}{sufixo}'
+
+
+# Trechos do texto que combinam mais de uma estatística
+faixa_medianas_idade = faixa(
+    [estatisticas.quantil('Idade', 0.5, nivel) for nivel in ('Obesidade Grau II', 'Obesidade Grau III')],
+    sufixo='', separador='-',
+)
+monitora_saudaveis_valores = [
+    estatisticas.percentual('Monitora_Calorias', nivel, 'Sim') for nivel in ('Peso Normal', 'Sobrepeso Grau I')
+]
+faixa_monitora_saudaveis = faixa(monitora_saudaveis_valores)
+monitora_obesidade_i_ii = formatar_pct(
+    max(estatisticas.percentual('Monitora_Calorias', nivel, 'Sim') for nivel in ('Obesidade Grau I', 'Obesidade Grau II'))
+)
+fumantes_extremos = [estatisticas.contagem('Fumante', nivel, 'Sim') for nivel in ('Abaixo do Peso', 'Obesidade Grau III')]
+if fumantes_extremos[0] == fumantes_extremos[1]:
+    casos_fumantes_extremos = f"{fumantes_extremos[0]} caso{'s' if fumantes_extremos[0] != 1 else ''} cada"
+else:
+    casos_fumantes_extremos = f"{fumantes_extremos[0]} e {fumantes_extremos[1]} casos, respectivamente"
+historico_obesidade_severa = formatar_pct(
+    min(estatisticas.percentual('Historico_Familiar', nivel, 'Sim') for nivel in ('Obesidade Grau II', 'Obesidade Grau III'))
+)
 
 top_cols = st.columns([4,1])
 with top_cols[0]:
     st.title("📈 Análise exploratória de dados")
     st.markdown("Os plots e textos abaixo replicam a análise original do notebook, mantendo descrições e visualizações.")
+    if estatisticas.linhas_adicionadas:
+        st.caption(
+            f"Os percentuais do texto incluem {estatisticas.linhas_adicionadas} registros adicionados depois da versão do CSV usada nos gráficos."
+        )
 with top_cols[1]:
     if st.button("⬅️ Voltar ao sistema de diagnóstico"):
         try:
@@ -128,234 +129,155 @@ with top_cols[1]:
             st.stop()
 
 
-def render_sec(titulo_md, texto_md, fig):
+# Limite de memória: dez figuras para até duas versões do CSV
+@st.cache_data(max_entries=2 * 10, show_spinner=False)
+def figura_png(nome, fingerprint):
+    """Bytes do PNG da figura, renderizada uma única vez por versão do CSV e guardada em disco"""
+    caminho = os.path.join(PASTA_FIGURAS, f"{fingerprint[:16]}_v{VERSAO_FIGURAS}_{nome}.png")
+    try:
+        with open(caminho, "rb") as f:
+            return f.read()
+    except OSError:
+        pass
+
+    import graficos_eda
+
+    png = graficos_eda.renderizar_png(nome, carregar_agregados(fingerprint))
+    try:
+        os.makedirs(PASTA_FIGURAS, exist_ok=True)
+        with atomic_path(caminho) as tmp, open(tmp, "wb") as f:
+            f.write(png)
+    except OSError:
+        # Sem disco gravável a figura continua servida pelo cache em memória
+        pass
+    return png
+
+
+def render_sec(titulo_md, texto_md, nome_figura):
     st.markdown(titulo_md)
     st.markdown(texto_md)
-    st.pyplot(fig)
+    st.image(figura_png(nome_figura, fingerprint))
 
 
 # 1) Gênero x Obesidade
-fig, ax = plt.subplots(figsize=(10, 6))
-sns.countplot(data=df, y='Nivel_Obesidade', hue='Genero', palette=binary_colors, order=ordem_obesidade, ax=ax)
-ax.set_title('Distribuição dos Níveis de Obesidade por Gênero')
-ax.set_xlabel('Quantidade')
-ax.set_ylabel('Nível de Obesidade')
-ax.legend(title='Gênero')
-fig.tight_layout()
 render_sec(
     "### 📌 Análise: Gênero x Obesidade",
     "Há uma distinção clara nas categorias severas: a Obesidade Grau II é predominantemente masculina, "
     "enquanto a Obesidade Grau III é massivamente feminina. \nNas demais categorias, há um equilíbrio maior. "
     "Isso torna o gênero uma variável preditora essencial, pois inverte a probabilidade de risco entre os graus mais altos da doença.",
-    fig
+    "genero"
 )
 
+
 # 2) Histórico Familiar
-fig, ax = plt.subplots(figsize=(12, 6))
-sns.countplot(data=df, y='Nivel_Obesidade', hue='Historico_Familiar', order=ordem_obesidade, palette=binary_colors, ax=ax)
-ax.set_title('Influência do Histórico Familiar na Obesidade')
-ax.set_xlabel('Quantidade de Pacientes')
-ax.set_ylabel('Nível de Obesidade')
-ax.legend(title='Histórico Familiar de Obesidade')
-fig.tight_layout()
 render_sec(
     "### 📌 Análise: Histórico Familiar",
     "Os dados revelam uma correlação alarmante: a quase totalidade dos pacientes com Obesidade Grau II e III possui histórico familiar de excesso de peso. "
     "Isso sugere que o ambiente familiar e a genética são fatores determinantes para o agravamento do quadro. "
     "Para a estratégia de negócio, isso indica que intervenções focadas na família (e não apenas no indivíduo isolado) são essenciais para prevenir casos severos.",
-    fig
+    "historico_familiar"
 )
 
+
 # 3) Idade x Obesidade
-fig, ax = plt.subplots(figsize=(14, 7))
-sns.boxplot(data=df, y='Idade', x='Nivel_Obesidade', order=ordem_obesidade, ax=ax)
-ax.set_title('Distribuição de Idade por Categoria de Peso')
-ax.set_xlabel('Nível de Obesidade')
-ax.set_ylabel('Idade (Anos)')
-ax.tick_params(axis='x', rotation=45)
 render_sec(
     "### 📌 Análise de Idade x Obesidade",
     "Ao analisar a distribuição etária entre as diferentes categorias de peso, observamos os seguintes padrões:\n\n"
     "**Concentração em Jovens Adultos:** A maior parte da base de dados, independentemente da categoria de peso, está concentrada na faixa dos 20 aos 30 anos. "
     "Isso indica que o problema de obesidade severa neste dataset não é exclusivo de pessoas mais velhas.\n\n"
-    "**Obesidade Grau II e III (Jovens):** É notável que as medianas (linha central da caixa) dos grupos Obesidade Grau II e Grau III estão situadas em idades muito jovens (aprox. 23-26 anos). "
+    f"**Obesidade Grau II e III (Jovens):** É notável que as medianas (linha central da caixa) dos grupos Obesidade Grau II e Grau III estão situadas em idades muito jovens (aprox. {faixa_medianas_idade} anos). "
     "Isso refuta a hipótese de que a obesidade severa só se desenvolve com o avanço da idade.\n\n"
     "**Outliers em \"Peso Normal\":** A categoria Peso Normal apresenta diversos outliers na parte superior (acima de 40/50 anos). "
     "Isso sugere que, embora a maioria dos jovens tenha peso normal, existem indivíduos mais velhos saudáveis, mas eles fogem do padrão geral da amostra (que é majoritariamente jovem).\n\n"
     "**Conclusão para o Modelo:** A idade sozinha pode não ser um separador linear forte (ex: \"quanto mais velho, mais obeso\"), pois temos muitos jovens com obesidade grave. "
     "O modelo precisará combinar Idade com outras variáveis (como hábitos) para ser preciso.",
-    fig
+    "idade"
 )
 
+
 # 4) Consumo de Vegetais
-fig, ax = plt.subplots(figsize=(12, 6))
-sns.countplot(
-    data=df,
-    y='Nivel_Obesidade',
-    hue='Freq_Vegetais_Label',
-    order=ordem_obesidade,
-    hue_order=['Raramente', 'Às Vezes', 'Sempre'],
-    palette='Greens',
-    ax=ax
-)
-ax.set_title('Consumo de Vegetais por Nível de Obesidade')
-ax.set_xlabel('Quantidade de Pacientes')
-ax.set_ylabel('Nível de Obesidade')
-ax.legend(title='Consome Vegetais?')
 render_sec(
     "### 📌 Análise: Consumo de Vegetais",
-    "Os dados apresentam um comportamento inesperado: 100% dos pacientes com Obesidade Grau III relataram consumir vegetais \"Sempre\". "
+    f"Os dados apresentam um comportamento inesperado: {pct('Freq_Vegetais_Label', 'Obesidade Grau III', 'Sempre')} dos pacientes com Obesidade Grau III relataram consumir vegetais \"Sempre\". "
     "Isso pode indicar dois cenários: viés de autoavaliação (o paciente relata o que \"deveria\" fazer, não o que faz) ou que o consumo de vegetais ocorre em conjunto com uma ingestão calórica total excessiva. "
     "Já nos graus I e II, o consumo moderado (\"Às Vezes\") é predominante. "
     "Este padrão alerta que apenas recomendar \"coma mais vegetais\" pode não ser suficiente para os casos mais graves sem controle calórico global.",
-    fig
+    "vegetais"
 )
 
+
 # 5) Consumo de Água
-fig, ax = plt.subplots(figsize=(12, 6))
-sns.countplot(
-    data=df,
-    y='Nivel_Obesidade',
-    hue='Consumo_Agua_Label',
-    order=ordem_obesidade,
-    hue_order=['Menos de 1L', 'Entre 1L e 2L', 'Mais de 2L'],
-    palette='Blues',
-    ax=ax
-)
-ax.set_title('Consumo Diário de Água por Nível de Obesidade')
-ax.set_xlabel('Quantidade de Pacientes')
-ax.set_ylabel('Nível de Obesidade')
-ax.legend(title='Consumo Diário')
 render_sec(
     "### 📌 Análise: Consumo de Água",
     "Ao contrário do esperado, não há uma relação linear onde \"beber pouca água causa obesidade\". "
-    "Os dados mostram que o grupo Obesidade Grau III possui uma alta proporção de indivíduos que consomem mais de 2L por dia (aprox. 46%), superior até mesmo a pessoas com Peso Normal. "
+    f"Os dados mostram que o grupo Obesidade Grau III possui uma alta proporção de indivíduos que consomem mais de 2L por dia (aprox. {pct('Consumo_Agua_Label', 'Obesidade Grau III', 'Mais de 2L')}), superior até mesmo a pessoas com Peso Normal. "
     "Isso sugere que a alta ingestão de líquidos neste grupo pode estar associada a bebidas calóricas (não diferenciadas nesta variável específica) ou a uma maior necessidade fisiológica de hidratação devido à massa corporal.",
-    fig
+    "agua"
 )
 
+
 # 6) Consumo de Álcool
-fig, ax = plt.subplots(figsize=(12, 6))
-sns.countplot(
-    data=df,
-    y='Nivel_Obesidade',
-    hue='Consumo_Alcool',
-    order=ordem_obesidade,
-    hue_order=['Não bebe', 'Às Vezes', 'Frequentemente', 'Sempre'],
-    palette='Purples',
-    ax=ax
-)
-ax.set_title('Frequência de Consumo de Álcool por Nível de Obesidade')
-ax.set_xlabel('Quantidade de Pacientes')
-ax.set_ylabel('Nível de Obesidade')
-ax.legend(title='Consumo de Álcool')
 render_sec(
     "### 📌 Análise: Consumo de Álcool",
     "A variável apresenta baixa variabilidade nos extremos: os casos de consumo \"Frequente\" ou \"Sempre\" são estatisticamente irrelevantes em todas as categorias. "
-    "O dado mais impactante é que 99.7% dos pacientes com Obesidade Grau III se classificam como consumidores ocasionais (\"Às Vezes\"), praticamente eliminando o perfil de \"Não bebe\" neste grupo. "
+    f"O dado mais impactante é que {pct('Consumo_Alcool', 'Obesidade Grau III', 'Às Vezes', casas=1)} dos pacientes com Obesidade Grau III se classificam como consumidores ocasionais (\"Às Vezes\"), praticamente eliminando o perfil de \"Não bebe\" neste grupo. "
     "Isso sugere que o consumo social de álcool é onipresente nos graus mais altos de obesidade, diferentemente dos grupos de peso normal, onde há uma parcela significativa de abstêmios.",
-    fig
+    "alcool"
 )
 
+
 # 7) Atividade Física
-fig, ax = plt.subplots(figsize=(12, 6))
-sns.countplot(
-    data=df,
-    y='Nivel_Obesidade',
-    hue='Freq_Ativ_Fisica_Label',
-    order=ordem_obesidade,
-    hue_order=['Nenhuma', '1 a 2 dias/sem', '3 a 4 dias/sem', 'Mais de 4 dias/sem'],
-    palette='Oranges',
-    ax=ax
-)
-ax.set_title('Frequência de Atividade Física Semanal por Nível de Obesidade')
-ax.set_xlabel('Quantidade de Pacientes')
-ax.set_ylabel('Nível de Obesidade')
-ax.legend(title='Frequência Semanal')
 render_sec(
     "### 📌 Análise: Atividade Física",
-    "A relação entre sedentarismo e obesidade severa fica evidente na categoria Obesidade Grau III, onde aprox. 58% dos pacientes não praticam nenhuma atividade física. "
-    "No entanto, é interessante notar que no grupo Obesidade Grau II, a maioria (55%) pratica exercícios levemente (1-2 vezes), superando o sedentarismo total. "
-    "Isso reforça que a falta de exercício é um fator crítico, mas não o único, visto que há pessoas com Peso Normal que também declaram atividade \"Nenhuma\" (aprox. 27%).",
-    fig
+    f"A relação entre sedentarismo e obesidade severa fica evidente na categoria Obesidade Grau III, onde aprox. {pct('Freq_Ativ_Fisica_Label', 'Obesidade Grau III', 'Nenhuma')} dos pacientes não praticam nenhuma atividade física. "
+    f"No entanto, é interessante notar que no grupo Obesidade Grau II, a maioria ({pct('Freq_Ativ_Fisica_Label', 'Obesidade Grau II', '1 a 2 dias/sem')}) pratica exercícios levemente (1-2 vezes), superando o sedentarismo total. "
+    f"Isso reforça que a falta de exercício é um fator crítico, mas não o único, visto que há pessoas com Peso Normal que também declaram atividade \"Nenhuma\" (aprox. {pct('Freq_Ativ_Fisica_Label', 'Peso Normal', 'Nenhuma')}).",
+    "atividade_fisica"
 )
 
+
 # 8) Tabagismo
-fig, ax = plt.subplots(figsize=(12, 6))
-sns.countplot(
-    data=df,
-    y='Nivel_Obesidade',
-    hue='Fumante',
-    order=ordem_obesidade,
-    palette={'Sim': '#596275', 'Não': '#dcdde1'},
-    ax=ax
-)
-ax.set_title('Relação: Tabagismo x Obesidade')
-ax.set_xlabel('Quantidade de Pacientes')
-ax.set_ylabel('Nível de Obesidade')
-ax.legend(title='É Fumante?')
 render_sec(
     "### 📌 Análise: Tabagismo",
     "A base de dados revela que o tabagismo é extremamente raro neste grupo de estudo, com uma quantidade ínfima de fumantes em todas as categorias. "
-    "O destaque, porém, é a quase inexistência de fumantes nos extremos (Abaixo do Peso e Obesidade Grau III, com apenas 1 caso cada).",
-    fig
+    f"O destaque, porém, é a quase inexistência de fumantes nos extremos (Abaixo do Peso e Obesidade Grau III, com apenas {casos_fumantes_extremos}).",
+    "tabagismo"
 )
 
+
 # 9) Monitoramento de Calorias
-ct_calorias = pd.crosstab(df['Nivel_Obesidade'], df['Monitora_Calorias'], normalize='index') * 100
-ct_calorias = ct_calorias.reindex(ordem_obesidade)
-fig, ax = plt.subplots(figsize=(12, 6))
-sns.barplot(x=ct_calorias.index, y=ct_calorias['Sim'], palette='viridis', order=ordem_obesidade, ax=ax)
-ax.set_title('Percentual de Pessoas que Monitoram Calorias por Nível de Obesidade')
-ax.set_xlabel('Nível de Obesidade')
-ax.set_ylabel('% que Monitora Calorias')
-for index, value in enumerate(ct_calorias['Sim']):
-    ax.text(index, value + 0.2, f'{value:.1f}%', ha='center', fontweight='bold')
-ax.tick_params(axis='x', rotation=15)
 render_sec(
     "### 📌 Análise: Monitoramento de Calorias",
-    "Este gráfico revela uma correlação negativa quase perfeita. Enquanto cerca de 10% a 12% das pessoas com Peso Normal ou Sobrepeso Leve monitoram ativamente suas calorias, esse hábito desaparece completamente nos graus mais severos de obesidade (caindo para 0% no Grau III e <1% nos Graus I e II).\n\n"
+    f"Este gráfico revela uma correlação negativa quase perfeita. Enquanto cerca de {faixa_monitora_saudaveis} das pessoas com Peso Normal ou Sobrepeso Leve monitoram ativamente suas calorias, esse hábito desaparece completamente nos graus mais severos de obesidade (caindo para {pct('Monitora_Calorias', 'Obesidade Grau III', 'Sim')} no Grau III e {monitora_obesidade_i_ii} nos Graus I e II).\n\n"
     "Insight de Negócio: Isso sugere que a perda da consciência (ou controle) sobre a ingestão calórica é um marcador crítico da transição para a obesidade. "
     "Ferramentas que reintroduzam esse monitoramento de forma simples podem ser intervenções eficazes, já que o público-alvo atual (Graus II e III) simplesmente não o faz.",
-    fig
+    "calorias"
 )
 
+
 # 10) Tempo de Tela
-fig, ax = plt.subplots(figsize=(12, 6))
-sns.countplot(
-    data=df,
-    y='Nivel_Obesidade',
-    hue='Tempo_Dispositivos_Label',
-    order=ordem_obesidade,
-    hue_order=['0-2 horas', '3-5 horas', 'Mais de 5 horas'],
-    palette='cool_r',
-    ax=ax
-)
-ax.set_title('Tempo Diário em Dispositivos Eletrônicos por Nível de Obesidade')
-ax.set_xlabel('Quantidade de Pacientes')
-ax.set_ylabel('Nível de Obesidade')
-ax.legend(title='Tempo de Tela')
 render_sec(
     "### 📌 Análise: Tempo de Tela",
     "Ao contrário do senso comum, não existe uma correlação direta e linear onde \"mais tempo de tela = mais obesidade\" neste dataset.\n\n"
-    "Obesidade Grau III: Este grupo apresenta um comportamento peculiar: 0% dos indivíduos relatam ficar mais de 5 horas em telas (focando-se massivamente na faixa intermediária de 3-5 horas).\n\n"
-    "Uso Moderado x Baixo: O uso baixo (0-2 horas) é bastante comum em graus elevados de obesidade (ex: Grau II com aprox. 58%), até mais do que em grupos de Peso Normal.\n\n"
+    f"Obesidade Grau III: Este grupo apresenta um comportamento peculiar: {pct('Tempo_Dispositivos_Label', 'Obesidade Grau III', 'Mais de 5 horas')} dos indivíduos relatam ficar mais de 5 horas em telas (focando-se massivamente na faixa intermediária de 3-5 horas).\n\n"
+    f"Uso Moderado x Baixo: O uso baixo (0-2 horas) é bastante comum em graus elevados de obesidade (ex: Grau II com aprox. {pct('Tempo_Dispositivos_Label', 'Obesidade Grau II', '0-2 horas')}), até mais do que em grupos de Peso Normal.\n\n"
     "Conclusão: O tempo de tela parece ser uma característica geracional ou ocupacional (trabalho/estudo) transversal a todos os grupos de peso, e não um fator discriminante forte para a obesidade severa isoladamente.",
-    fig
+    "tempo_tela"
 )
 
+
 # 11) Relatório Executivo (texto)
 st.markdown("## Relatório Executivo: Fatores Determinantes da Obesidade")
 st.markdown("**Objetivo:** Apresentar os principais insights extraídos da base de dados histórica para orientar estratégias de prevenção e apoio ao diagnóstico médico.")
-st.markdown("""
+st.markdown(f"""
 ### 1. O "DNA" da Obesidade (Fatores Críticos)
 - A análise revelou que dois fatores são divisores de águas entre pacientes com peso normal e pacientes com obesidade severa:
 
-- Hereditariedade é Mandatória: A influência genética é o preditor mais forte. Quase a totalidade (aprox. 100%) dos pacientes com Obesidade Grau II e III possui histórico familiar de excesso de peso.
+- Hereditariedade é Mandatória: A influência genética é o preditor mais forte. Quase a totalidade (aprox. {historico_obesidade_severa}) dos pacientes com Obesidade Grau II e III possui histórico familiar de excesso de peso.
 
 - Ação Sugerida: O diagnóstico não deve olhar apenas para o indivíduo, mas realizar a triagem familiar imediata.
 
-- A Falta de Consciência Calórica: Existe uma correlação negativa perfeita no monitoramento de calorias. Enquanto 10-12% das pessoas saudáveis monitoram o que comem, esse hábito é inexistente (0%) nos grupos de obesidade mórbida.
+- A Falta de Consciência Calórica: Existe uma correlação negativa perfeita no monitoramento de calorias. Enquanto {faixa(monitora_saudaveis_valores, sufixo='', separador='-')}% das pessoas saudáveis monitoram o que comem, esse hábito é inexistente ({pct('Monitora_Calorias', 'Obesidade Grau III', 'Sim')}) nos grupos de obesidade mórbida.
 
 ***Insight:*** A perda do controle sobre a ingestão (e não apenas a qualidade do alimento) é um marco comportamental da doença.
 
@@ -377,7 +299,7 @@ Dados que contradizem o senso comum e alertam para vieses de autoavaliação dos
 
 - Interpretação: Isso sugere que o consumo de alimentos saudáveis não está gerando déficit calórico, possivelmente devido ao volume excessivo ou acompanhamento de molhos/preparos calóricos.
 
-- **Sedentarismo Relativo**: A falta de exercício é crítica no Grau III (58% sedentários), mas o grupo Grau II apresenta tentativas de atividade (1-2x na semana), indicando que o exercício isolado, sem dieta, não está contendo a progressão da doença.
+- **Sedentarismo Relativo**: A falta de exercício é crítica no Grau III ({pct('Freq_Ativ_Fisica_Label', 'Obesidade Grau III', 'Nenhuma')} sedentários), mas o grupo Grau II apresenta tentativas de atividade (1-2x na semana), indicando que o exercício isolado, sem dieta, não está contendo a progressão da doença.
 
 - **Fatores Irrelevantes**: O Tabagismo e o Tempo de Tela (>5h) não mostraram correlação direta com o aumento de peso nesta amostra específica.
 
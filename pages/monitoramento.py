@@ -0,0 +1,126 @@
+import os
+from datetime import datetime
+
+import streamlit as st
+import pandas as pd
+
+from drift_monitor import PSI_THRESHOLDS, drift_report, load_snapshots, merge_snapshots
+from patient_reports import get_class_info
+
+st.set_page_config(page_title="Monitoramento", layout="wide")
+
+# Mesma moldura da análise exploratória: sem sidebar, conteúdo centralizado
+st.markdown(
+    """
+    <style>
+        section[data-testid="stSidebar"] { display: none !important; }
+        [data-testid="stSidebarNav"] { display: none !important; }
+        div[data-testid="collapsedControl"] { display: none !important; }
+        .block-container { padding-top: 40px; padding-left: 2rem; padding-right: 2rem; }
+        .block-container { max-width: 1200px; margin: 0 auto; }
+        @media (max-width: 768px) {
+            .block-container { padding-left: 1rem; padding-right: 1rem; }
+        }
+    </style>
+    """,
+    unsafe_allow_html=True,
+)
+
+# Snapshots gravados pelo app, pelo serviço HTTP e por batch_scoring.py --monitor
+PASTA_MONITORAMENTO = os.path.join("artefatos", "monitoramento")
+SITUACAO = ["🟢 Estável", "🟡 Moderada", "🔴 Significativa"]
+
+
+def formatar_data(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%d/%m/%Y %H:%M:%S")
+
+
+def percentuais(contagens):
+    total = sum(contagens)
+    return [100 * c / total if total else 0.0 for c in contagens]
+
+
+top_cols = st.columns([4, 1])
+with top_cols[0]:
+    st.title("🛰️ Monitoramento de deriva das entradas")
+    st.markdown(
+        "Compara os pacientes pontuados com a distribuição de `Obesity.csv` usada no treino. "
+        f"PSI abaixo de {PSI_THRESHOLDS[0]:g} indica distribuição estável; acima de {PSI_THRESHOLDS[1]:g}, deriva significativa."
+    )
+with top_cols[1]:
+    if st.button("⬅️ Voltar ao sistema de diagnóstico"):
+        try:
+            st.switch_page("app.py")
+        except Exception:
+            st.stop()
+    st.button("🔄 Atualizar")
+
+snapshots = load_snapshots(PASTA_MONITORAMENTO)
+if not snapshots:
+    st.info(
+        "Nenhum snapshot de monitoramento encontrado. O app e o serviço HTTP gravam as contagens "
+        "a cada minuto; na pontuação em lote, use `batch_scoring.py --monitor`."
+    )
+    st.stop()
+
+referencia, contagens, contagens_classes = merge_snapshots(snapshots)
+relatorio = drift_report(referencia, contagens, contagens_classes)
+
+metricas = st.columns(4)
+metricas[0].metric("Pacientes monitorados", f"{relatorio['rows']:,}".replace(",", "."))
+metricas[1].metric("Processos", len(snapshots))
+metricas[2].metric("Última atualização", formatar_data(snapshots[0]['updated_at']))
+metricas[3].metric("PSI das classes previstas", f"{relatorio['classes']['psi']:.3f}")
+
+if relatorio['rows'] == 0:
+    st.info("Os processos ainda não pontuaram nenhum paciente.")
+    st.stop()
+
+st.subheader("📊 Deriva por feature")
+tabela = pd.DataFrame([
+    {
+        'Feature': item['feature'],
+        'Tipo': "Categórica" if categorica else "Numérica",
+        'PSI': round(item['psi'], 4),
+        'KL': round(item['kl'], 4),
+        'Situação': SITUACAO[item['status']],
+    }
+    for item, categorica in zip(relatorio['features'], referencia['categorical'])
+]).sort_values('PSI', ascending=False)
+st.dataframe(tabela, hide_index=True)
+
+st.subheader("🩺 Classes previstas")
+classes = pd.DataFrame({
+    'Classe': [get_class_info(c)[0] for c in referencia['classes']],
+    'Treino (%)': percentuais(referencia['class_counts']),
+    'Pontuados (%)': percentuais(contagens_classes),
+}).set_index('Classe')
+st.bar_chart(classes, stack=False)
+st.caption(
+    f"PSI {relatorio['classes']['psi']:.3f} · KL {relatorio['classes']['kl']:.3f} "
+    "(o treino usa as classes registradas; os pontuados, as classes previstas)"
+)
+
+st.subheader("🔎 Detalhe de uma feature")
+ordem = tabela['Feature'].tolist()
+escolhida = st.selectbox("Feature", ordem)
+j = referencia['features'].index(escolhida)
+detalhe = pd.DataFrame({
+    'Faixa': referencia['bin_labels'][j],
+    'Treino (%)': percentuais(referencia['counts'][j]),
+    'Pontuados (%)': percentuais(contagens[j]),
+})
+st.dataframe(detalhe.round(2), hide_index=True)
+
+with st.expander("Processos monitorados"):
+    st.dataframe(pd.DataFrame([
+        {
+            'Origem': s['source'],
+            'Host': s['host'],
+            'PID': s['pid'],
+            'Pacientes': s['rows'],
+            'Início': formatar_data(s['started_at']),
+            'Atualizado em': formatar_data(s['updated_at']),
+        }
+        for s in snapshots
+    ]), hide_index=True)
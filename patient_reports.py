@@ -0,0 +1,318 @@
+"""Relatórios HTML por paciente, no formato da tela de diagnóstico do app.
+
+Uso:
+    python patient_reports.py predicoes.csv relatorios/ --workers 4 [--id-column id]
+"""
+import argparse
+import html
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from string import Template
+
+from clinical_rules import clinical_insights
+from machine_learning import INTEGER_COLS, bounded_map, clean_data
+
+# Classe -> (Nome em Português, Cor Hexadecimal)
+CLASS_INFO = {
+    'Insufficient_Weight': ('Abaixo do Peso', '#00E676'),      # Verde Neon
+    'Normal_Weight':       ('Peso Normal',    '#00C853'),      # Verde Forte
+    'Overweight_Level_I':  ('Sobrepeso G1',   '#FFD600'),      # Amarelo Ouro
+    'Overweight_Level_II': ('Sobrepeso G2',   '#FFAB00'),      # Laranja Vivo
+    'Obesity_Type_I':      ('Obesidade G1',   '#FF6D00'),      # Laranja Avermelhado
+    'Obesity_Type_II':     ('Obesidade G2',   '#D50000'),      # Vermelho Intenso
+    'Obesity_Type_III':    ('Obesidade G3',   '#C51162'),      # Magenta/Vinho
+}
+
+# Ordem das barras de probabilidade (do menor para o maior grau)
+CLASS_ORDER = list(CLASS_INFO)
+
+
+def get_class_info(classe_ingles):
+    # (Nome em Português, Cor Hexadecimal)
+    return CLASS_INFO.get(classe_ingles, (classe_ingles, '#ccc'))
+
+
+def get_recommendations(classe_pt):
+    # Retorna (Texto da recomendação, Texto do Link, URL do Link)
+    if 'Obesidade' in classe_pt:
+        return (
+            "A obesidade é uma doença crônica. Recomendamos buscar orientação médica (endocrinologista) e nutricional para um plano seguro.",
+            "Diretrizes Brasileiras de Obesidade (ABESO)",
+            "https://abeso.org.br/diretrizes/"
+        )
+    elif 'Sobrepeso' in classe_pt:
+        return (
+            "Sinal de alerta. Pequenas mudanças nos hábitos, como aumentar a ingestão de água e caminhar 30min por dia, podem reverter esse quadro.",
+            "Guia Alimentar para a População Brasileira",
+            "https://bvsms.saude.gov.br/bvs/publicacoes/guia_alimentar_populacao_brasileira_2ed.pdf"
+        )
+    elif 'Abaixo do Peso' in classe_pt:
+        return (
+            "Estar abaixo do peso requer atenção para evitar deficiências nutricionais. Consulte um nutricionista para adequar a dieta.",
+            "Dicas de Nutrição (Saúde Brasil)",
+            "https://www.gov.br/saude/pt-br"
+        )
+    else: # Peso Normal
+        return (
+            "Excelente! Para manter seu peso saudável, priorize alimentos in natura e mantenha uma rotina ativa de exercícios.",
+            "Recomendações da OMS para Atividade Física",
+            "https://www.who.int/news-room/fact-sheets/detail/physical-activity"
+        )
+
+
+BAR_TEMPLATE = Template(
+    '<div class="bar-wrapper">'
+    '<span class="probability-text">$text</span>'
+    '<div class="bar" style="height: ${height}px; background-color: $color;"></div>'
+    '<span class="label-text">$label</span>'
+    '</div>'
+)
+
+
+def build_probability_bars(all_probs):
+    """HTML das barras de probabilidade (classe -> probabilidade), sem indentação interna"""
+    bars = []
+    for class_name in CLASS_ORDER:
+        prob = all_probs.get(class_name, 0.0)
+        nome_pt, cor = get_class_info(class_name)
+        bars.append(BAR_TEMPLATE.substitute(
+            # Se probabilidade < 1%, mostra vazio
+            text=f"{prob*100:.1f}%" if prob > 0.01 else "",
+            height=max(prob * 100 * 2.5, 4),
+            color=cor,
+            label=nome_pt,
+        ))
+    return '<div class="bar-chart-container">' + ''.join(bars) + '</div>'
+
+
+# Versão para impressão (fundo claro) dos estilos da tela de diagnóstico
+REPORT_CSS = """
+    body { font-family: sans-serif; color: #31333F; max-width: 900px; margin: 30px auto; }
+    h1.resultado { margin-top: 0; }
+    .bar-chart-container { display: flex; align-items: flex-end; justify-content: space-between;
+        height: 280px; border: 1px solid #ddd; border-radius: 12px; padding: 25px; margin-top: 20px; }
+    .bar-wrapper { display: flex; flex-direction: column; align-items: center; justify-content: flex-end;
+        width: 13%; height: 100%; }
+    .probability-text { font-weight: bold; font-size: 14px; margin-bottom: 8px; }
+    .bar { width: 100%; border-radius: 6px 6px 0 0; -webkit-print-color-adjust: exact; print-color-adjust: exact; }
+    .label-text { font-size: 11px; text-align: center; margin-top: 10px; line-height: 1.2; }
+    .recommendation-box { background-color: #f0f2f6; border-left: 5px solid rgba(61, 213, 109, 1);
+        padding: 15px; border-radius: 5px; margin-top: 15px; font-size: 14px; }
+    .recommendation-link { color: #1b7a3a; font-weight: bold; text-decoration: none; }
+    table.dados { border-collapse: collapse; font-size: 13px; }
+    table.dados td { border-bottom: 1px solid #eee; padding: 3px 12px 3px 0; }
+"""
+
+REPORT_TEMPLATE = Template("""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>Paciente $patient_id — $label</title>
+<style>$css</style>
+</head>
+<body>
+<p>Paciente <b>$patient_id</b></p>
+<h2>Resultado Indicado:</h2>
+<h1 class="resultado" style="color: $color;">$label</h1>
+<p>Nível de confiança: <b>$confidence</b></p>
+<div class="recommendation-box">
+    <b>💡 Recomendação Clínica:</b><br>
+    $recommendation<br><br>
+    <a href="$url" class="recommendation-link">🔗 $link_name</a>
+</div>
+<h2>📊 Análise de Probabilidades por Classe</h2>
+$bars
+$factors
+<h2>Alertas clínicos orientados por dados</h2>
+$alerts
+<h2>Dados informados</h2>
+<table class="dados">$inputs</table>
+</body>
+</html>
+""")
+
+ALERT_TEMPLATE = Template('<h3>$title</h3><ul>$lines</ul>')
+FACTORS_TEMPLATE = Template('<h3>O que mais pesou para $label:</h3><ul>$items</ul>')
+NO_ALERTS = '<ul><li>Perfil sem alertas adicionais relevantes com base na análise exploratória.</li></ul>'
+
+
+# Colunas de batch_scoring.py (e o rótulo real, se houver) que não são dados do paciente
+SCORING_COLS = ('prediction', 'confidence', 'unknown_categories', 'trees_used', 'clinical_alerts',
+                'top_features', 'Obesity')
+
+
+def build_factors(label_pt, top_features):
+    """Seção das features de maior contribuição (coluna top_features, formato feature:+contribuição;...)"""
+    if not isinstance(top_features, str) or not top_features:
+        return ''
+    items = []
+    for item in top_features.split(';'):
+        feature, _, value = item.rpartition(':')
+        seta = "🔺" if float(value) > 0 else "🔻"
+        items.append(f'<li>{seta} {html.escape(feature)}: {float(value) * 100:+.1f} p.p.</li>')
+    return FACTORS_TEMPLATE.substitute(label=label_pt, items=''.join(items))
+
+
+def render_report(patient_id, inputs, pred_label, all_probs, insights, top_features=None):
+    """HTML autocontido do relatório de um paciente"""
+    label_pt, cor = get_class_info(pred_label)
+    rec_texto, rec_link_nome, rec_url = get_recommendations(label_pt)
+    alerts = ''.join(
+        ALERT_TEMPLATE.substitute(
+            title=html.escape(item['title']),
+            lines=''.join(f'<li>{html.escape(line)}</li>' for line in item['lines']),
+        )
+        for item in insights
+    ) or NO_ALERTS
+    return REPORT_TEMPLATE.substitute(
+        css=REPORT_CSS,
+        patient_id=html.escape(str(patient_id)),
+        label=label_pt,
+        color=cor,
+        confidence=f"{all_probs.get(pred_label, 0.0):.1%}",
+        recommendation=rec_texto,
+        url=rec_url,
+        link_name=rec_link_nome,
+        bars=build_probability_bars(all_probs),
+        factors=build_factors(label_pt, top_features),
+        alerts=alerts,
+        inputs=''.join(f'<tr><td>{html.escape(str(col))}</td><td>{html.escape(str(value))}</td></tr>'
+                       for col, value in inputs.items()),
+    )
+
+
+def report_filename(patient_id, row=None):
+    # Só caracteres seguros em nomes de arquivo; '+' nunca sai da limpeza do id,
+    # então o sufixo de linha não colide com o nome de outro paciente
+    name = 'paciente_' + re.sub(r'[^0-9A-Za-z_.-]', '_', str(patient_id))
+    if row is not None:
+        name += f'+linha{row}'
+    return name + '.html'
+
+
+def duplicated_filenames(scored_path, id_column):
+    """Nomes de relatório usados por mais de uma linha (ids repetidos ou iguais após a limpeza)"""
+    import pandas as pd
+
+    names = pd.read_csv(scored_path, usecols=[id_column])[id_column].map(report_filename)
+    return set(names[names.duplicated(keep=False)])
+
+
+def render_chunk(chunk, output_dir, id_column=None, duplicated=frozenset()):
+    """Renderiza e grava os relatórios de um bloco do CSV pontuado; devolve (relatórios, bytes, linhas puladas)"""
+    import numpy as np
+    import pandas as pd
+
+    proba_cols = [col for col in chunk.columns if col.startswith('proba_')]
+    input_cols = [col for col in chunk.columns
+                  if col not in proba_cols and col not in SCORING_COLS and col != id_column]
+    # Uma linha sem valor numérico numa ordinal não derruba o bloco: é pulada e informada
+    ordinal = [col for col in INTEGER_COLS if col in input_cols]
+    values = chunk[ordinal].apply(pd.to_numeric, errors='coerce')
+    invalid = ~np.isfinite(values.to_numpy(dtype=float))
+    bad = invalid.any(axis=1)
+    skipped = [
+        {'row': int(row), 'id': str(chunk.at[row, id_column]) if id_column else str(row),
+         'columns': [col for col, missing in zip(ordinal, mask) if missing]}
+        for row, mask in zip(chunk.index[bad], invalid[bad])
+    ]
+    # Coluna lida como texto por causa da linha inválida volta a ser numérica
+    chunk = chunk.assign(**{col: values[col] for col in ordinal})[~bad]
+    labels = chunk['prediction'].to_numpy()
+    # Entradas limpas (ordinais inteiras), como o app avalia as regras
+    insights = clinical_insights(clean_data(chunk[input_cols].copy()), labels)
+    ids = chunk[id_column] if id_column else chunk.index
+    probas = chunk[proba_cols].to_numpy()
+    classes = [col[len('proba_'):] for col in proba_cols]
+    top_features = chunk['top_features'] if 'top_features' in chunk.columns else [None] * len(chunk)
+
+    written = 0
+    for row, patient_id, inputs, pred_label, row_probas, row_insights, row_top in zip(
+            chunk.index, ids, chunk[input_cols].to_dict('records'), labels, probas, insights, top_features):
+        content = render_report(patient_id, inputs, pred_label, dict(zip(classes, row_probas)),
+                                row_insights, row_top)
+        data = content.encode('utf-8')
+        filename = report_filename(patient_id)
+        if filename in duplicated:
+            # Id repetido: o número da linha no CSV separa os relatórios
+            filename = report_filename(patient_id, row)
+        with open(os.path.join(output_dir, filename), 'wb') as f:
+            f.write(data)
+        written += len(data)
+    return len(chunk), written, skipped
+
+
+def generate_reports(scored_path, output_dir, workers=1, chunk_size=500, id_column=None, progress=None):
+    """Gera um relatório por linha do CSV pontuado; retorna métricas de vazão"""
+    import pandas as pd
+
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+    n_reports = n_bytes = 0
+    skipped = []
+    duplicated = duplicated_filenames(scored_path, id_column) if id_column else frozenset()
+
+    def done(result):
+        nonlocal n_reports, n_bytes
+        n_reports += result[0]
+        n_bytes += result[1]
+        skipped.extend(result[2])
+        if progress is not None:
+            progress(n_reports, time.perf_counter() - start)
+
+    chunks = pd.read_csv(scored_path, chunksize=chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            done(render_chunk(chunk, output_dir, id_column, duplicated))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for result in bounded_map(pool, render_chunk, chunks, workers * 2,
+                                      args=(output_dir, id_column, duplicated), ordered=False):
+                done(result)
+
+    elapsed = time.perf_counter() - start
+    return {
+        'reports': n_reports,
+        'bytes': n_bytes,
+        'skipped': sorted(skipped, key=lambda item: item['row']),
+        'duplicated_ids': len(duplicated),
+        'seconds': elapsed,
+        'reports_per_second': n_reports / elapsed if elapsed > 0 else float('inf'),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gera relatórios HTML por paciente a partir de um CSV pontuado.')
+    parser.add_argument('input', help='CSV gerado por batch_scoring.py')
+    parser.add_argument('output_dir', help='diretório dos relatórios .html')
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='processos do pool (0 = todos os núcleos)')
+    parser.add_argument('--id-column', help='coluna que identifica o paciente (padrão: número da linha)')
+    args = parser.parse_args(argv)
+
+    workers = args.workers or os.cpu_count() or 1
+
+    def progress(n_reports, elapsed):
+        print(f"\r{n_reports} relatórios ({n_reports / max(elapsed, 1e-9):,.0f}/s)", end='', file=sys.stderr)
+
+    stats = generate_reports(args.input, args.output_dir, workers=workers, chunk_size=args.chunk_size,
+                             id_column=args.id_column, progress=progress)
+    print(f"\r{stats['reports']} relatórios em {stats['seconds']:.2f}s "
+          f"({stats['reports_per_second']:,.0f}/s, {stats['bytes'] / 1e6:.1f} MB) -> {args.output_dir}",
+          file=sys.stderr)
+    if stats['duplicated_ids']:
+        print(f"{stats['duplicated_ids']} id(s) repetido(s): relatórios com sufixo +linha<N>", file=sys.stderr)
+    for item in stats['skipped'][:20]:
+        print(f"linha {item['row']} (paciente {item['id']}) pulada: sem valor em {', '.join(item['columns'])}",
+              file=sys.stderr)
+    if len(stats['skipped']) > 20:
+        print(f"... e mais {len(stats['skipped']) - 20} linha(s) pulada(s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DATA = os.path.join(ROOT, 'Obesity.csv')
+
+from machine_learning import ObesityPredictor  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def model_dir(tmp_path_factory):
+    """Artefato treinado uma vez por sessão, fora de artefatos/"""
+    path = str(tmp_path_factory.mktemp('artefatos'))
+    ObesityPredictor(DATA, model_dir=path).load_or_train()
+    return path
+
+
+@pytest.fixture(scope='session')
+def load_predictor(model_dir):
+    def load(engine='sklearn', **kwargs):
+        predictor = ObesityPredictor(DATA, model_dir=model_dir, engine=engine, **kwargs)
+        assert predictor.load()
+        return predictor
+    return load
+
+
+@pytest.fixture(scope='session')
+def rows():
+    import pandas as pd
+
+    return pd.read_csv(DATA).drop(columns='Obesity')
@@ -0,0 +1,24 @@
+from agregados_eda import ArmazemAgregados
+from conftest import DATA
+from dataset_cache import file_sha256, load_dataset
+
+
+def test_abrir_reaproveita_armazem_gravado(tmp_path):
+    caminho = str(tmp_path / 'agregados.json')
+    base = file_sha256(DATA)
+    armazem = ArmazemAgregados.abrir(caminho, base, lambda: load_dataset(DATA, str(tmp_path)))
+
+    def falha():
+        raise AssertionError('a base não deveria ser relida')
+
+    relido = ArmazemAgregados.abrir(caminho, base, falha)
+    assert relido.total_linhas == armazem.total_linhas == 2111
+    assert relido.por_nivel.tolist() == armazem.por_nivel.tolist()
+
+
+def test_abrir_sem_disco_gravavel(tmp_path):
+    bloqueado = tmp_path / 'arquivo'
+    bloqueado.write_text('')
+    caminho = str(bloqueado / 'agregados.json')
+    armazem = ArmazemAgregados.abrir(caminho, file_sha256(DATA), lambda: load_dataset(DATA, str(tmp_path)))
+    assert armazem.total_linhas == 2111
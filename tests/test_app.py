@@ -0,0 +1,32 @@
+import os
+import shutil
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from conftest import DATA, ROOT
+
+APP = os.path.join(ROOT, 'app.py')
+
+
+def _run_until(at, condition, timeout=120):
+    deadline = time.monotonic() + timeout
+    at.run()
+    while not condition(at):
+        assert time.monotonic() < deadline, 'o app não chegou ao estado esperado'
+        time.sleep(0.2)
+        at.run()
+    return at
+
+
+def test_failed_load_can_be_retried(tmp_path, monkeypatch):
+    # Sem Obesity.csv no diretório de trabalho o carregamento falha
+    monkeypatch.chdir(tmp_path)
+    at = AppTest.from_file(APP, default_timeout=60)
+    _run_until(at, lambda at: any('Erro ao carregar modelo' in e.value for e in at.error))
+    retry = next(b for b in at.button if 'Tentar novamente' in b.label)
+
+    shutil.copy(DATA, tmp_path / 'Obesity.csv')
+    retry.click()
+    _run_until(at, lambda at: any('Realizar Diagnóstico' in b.label for b in at.sidebar.button))
+    assert not at.error
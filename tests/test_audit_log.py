@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from audit_log import AuditLog, read_audit_log
+
+PROBS = {'Normal_Weight': 0.75, 'Obesity_Type_I': 0.25}
+
+
+def log(audit, i):
+    audit.log({'Age': i}, 'Normal_Weight', 0.75, PROBS)
+
+
+def test_log_after_close_raises(tmp_path):
+    audit = AuditLog(str(tmp_path)).start()
+    log(audit, 0)
+    audit.close()
+    with pytest.raises(RuntimeError):
+        log(audit, 1)
+    assert audit.stats()['written'] == 1
+
+
+def test_records_logged_during_close_are_not_lost(tmp_path):
+    audit = AuditLog(str(tmp_path), flush_interval=0.01).start()
+    accepted = []
+
+    def worker(base):
+        for i in range(base, base + 500):
+            try:
+                log(audit, i)
+            except RuntimeError:
+                return
+            accepted.append(i)
+
+    threads = [threading.Thread(target=worker, args=(k * 1000,)) for k in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.005)
+    audit.close()
+    for thread in threads:
+        thread.join()
+    written = sorted(age for df in read_audit_log(str(tmp_path)) for age in df['Age'])
+    assert written == sorted(accepted) and audit.stats()['written'] == len(accepted)
+
+
+def test_close_is_bounded_when_writer_hangs(tmp_path, monkeypatch):
+    audit = AuditLog(str(tmp_path), max_queue=1, flush_interval=0.01)
+    release = threading.Event()
+    monkeypatch.setattr(audit, '_write', lambda batch: release.wait())
+    audit.start()
+    log(audit, 0)
+    time.sleep(0.05)
+    log(audit, 1)
+    start = time.perf_counter()
+    audit.close(timeout=0.2)
+    assert time.perf_counter() - start < 1.0
+    release.set()
+
+
+def test_light_traffic_is_batched_by_time(tmp_path):
+    audit = AuditLog(str(tmp_path), flush_interval=0.5).start()
+    for i in range(5):
+        log(audit, i)
+        time.sleep(0.01)
+    audit.flush()
+    audit.close()
+    assert audit.stats()['batches'] == 1 and audit.stats()['written'] == 5
+
+
+def test_writer_survives_failed_batch(tmp_path, monkeypatch):
+    audit = AuditLog(str(tmp_path), flush_interval=0.05)
+    write = audit._write
+
+    def fail_once(batch):
+        monkeypatch.setattr(audit, '_write', write)
+        raise ValueError('falha simulada')
+
+    monkeypatch.setattr(audit, '_write', fail_once)
+    audit.start()
+    log(audit, 0)
+    audit.flush()
+    log(audit, 1)
+    audit.close()
+
+    stats = audit.stats()
+    assert stats['failed'] == 1 and 'falha simulada' in stats['error']
+    assert [age for df in read_audit_log(str(tmp_path)) for age in df['Age']] == [1]
+
+
+def test_round_trip_across_rotation(tmp_path):
+    audit = AuditLog(str(tmp_path), max_bytes=2048, batch_size=16, flush_interval=0.01).start()
+    for i in range(600):
+        audit.log({'Age': i, 'Gender': 'Female'}, 'Obesity_Type_I', 0.5 + i / 2000, PROBS, {'fingerprint': 'abc'})
+        if i % 50 == 0:
+            # Lotes separados, para que os arquivos passem de max_bytes
+            audit.flush()
+    audit.close()
+    assert audit.stats()['files'] > 1 and audit.stats()['failed'] == 0
+
+    df = pd.concat(read_audit_log(str(tmp_path), chunk_size=100), ignore_index=True)
+    assert df['Age'].tolist() == list(range(600))
+    assert (df['Gender'] == 'Female').all() and (df['prediction'] == 'Obesity_Type_I').all()
+    assert df['confidence'].tolist() == [0.5 + i / 2000 for i in range(600)]
+    assert (df['proba_Normal_Weight'] == 0.75).all() and (df['model_fingerprint'] == 'abc').all()
+    assert df['timestamp'].is_monotonic_increasing
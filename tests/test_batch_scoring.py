@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_scoring import main, score_file
+from conftest import DATA
+
+
+@pytest.fixture
+def patients(rows, tmp_path):
+    path = tmp_path / 'pacientes.csv'
+    rows.head(1200).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_chunks_match_predict_batch(load_predictor, model_dir, patients, tmp_path, workers):
+    output = str(tmp_path / 'predicoes.csv')
+    assert main([patients, output, '--data', DATA, '--model-dir', model_dir,
+                 '--chunk-size', '250', '--workers', str(workers)]) == 0
+
+    scored = pd.read_csv(output)
+    rows = pd.read_csv(patients)
+    labels, confidences, probas, _ = load_predictor('flat').predict_batch(rows)
+    # Blocos gravados na ordem de leitura, com as colunas de entrada preservadas
+    pd.testing.assert_frame_equal(scored[rows.columns], rows)
+    assert scored['prediction'].tolist() == list(labels)
+    np.testing.assert_allclose(scored['confidence'], confidences)
+    proba_cols = [c for c in scored.columns if c.startswith('proba_')]
+    np.testing.assert_allclose(scored[proba_cols].to_numpy(), probas)
+
+
+def test_empty_input_writes_empty_output(model_dir, tmp_path, rows):
+    empty = tmp_path / 'vazio.csv'
+    rows.head(0).to_csv(empty, index=False)
+    output = tmp_path / 'predicoes.csv'
+    n_rows, _ = score_file(str(empty), str(output), data_path=DATA, model_dir=model_dir)
+    assert n_rows == 0 and output.exists()
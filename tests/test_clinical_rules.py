@@ -0,0 +1,159 @@
+import itertools
+
+import pandas as pd
+
+from batch_scoring import score_chunk
+from clinical_rules import CLINICAL_RULES, SEVERITY, clinical_insights
+from conftest import DATA
+from machine_learning import clean_data
+
+
+def test_batch_alerts_match_app(load_predictor):
+    """clinical_alerts de batch_scoring são os alertas que o app mostra para o mesmo paciente"""
+    predictor = load_predictor('flat')
+    chunk = pd.read_csv(DATA)
+    scored = score_chunk(predictor, chunk, insights=True)
+    rules = {rule['id']: rule for rule in CLINICAL_RULES}
+
+    records = clean_data(chunk.drop(columns='Obesity')).to_dict('records')
+    for record, alerts in zip(records, scored['clinical_alerts']):
+        # Mesmo caminho de app.build_clinical_insights
+        pred_label = predictor.predict(record)[0]
+        expected = clinical_insights({col: [value] for col, value in record.items()}, [pred_label])[0]
+        got = [{'title': rules[i]['title'], 'lines': rules[i]['lines']} for i in alerts.split(';') if i]
+        assert got == expected
+
+
+def test_rules_match_legacy_chain(rows):
+    """Tabela de regras equivale à cadeia de if/elif que o app usava, em todos os perfis e classes"""
+    classes = list(SEVERITY)
+    records = clean_data(rows.copy()).to_dict('records')
+    for record, label in itertools.product(records, classes):
+        expected = legacy_insights(record, label)
+        assert clinical_insights({col: [value] for col, value in record.items()}, [label])[0] == expected
+
+
+def legacy_insights(user_data, pred_label):
+    """app.build_clinical_insights antes do motor de regras (cópia literal)"""
+    severity = {
+        'Insufficient_Weight': 0,
+        'Normal_Weight': 1,
+        'Overweight_Level_I': 2,
+        'Overweight_Level_II': 3,
+        'Obesity_Type_I': 4,
+        'Obesity_Type_II': 5,
+        'Obesity_Type_III': 6,
+    }.get(pred_label, 0)
+
+    insights = []  # cada item: {"title": str, "lines": [str, ...]}
+    gender = user_data.get('Gender')
+    age = user_data.get('Age')
+
+    if user_data.get('family_history') == 'yes' and severity >= 4:
+        insights.append({
+            "title": "Historico familiar",
+            "lines": [
+                "Pacientes em graus II e III costumam ter historico de obesidade na familia; inclua a triagem familiar no plano de ação.",
+                "Considere intervenções que envolvam rotina alimentar e atividade fisica do nucleo familiar."
+            ]
+        })
+    elif user_data.get('family_history') == 'yes':
+        insights.append({
+            "title": "Historico familiar",
+            "lines": [
+                "Familia com obesidade aumenta a chance de progressão; acompanhe com revisões periodicas.",
+                "Oriente a familia sobre sinais precoces e metas conjuntas."
+            ]
+        })
+
+    if user_data.get('SCC') == 'no':
+        insights.append({
+            "title": "Monitoração calórica",
+            "lines": [
+                "O registro alimentar costuma ser ausente nos graus graves; introduza o uso de um diario/cálculo simples para controle de calorias.",
+                "Sugira aplicativos ou planilhas rápidas que somem calorias de forma prática."
+            ]
+        })
+
+    faf = user_data.get('FAF', 0)
+    if faf == 0 and severity >= 4:
+        insights.append({
+            "title": "Atividade fisica",
+            "lines": [
+                "O paciente apresenta sedentarismo total com obesidade avançada: iniciar plano supervisionado e progressivo para evitar lesão.",
+                "Combine fortalecimento leve + caminhada curta e aumente gradualmente."
+            ]
+        })
+    elif faf <= 1 and severity >= 2:
+        insights.append({
+            "title": "Atividade fisica",
+            "lines": [
+                "Baixa atividade: alinhar dieta estruturada e progressão de exercicios para conter ganho.",
+                "Metas semanais curtas (ex.: 2-3 sessões leves) ajudam na adesão."
+            ]
+        })
+
+    if age is not None and age <= 30 and severity >= 3:
+        insights.append({
+            "title": "Adulto jovem",
+            "lines": [
+                "Obesidade severa em faixa jovem pede abordagem precoce e intensiva.",
+                "Reforce orientações sobre fertilidade, metabolismo e longo prazo."
+            ]
+        })
+
+    if gender == 'Male' and pred_label == 'Obesity_Type_II':
+        insights.append({
+            "title": "Perfil masculino",
+            "lines": [
+                "Homens tendem a aparecer em Grau II; avalie rotina laboral, sono e ingestão proteica.",
+                "Cheque circunferência abdominal e risco cardiometabolico."
+            ]
+        })
+    if gender == 'Female' and pred_label == 'Obesity_Type_III':
+        insights.append({
+            "title": "Perfil feminino",
+            "lines": [
+                "Mulheres em Grau III se beneficiam de acompanhamento multidisciplinar intensivo.",
+                "Inclua suporte psicologico e manejo de deficiências micronutricionais."
+            ]
+        })
+
+    if user_data.get('FCVC') == 3 and severity >= 4:
+        insights.append({
+            "title": "Consumo de vegetais",
+            "lines": [
+                "Mesmo relatando vegetais sempre, o balanco calórico pode estar positivo.",
+                "Revise molhos, porções e acompanhamentos calóricos."
+            ]
+        })
+
+    if user_data.get('CH2O') == 3 and severity >= 4:
+        insights.append({
+            "title": "Liquidos",
+            "lines": [
+                "Alto consumo de líquidos pode incluir bebidas calóricas; diferencie água de sucos/refrigerantes.",
+                "Estimule água pura e reduza bebidas adoçadas."
+            ]
+        })
+
+    calc = user_data.get('CALC')
+    if calc in ['Sometimes', 'Frequently', 'Always'] and severity >= 3:
+        insights.append({
+            "title": "Alcool",
+            "lines": [
+                "Mesmo ocasional, alcool soma calorias vazias e piora controle de apetite.",
+                "Negocie redução ou pausas semanais, especialmente em graus elevados."
+            ]
+        })
+
+    if user_data.get('SMOKE') == 'yes':
+        insights.append({
+            "title": "Tabagismo",
+            "lines": [
+                "Apesar de raro, obesidade + tabagismo aumenta risco cardiometabolico.",
+                "Ofereça apoio para cessação e ajuste de peso no processo."
+            ]
+        })
+
+    return insights
@@ -0,0 +1,32 @@
+import sys
+
+import pandas as pd
+
+from conftest import DATA
+from dataset_cache import dataset_cache_path, load_dataset, read_csv_typed
+from machine_learning import ObesityPredictor
+
+
+def test_cache_round_trip(tmp_path):
+    df = load_dataset(DATA, str(tmp_path))
+    assert (tmp_path / dataset_cache_path(DATA, '')).exists()
+    pd.testing.assert_frame_equal(load_dataset(DATA, str(tmp_path)), df)
+    pd.testing.assert_frame_equal(df, read_csv_typed(DATA))
+
+
+def test_unwritable_cache_dir_falls_back_to_csv(tmp_path):
+    # Um arquivo no lugar do diretório: makedirs falha mesmo rodando como root
+    blocked = tmp_path / 'arquivo'
+    blocked.write_text('')
+    cache_dir = str(blocked / 'artefatos')
+    pd.testing.assert_frame_equal(load_dataset(DATA, cache_dir), read_csv_typed(DATA))
+
+    predictor = ObesityPredictor(DATA, model_dir=cache_dir, engine='flat')
+    predictor.load_or_train()
+    assert predictor.predict(pd.read_csv(DATA).iloc[0].to_dict())[0]
+
+
+def test_without_pyarrow_reads_csv(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'pyarrow.feather', None)
+    pd.testing.assert_frame_equal(load_dataset(DATA, str(tmp_path)), read_csv_typed(DATA))
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,31 @@
+import pytest
+
+
+def outras(predictor, feature):
+    feature_counts, _ = predictor.monitor.counts()
+    return feature_counts[predictor.monitor.reference['features'].index(feature)][-1]
+
+
+@pytest.mark.parametrize('call', ['predict', 'predict_batch', 'predict_batch_records'])
+def test_unknown_category_counts_as_outras(load_predictor, rows, call):
+    predictor = load_predictor()
+    records = rows.head(50).to_dict('records')
+    for record in records:
+        record['MTRANS'] = 'Bus'
+    before = outras(predictor, 'MTRANS')
+    if call == 'predict':
+        for record in records:
+            predictor.predict(record)
+            # Segunda chamada sai do cache de predições
+            predictor.predict(record)
+        expected = 2 * len(records)
+    elif call == 'predict_batch':
+        import pandas as pd
+
+        predictor.predict_batch(pd.DataFrame(records))
+        expected = len(records)
+    else:
+        predictor.predict_batch(records)
+        expected = len(records)
+    assert outras(predictor, 'MTRANS') - before == expected
+    assert outras(predictor, 'Gender') == 0
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize('engine', ['flat', 'compact'])
+def test_early_exit_keeps_labels(load_predictor, rows, engine):
+    predictor = load_predictor(engine)
+    labels, _, probas, _ = predictor.predict_batch(rows)
+    early_labels, _, early_probas, _, trees_used = predictor.predict_batch_early_exit(rows)
+    assert (early_labels == labels).all()
+    n_trees = len(predictor.flat_forest.roots)
+    assert trees_used.mean() < n_trees
+    # Quem avaliou todas as árvores tem exatamente as probabilidades completas
+    full = trees_used == n_trees
+    assert np.array_equal(early_probas[full], probas[full])
+
+
+def test_early_exit_chunks_and_confidence(load_predictor, rows):
+    forest = load_predictor('flat').flat_forest
+    X = np.asarray(load_predictor('flat')._encode_rows(rows)[0], dtype=np.float32)
+    probas, used = forest.predict_proba_early_exit(X)
+    chunked, chunked_used = forest.predict_proba_early_exit(X, chunk_size=100)
+    assert np.array_equal(probas, chunked) and np.array_equal(used, chunked_used)
+
+    fast, fast_used = forest.predict_proba_early_exit(X, confidence=0.9)
+    assert fast_used.mean() < used.mean()
+    assert np.allclose(fast.sum(axis=1), 1)
@@ -0,0 +1,34 @@
+import numpy as np
+
+
+def test_flat_matches_sklearn_bit_for_bit(load_predictor, rows):
+    sklearn = load_predictor('sklearn')
+    expected = sklearn.model.predict_proba(sklearn._encode_rows(rows)[0])
+    assert np.array_equal(load_predictor('flat').predict_batch(rows)[2], expected)
+
+
+def test_compact_flips_no_labels(load_predictor, rows):
+    expected = load_predictor('sklearn').predict_batch(rows)[0]
+    compact = load_predictor('compact')
+    assert (compact.predict_batch(rows)[0] == expected).all()
+
+    _, report = compact.export_compact(rows=rows)
+    assert report['label_disagreements'] == 0
+    assert report['max_abs_proba_diff'] <= report['proba_error_bound']
+
+
+def test_missing_values_follow_sklearn(load_predictor, rows):
+    sklearn = load_predictor('sklearn')
+    flat = load_predictor('flat')
+    with_missing = rows.copy()
+    rng = np.random.default_rng(0)
+    for col in ['Age', 'Height', 'Weight']:
+        with_missing.loc[rng.random(len(rows)) < 0.2, col] = np.nan
+    expected = sklearn.model.predict_proba(sklearn._encode_rows(with_missing)[0])
+    assert np.array_equal(flat.predict_batch(with_missing)[2], expected)
+    compact = load_predictor('compact')
+    diff = np.abs(compact.predict_batch(with_missing)[2] - expected).max()
+    assert diff <= compact.compact_forest.proba_error_bound
+
+    record = dict(rows.iloc[0], Age=None)
+    assert flat.predict(record) == sklearn.predict(record)
@@ -0,0 +1,24 @@
+import threading
+
+from conftest import DATA
+from machine_learning import ObesityPredictor
+
+
+def test_evaluate_in_subprocess_does_not_fork_the_caller(tmp_path, monkeypatch):
+    import machine_learning
+
+    pools = []
+    monkeypatch.setattr(machine_learning, 'ProcessPoolExecutor', lambda *args, **kwargs: pools.append(kwargs))
+    predictor = ObesityPredictor(DATA, model_dir=str(tmp_path), n_estimators=10)
+    results = []
+    # Como no ModelWarmup: a validação cruzada parte de uma thread secundária
+    thread = threading.Thread(target=lambda: results.append(predictor.evaluate_in_subprocess(2, 1)))
+    thread.start()
+    thread.join(120)
+
+    assert pools == [] and len(results) == 1
+    evaluation = results[0]
+    assert (evaluation['n_splits'], evaluation['n_repeats']) == (2, 1) and 0.5 < evaluation['accuracy_mean'] <= 1.0
+    assert predictor.evaluation == evaluation
+    # O resultado fica no cache lido pelos próximos processos
+    assert ObesityPredictor(DATA, model_dir=str(tmp_path), n_estimators=10).load_evaluation(2, 1) == evaluation
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from machine_learning import FlatForest
+
+
+@pytest.mark.parametrize('engine', ['flat', 'compact'])
+def test_contributions_sum_to_probabilities(load_predictor, rows, engine):
+    predictor = load_predictor(engine)
+    sample = rows.sample(300, random_state=0)
+    bias, contributions = predictor.explain_batch(sample)
+    _, _, probas, _ = predictor.predict_batch(sample)
+    np.testing.assert_allclose(bias + contributions.sum(axis=1), probas, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize('engine', ['flat', 'compact'])
+def test_explain_arrays_are_memory_mapped(load_predictor, engine):
+    predictor = load_predictor(engine)
+    forest = predictor.compact_forest if engine == 'compact' else predictor.flat_forest
+    # Lidos do pacote de inferência na carga, não calculados na primeira explicação
+    deltas = forest._deltas
+    assert all(isinstance(array, np.memmap) for array in deltas)
+
+    recomputed = FlatForest.from_arrays(forest.max_depth, forest.n_classes, **forest.to_arrays())
+    recomputed.tree_weight = forest.tree_weight
+    for stored, fresh in zip(deltas, recomputed._path_deltas()):
+        np.testing.assert_array_equal(stored, fresh)
@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+import pytest
+
+from conftest import DATA
+from inference_server import InferenceServer
+from machine_learning import ModelWarmup, ObesityPredictor
+
+
+async def request(port, method, path, body=b''):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    while (await reader.readline()) != b'\r\n':
+        pass
+    payload = json.loads(await reader.read())
+    writer.close()
+    return status, payload
+
+
+@pytest.fixture
+def warmup(model_dir):
+    warmup = ModelWarmup(lambda: ObesityPredictor(DATA, model_dir=model_dir, engine='flat')).start()
+    assert warmup.wait() is not None
+    return warmup
+
+
+def serve(warmup, scenario, **kwargs):
+    async def run():
+        server = await InferenceServer(warmup, port=0, **kwargs).start()
+        try:
+            return await scenario(server)
+        finally:
+            await server.close()
+    return asyncio.run(run())
+
+
+def test_concurrent_requests_are_batched(warmup, rows):
+    records = rows.head(40).to_dict('records')
+
+    async def scenario(server):
+        responses = await asyncio.gather(*(request(server.port, 'POST', '/predict', json.dumps(r).encode())
+                                           for r in records))
+        return responses, (await request(server.port, 'GET', '/metrics'))[1]
+
+    responses, metrics = serve(warmup, scenario, max_batch_size=64, max_wait_ms=50)
+    for record, (status, payload) in zip(records, responses):
+        assert status == 200
+        label, confidence, _ = warmup.predictor.predict(record)
+        assert payload['prediction'] == label and payload['confidence'] == pytest.approx(confidence)
+    assert metrics['batches'] < len(records)
+
+
+def test_invalid_payload_is_rejected(warmup, rows):
+    record = rows.iloc[0].to_dict()
+    bodies = [json.dumps(dict(record, Age=None)), json.dumps({k: v for k, v in record.items() if k != 'Weight'}),
+              json.dumps(dict(record, Gender=1)), json.dumps(dict(record, Height=float('nan'))), '[]']
+
+    async def scenario(server):
+        return [await request(server.port, 'POST', '/predict', body.encode()) for body in bodies]
+
+    for status, payload in serve(warmup, scenario):
+        assert status == 400 and payload['error']
+
+
+def test_failed_batch_does_not_stop_the_batcher(warmup, rows, monkeypatch):
+    refresh = warmup.refresh
+    calls = []
+
+    def fail_once(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            raise OSError('falha simulada')
+        return refresh(*args, **kwargs)
+
+    monkeypatch.setattr(warmup, 'refresh', fail_once)
+    body = json.dumps(rows.iloc[0].to_dict()).encode()
+
+    async def scenario(server):
+        first = await asyncio.wait_for(request(server.port, 'POST', '/predict', body), 10)
+        second = await asyncio.wait_for(request(server.port, 'POST', '/predict', body), 10)
+        return first, second
+
+    (status1, payload1), (status2, _) = serve(warmup, scenario)
+    assert status1 == 500 and 'falha simulada' in payload1['error']
+    assert status2 == 200
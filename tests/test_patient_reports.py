@@ -0,0 +1,68 @@
+import html
+import os
+
+import pandas as pd
+import pytest
+
+from batch_scoring import score_chunk
+from clinical_rules import CLINICAL_RULES, clinical_insights
+from conftest import DATA
+from machine_learning import clean_data
+from patient_reports import generate_reports, render_chunk, report_filename
+
+
+def test_report_alerts_match_app(load_predictor, tmp_path):
+    predictor = load_predictor('flat')
+    chunk = pd.read_csv(DATA).sample(400, random_state=0).reset_index(drop=True)
+    scored = score_chunk(predictor, chunk, explain=3)
+    render_chunk(scored, str(tmp_path))
+
+    records = clean_data(chunk.drop(columns='Obesity')).to_dict('records')
+    for idx, (record, label) in enumerate(zip(records, scored['prediction'])):
+        report = (tmp_path / report_filename(idx)).read_text(encoding='utf-8')
+        expected = clinical_insights({col: [value] for col, value in record.items()}, [label])[0]
+        expected_lines = {line for alert in expected for line in alert['lines']}
+        for rule in CLINICAL_RULES:
+            for line in rule['lines']:
+                assert (html.escape(line) in report) == (line in expected_lines)
+
+
+def test_report_shows_top_features_as_explanation(load_predictor, tmp_path):
+    predictor = load_predictor('flat')
+    scored = score_chunk(predictor, pd.read_csv(DATA).head(5), explain=3)
+    render_chunk(scored, str(tmp_path))
+
+    report = (tmp_path / report_filename(0)).read_text(encoding='utf-8')
+    assert 'top_features' not in report
+    assert 'O que mais pesou' in report
+    for item in scored['top_features'][0].split(';'):
+        feature, _, value = item.rpartition(':')
+        assert f'{feature}: {float(value) * 100:+.1f} p.p.' in report
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_duplicate_ids_and_missing_ordinals(load_predictor, tmp_path, workers):
+    predictor = load_predictor('flat')
+    scored = score_chunk(predictor, pd.read_csv(DATA).head(12))
+    # Ids repetidos em blocos diferentes e ids que só colidem depois da limpeza do nome
+    scored.insert(0, 'id', ['p1', 'p2', 'p1', 'a/b', 'a_b', 'p6', 'p7', 'p8', 'p9', 'p10', 'p11', 'p1'])
+    scored.loc[6, 'FCVC'] = float('nan')
+    scored['NCP'] = scored['NCP'].astype(object)
+    scored.loc[8, 'NCP'] = 'x'
+    path = tmp_path / 'pontuado.csv'
+    scored.to_csv(path, index=False)
+    output_dir = tmp_path / 'relatorios'
+
+    stats = generate_reports(str(path), str(output_dir), workers=workers, chunk_size=4, id_column='id')
+    assert stats['reports'] == 10 and stats['duplicated_ids'] == 2
+    assert stats['skipped'] == [{'row': 6, 'id': 'p7', 'columns': ['FCVC']},
+                                {'row': 8, 'id': 'p9', 'columns': ['NCP']}]
+    names = sorted(os.listdir(output_dir))
+    assert len(names) == 10
+    assert {report_filename('p1', 0), report_filename('p1', 2), report_filename('p1', 11),
+            report_filename('a/b', 3), report_filename('a_b', 4), report_filename('p2')} <= set(names)
+    assert report_filename('p7') not in names and report_filename('p9') not in names
+    # Cada relatório de um id repetido traz os dados da sua própria linha
+    for row in (0, 2, 11):
+        report = (output_dir / report_filename('p1', row)).read_text(encoding='utf-8')
+        assert f"<td>Weight</td><td>{scored.loc[row, 'Weight']}</td>" in report
@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import DATA
+from machine_learning import ObesityPredictor
+
+
+def no_train(self):
+    raise AssertionError('o artefato salvo deveria ter sido carregado')
+
+
+def test_saved_artifact_is_loaded_without_training(load_predictor, model_dir, rows, monkeypatch):
+    trained = load_predictor()
+    monkeypatch.setattr(ObesityPredictor, 'train', no_train)
+    for engine in ObesityPredictor.ENGINES:
+        predictor = ObesityPredictor(DATA, model_dir=model_dir, engine=engine)
+        assert predictor.load_or_train() == trained.accuracy
+        assert predictor.model_fingerprint == trained.model_fingerprint
+        assert list(predictor.target_names) == list(trained.target_names)
+        _, _, probas, _ = predictor.predict_batch(rows.head(200))
+        _, _, expected, _ = trained.predict_batch(rows.head(200))
+        if engine == 'compact':
+            assert np.abs(probas - expected).max() <= predictor.compact_forest.proba_error_bound
+        else:
+            np.testing.assert_array_equal(probas, expected)
+
+
+def test_changed_params_retrain(model_dir, tmp_path):
+    path = ObesityPredictor(DATA, model_dir=model_dir).artifact_path()
+    other = ObesityPredictor(DATA, model_dir=str(tmp_path), n_estimators=10)
+    assert other.fingerprint() != ObesityPredictor(DATA).fingerprint()
+    # Artefato de outros hiperparâmetros não é aceito
+    assert not other.load(path)
+    other.load_or_train()
+    assert len(other.model.estimators_) == 10
+    assert os.path.exists(other.artifact_path())
+
+
+def test_corrupted_artifact_is_retrained(tmp_path, monkeypatch):
+    predictor = ObesityPredictor(DATA, model_dir=str(tmp_path), n_estimators=10)
+    path = predictor.artifact_path()
+    with open(path, 'wb') as f:
+        f.write(b'nao e um joblib')
+    calls = []
+    train = ObesityPredictor.train
+    monkeypatch.setattr(ObesityPredictor, 'train', lambda self: calls.append(1) or train(self))
+    predictor.load_or_train()
+    assert calls == [1]
+    # O artefato regravado volta a ser carregado
+    monkeypatch.setattr(ObesityPredictor, 'train', no_train)
+    ObesityPredictor(DATA, model_dir=str(tmp_path), n_estimators=10).load_or_train()
+
+
+@pytest.mark.parametrize('engine', ['sklearn', 'flat'])
+def test_load_rejects_other_dataset(model_dir, tmp_path, engine):
+    other_data = tmp_path / 'Obesity.csv'
+    with open(DATA, encoding='utf-8') as src:
+        lines = src.readlines()
+    other_data.write_text(''.join(lines[:-5]), encoding='utf-8')
+    path = ObesityPredictor(DATA, model_dir=model_dir).artifact_path()
+    assert not ObesityPredictor(str(other_data), model_dir=model_dir, engine=engine).load(path)
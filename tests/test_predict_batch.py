@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from machine_learning import ObesityPredictor
+
+
+@pytest.mark.parametrize('engine', ObesityPredictor.ENGINES)
+@pytest.mark.parametrize('empty', [[], 'dataframe'])
+def test_predict_batch_empty(load_predictor, rows, engine, empty):
+    predictor = load_predictor(engine)
+    batch = rows.head(0) if empty == 'dataframe' else empty
+    labels, confidences, probas, unknown = predictor.predict_batch(batch)
+    assert labels.shape == confidences.shape == (0,)
+    assert probas.shape == (0, len(predictor.target_names))
+    assert unknown == []
+
+
+@pytest.mark.parametrize('engine', ObesityPredictor.ENGINES)
+def test_predict_batch_matches_predict(load_predictor, rows, engine):
+    predictor = load_predictor(engine)
+    sample = rows.head(50)
+    labels, confidences, probas, _ = predictor.predict_batch(sample)
+    for row, label, proba in zip(sample.to_dict('records'), labels, probas):
+        pred_label, _, all_probs = predictor.predict(row)
+        assert pred_label == label
+        np.testing.assert_allclose(list(all_probs.values()), proba)
@@ -0,0 +1,67 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from conftest import DATA
+
+
+@pytest.mark.parametrize('engine', ['sklearn', 'flat'])
+def test_hits_misses_and_canonical_key(load_predictor, rows, engine):
+    predictor = load_predictor(engine)
+    record = rows.iloc[0].to_dict()
+    first = predictor.predict(record)
+    # Mesmo perfil após a limpeza (ordinais arredondadas, inteiro x float): mesma entrada do cache
+    same = dict(record, FCVC=round(record['FCVC']) + 0.2, Age=float(record['Age']))
+    assert predictor.predict(same) == first
+    assert predictor.cache_info() == {'hits': 1, 'misses': 1, 'size': 1, 'max_size': 1024}
+
+
+def test_lru_eviction(load_predictor, rows):
+    predictor = load_predictor('flat', cache_size=2)
+    a, b, c = rows.iloc[:3].to_dict('records')
+    for record in (a, b, a, c):
+        predictor.predict(record)
+    # c expulsou b, o menos usado recentemente
+    predictor.predict(a)
+    predictor.predict(b)
+    assert predictor.cache_info() == {'hits': 2, 'misses': 4, 'size': 2, 'max_size': 2}
+
+
+def test_disabled_cache(load_predictor, rows):
+    predictor = load_predictor('flat', cache_size=0)
+    record = rows.iloc[0].to_dict()
+    assert predictor.predict(record) == predictor.predict(record)
+    assert predictor.cache_info()['size'] == 0
+
+
+def test_cache_is_cleared_when_model_changes(load_predictor, rows):
+    predictor = load_predictor()
+    predictor.predict(rows.iloc[0].to_dict())
+    predictor.update(pd.read_csv(DATA).sample(300, random_state=3), tolerance=1.0)
+    assert predictor.cache_info() == {'hits': 0, 'misses': 0, 'size': 0, 'max_size': 1024}
+
+    predictor.predict(rows.iloc[0].to_dict())
+    assert predictor.load()
+    assert predictor.cache_info()['size'] == 0
+
+
+def test_concurrent_predictions(load_predictor, rows):
+    predictor = load_predictor('flat', cache_size=8)
+    records = rows.head(32).to_dict('records')
+    expected = [load_predictor('flat', cache_size=0).predict(r) for r in records]
+    errors = []
+
+    def worker():
+        for _ in range(5):
+            for record, result in zip(records, expected):
+                if predictor.predict(record) != result:
+                    errors.append(record)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    info = predictor.cache_info()
+    assert not errors and info['size'] <= 8 and info['hits'] + info['misses'] == 4 * 5 * len(records)
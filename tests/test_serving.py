@@ -0,0 +1,65 @@
+import mmap
+import os
+
+import numpy as np
+import pandas as pd
+
+from conftest import DATA
+from machine_learning import SERVING_GENERATIONS_KEPT, ModelWarmup, ObesityPredictor
+
+
+def generations(predictor):
+    serving_dir = predictor.serving_path(predictor.artifact_path())
+    return sorted(name for name in os.listdir(serving_dir) if name.startswith('gen-'))
+
+
+def is_mapped(array):
+    # from_arrays devolve vistas contíguas (sem cópia) dos arquivos mapeados
+    while isinstance(array, np.ndarray):
+        array = array.base
+    return isinstance(array, mmap.mmap)
+
+
+def test_workers_swap_to_published_generation(tmp_path, rows):
+    model_dir = str(tmp_path)
+    writer = ObesityPredictor(DATA, model_dir=model_dir, n_estimators=10)
+    writer.load_or_train()
+    first = writer.serving_generation
+
+    warmup = ModelWarmup(lambda: ObesityPredictor(DATA, model_dir=model_dir, engine='flat', n_estimators=10)).start()
+    old = warmup.wait()
+    assert old.serving_generation == first and old.encoders == {}
+    # Os arrays da floresta são mapeados do pacote, compartilhados entre processos
+    assert all(is_mapped(array) for array in old.flat_forest.to_arrays().values())
+    record = rows.iloc[0].to_dict()
+    before = old.predict(record)
+    assert warmup.refresh(min_interval=0) is old
+
+    # Outro processo publica um modelo atualizado: os workers trocam na próxima checagem
+    writer.update(pd.read_csv(DATA).sample(300, random_state=5), tolerance=1.0)
+    writer.save()
+    assert writer.serving_generation != first
+    assert old.published_generation() == writer.serving_generation
+    new = warmup.refresh(min_interval=0)
+    assert new is not old and new.serving_generation == writer.serving_generation and new.updates == 1
+    assert new.predict(record) == writer.predict(record)
+    # Quem ainda segura o modelo antigo continua respondendo com ele
+    assert old.predict(record) == before
+
+    for _ in range(3):
+        writer.save()
+    # A atual e as SERVING_GENERATIONS_KEPT anteriores
+    assert len(generations(writer)) == SERVING_GENERATIONS_KEPT + 1
+    assert writer.serving_generation in generations(writer)
+
+
+def test_half_written_generation_is_ignored(tmp_path, rows):
+    model_dir = str(tmp_path)
+    writer = ObesityPredictor(DATA, model_dir=model_dir, n_estimators=10)
+    writer.load_or_train()
+    # Publicação interrompida antes do rename: o CURRENT continua na geração anterior
+    serving_dir = writer.serving_path(writer.artifact_path())
+    os.makedirs(os.path.join(serving_dir, '.gen-0-0.tmp'))
+    reader = ObesityPredictor(DATA, model_dir=model_dir, engine='flat', n_estimators=10)
+    assert reader.load() and reader.serving_generation == writer.serving_generation
+    assert reader.predict(rows.iloc[0].to_dict())[0] == writer.predict(rows.iloc[0].to_dict())[0]
@@ -0,0 +1,26 @@
+import json
+
+import pytest
+
+import tuning
+from conftest import DATA
+
+
+def test_search_ranks_finalists_and_reuses_leaderboard(tmp_path, monkeypatch):
+    model_dir = str(tmp_path)
+    path = tuning.run_search(DATA, model_dir, eta=2, min_samples=500, cv=2, n_candidates=4, workers=2)
+    with open(path, encoding='utf-8') as f:
+        leaderboard = json.load(f)
+    finalists = [r for r in leaderboard['results'] if r['final']]
+    assert finalists and all(r['latency_ms'] > 0 for r in finalists)
+    assert all('latency_ms' not in r and 'model' not in r for r in leaderboard['results'] if not r['final'])
+
+    def no_search(*args, **kwargs):
+        raise AssertionError('a busca não deveria rodar de novo')
+
+    monkeypatch.setattr(tuning, 'successive_halving', no_search)
+    assert tuning.run_search(DATA, model_dir, eta=2, min_samples=500, cv=2, n_candidates=4, workers=2) == path
+    # Outras configurações de busca, ou force=True, refazem a busca
+    for kwargs in ({'cv': 3}, {'cv': 2, 'force': True}):
+        with pytest.raises(AssertionError):
+            tuning.run_search(DATA, model_dir, eta=2, min_samples=500, n_candidates=4, workers=2, **kwargs)
@@ -0,0 +1,46 @@
+import pandas as pd
+
+from conftest import DATA
+
+
+def test_update_windows_do_not_grow(load_predictor):
+    predictor = load_predictor()
+    predictor._ensure_full()
+    recent, holdout = len(predictor._recent), len(predictor._holdout)
+    # Janela recente menor que o treino: as novas árvores veem dados recentes, não o histórico todo
+    assert recent < len(pd.read_csv(DATA)) * 0.8 * 0.6
+
+    for seed in range(2):
+        summary = predictor.update(pd.read_csv(DATA).sample(300, random_state=seed))
+        assert summary['accepted']
+        assert len(predictor._recent) == recent
+        assert len(predictor._holdout) == holdout
+
+
+def test_update_with_new_category_keeps_codes(load_predictor, model_dir, tmp_path):
+    predictor = load_predictor()
+    predictor._ensure_full()
+    le = predictor.encoders['MTRANS']
+    trained = list(le.classes_)
+    new_rows = pd.read_csv(DATA).sample(300, random_state=7)
+    new_rows.loc[new_rows.index[:30], 'MTRANS'] = 'Scooter'
+
+    summary = predictor.update(new_rows, tolerance=1.0)
+    assert summary['accepted'] and summary['new_categories'] == {'MTRANS': ['Scooter']}
+
+    # Categorias do treino mantêm os códigos do LabelEncoder, que continua ordenado
+    assert predictor.categories['MTRANS'] == trained + ['Scooter']
+    assert list(le.inverse_transform(le.transform(trained))) == trained
+    assert [predictor._code_maps['MTRANS'][c] for c in trained] == list(le.transform(trained))
+
+    rows = new_rows.drop(columns='Obesity').head(40)
+    X, unknown = predictor._encode_rows(rows)
+    assert [predictor.categories['MTRANS'][code] for code in X['MTRANS']] == rows['MTRANS'].tolist()
+    assert not any(unknown)
+
+    path = predictor.save(str(tmp_path / 'model.joblib'))
+    for engine in ('sklearn', 'flat'):
+        loaded = type(predictor)(DATA, model_dir=model_dir, engine=engine)
+        assert loaded.load(path, predictor.fingerprint())
+        assert loaded.categories == predictor.categories
+        assert loaded.predict(rows.iloc[0].to_dict())[0] == predictor.predict(rows.iloc[0].to_dict())[0]
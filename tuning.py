@@ -0,0 +1,217 @@
+"""Busca de hiperparâmetros da floresta por successive halving, pesando acurácia e latência.
+
+Uso:
+    python tuning.py --workers 4 --latency-budget-ms 0.5
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold, cross_val_score, train_test_split
+
+from dataset_cache import atomic_path
+from machine_learning import DEFAULT_PARAMS, FlatForest, ObesityPredictor, file_sha256, leaderboard_path
+
+SEARCH_SPACE = {
+    'n_estimators': [25, 50, 100, 200],
+    'max_depth': [6, 8, 10, 14, None],
+    'min_samples_leaf': [1, 2, 4],
+    'max_features': ['sqrt', 'log2', 0.5],
+}
+
+# Dados compartilhados com os processos do pool (ver _init_worker)
+_worker_data = {}
+
+
+def _init_worker(X, y):
+    _worker_data.update(X=X, y=y)
+
+
+def measure_latency_ms(model, X, repeats=200):
+    """Mediana da latência de uma predição de um paciente no engine 'flat'"""
+    forest = FlatForest(model)
+    row = np.ascontiguousarray(X[:1], dtype=np.float32)
+    forest.predict_proba(row)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        forest.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1e3)
+
+
+def _evaluate_candidate(params, n_samples, cv, seed, return_model=False):
+    """Acurácia por CV numa amostra estratificada de n_samples linhas + tamanho da floresta ajustada"""
+    X, y = _worker_data['X'], _worker_data['y']
+    if n_samples < len(y):
+        X, _, y, _ = train_test_split(X, y, train_size=n_samples, stratify=y, random_state=seed)
+
+    model = RandomForestClassifier(**{**DEFAULT_PARAMS, **params})
+    folds = StratifiedKFold(n_splits=cv, shuffle=True, random_state=seed)
+    scores = cross_val_score(model, X, y, cv=folds)
+
+    model.fit(X, y)
+    result = {
+        'params': params,
+        'n_samples': int(len(y)),
+        'accuracy': float(scores.mean()),
+        'accuracy_std': float(scores.std()),
+        'n_nodes': int(sum(e.tree_.node_count for e in model.estimators_)),
+        # Níveis percorridos por uma predição no engine 'flat': custo determinístico,
+        # usado no lugar da latência enquanto os candidatos rodam em paralelo
+        'depth_sum': int(sum(e.get_depth() for e in model.estimators_)),
+    }
+    if return_model:
+        result['model'] = model
+    return result
+
+
+def pareto_front(results, cost='latency_ms'):
+    """Resultados não dominados em (maior acurácia, menor custo)"""
+    front = []
+    for r in results:
+        dominated = any(
+            o['accuracy'] >= r['accuracy'] and o[cost] <= r[cost]
+            and (o['accuracy'] > r['accuracy'] or o[cost] < r[cost])
+            for o in results
+        )
+        if not dominated:
+            front.append(r)
+    return front
+
+
+def candidate_grid(space=SEARCH_SPACE, n_candidates=None, seed=42):
+    keys = list(space)
+    grid = [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+    if n_candidates and n_candidates < len(grid):
+        grid = random.Random(seed).sample(grid, n_candidates)
+    return grid
+
+
+def successive_halving(X, y, candidates, eta=3, min_samples=200, cv=3, workers=None, seed=42, log=None):
+    """Roda as rodadas de halving; devolve todos os resultados, marcando os da rodada final"""
+    n_total = len(y)
+    history = []
+    survivors = list(candidates)
+    n_samples = min(min_samples, n_total)
+    round_idx = 0
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X, y)) as pool:
+        while True:
+            is_last = n_samples >= n_total or len(survivors) <= eta
+            if is_last:
+                n_samples = n_total
+            results = list(pool.map(_evaluate_candidate, survivors,
+                                    itertools.repeat(n_samples), itertools.repeat(cv),
+                                    itertools.repeat(seed), itertools.repeat(is_last)))
+            for r in results:
+                r.update(round=round_idx, final=is_last)
+            if is_last:
+                # Latência dos finalistas medida em série, fora do pool: com os workers
+                # disputando núcleos e cache, a medida dependeria do que rodava ao lado
+                for r in results:
+                    r['latency_ms'] = measure_latency_ms(r.pop('model'), X)
+            history.extend(results)
+            if log:
+                best = max(results, key=lambda r: r['accuracy'])
+                log(f"rodada {round_idx}: {len(results)} candidatos com {n_samples} linhas, "
+                    f"melhor acurácia {best['accuracy']:.4f}")
+            if is_last:
+                return history
+
+            ranked = sorted(results, key=lambda r: r['accuracy'], reverse=True)
+            keep = ranked[:max(1, math.ceil(len(ranked) / eta))]
+            kept_ids = {id(r) for r in keep}
+            keep += [r for r in pareto_front(results, cost='depth_sum') if id(r) not in kept_ids]
+            survivors = [r['params'] for r in keep]
+            n_samples = min(n_samples * eta, n_total)
+            round_idx += 1
+
+
+def _cached_search(path, dataset_sha256, search):
+    """True se o leaderboard em path veio deste CSV e das mesmas configurações de busca"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            leaderboard = json.load(f)
+    except (OSError, ValueError):
+        return False
+    saved = {key: value for key, value in leaderboard.get('search', {}).items() if key != 'seconds'}
+    return leaderboard.get('dataset_sha256') == dataset_sha256 and saved == search
+
+
+def run_search(data_path='Obesity.csv', model_dir='artefatos', eta=3, min_samples=200, cv=3,
+               n_candidates=None, workers=None, seed=42, log=None, force=False):
+    """Executa a busca e grava o leaderboard; devolve o caminho do arquivo (o salvo, se já existir e force=False)"""
+    candidates = candidate_grid(n_candidates=n_candidates, seed=seed)
+    dataset_sha256 = file_sha256(data_path)
+    search = {'eta': eta, 'min_samples': min_samples, 'cv': cv, 'seed': seed, 'n_candidates': len(candidates)}
+    path = leaderboard_path(data_path, model_dir)
+    if not force and _cached_search(path, dataset_sha256, search):
+        if log:
+            log(f"leaderboard já calculado para este CSV e estas configurações: {path} (use --force para refazer)")
+        return path
+
+    predictor = ObesityPredictor(data_path, model_dir=model_dir)
+    X, y, _ = predictor._load_training_data()
+    start = time.perf_counter()
+    history = successive_halving(X.to_numpy(), y.to_numpy(), candidates, eta=eta,
+                                 min_samples=min_samples, cv=cv, workers=workers, seed=seed, log=log)
+    history.sort(key=lambda r: (not r['final'], -r['accuracy'], r.get('latency_ms', r['depth_sum'])))
+
+    os.makedirs(model_dir, exist_ok=True)
+    leaderboard = {
+        'dataset_sha256': dataset_sha256,
+        'search': {**search, 'seconds': round(time.perf_counter() - start, 2)},
+        'results': history,
+    }
+    with atomic_path(path) as tmp_path, open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(leaderboard, f, indent=2)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Busca de hiperparâmetros por successive halving.')
+    parser.add_argument('--data', default='Obesity.csv')
+    parser.add_argument('--model-dir', default='artefatos')
+    parser.add_argument('--eta', type=int, default=3)
+    parser.add_argument('--min-samples', type=int, default=200)
+    parser.add_argument('--cv', type=int, default=3)
+    parser.add_argument('--n-candidates', type=int, default=None,
+                        help='amostra aleatória da grade (padrão: grade completa)')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--latency-budget-ms', type=float, default=None,
+                        help='mostra a configuração que from_leaderboard escolheria')
+    parser.add_argument('--force', action='store_true',
+                        help='refaz a busca mesmo com leaderboard salvo para este CSV')
+    args = parser.parse_args(argv)
+
+    log = lambda msg: print(msg, file=sys.stderr)  # noqa: E731
+    path = run_search(args.data, args.model_dir, eta=args.eta, min_samples=args.min_samples,
+                      cv=args.cv, n_candidates=args.n_candidates, workers=args.workers, log=log,
+                      force=args.force)
+    with open(path, encoding='utf-8') as f:
+        results = json.load(f)['results']
+
+    print(f"Leaderboard gravado em {path}")
+    print(f"{'acurácia':>9} {'latência ms':>12} {'nós':>7}  parâmetros")
+    for r in [r for r in results if r['final']][:10]:
+        print(f"{r['accuracy']:>9.4f} {r['latency_ms']:>12.3f} {r['n_nodes']:>7}  {r['params']}")
+
+    if args.latency_budget_ms is not None:
+        predictor = ObesityPredictor.from_leaderboard(args.data, latency_budget_ms=args.latency_budget_ms,
+                                                      model_dir=args.model_dir)
+        print(f"Escolhido para {args.latency_budget_ms} ms: {predictor.params}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())